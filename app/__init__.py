@@ -1,6 +1,4 @@
-import logging
-from logging.handlers import RotatingFileHandler
-from pathlib import Path
+import os
 
 from flask import Flask
 from flask_caching import Cache
@@ -9,8 +7,10 @@ from flask_marshmallow import Marshmallow
 from flask_migrate import Migrate
 from flask_sqlalchemy import SQLAlchemy
 from flask_wtf import CSRFProtect
+from jinja2 import FileSystemBytecodeCache
 from sqlalchemy import MetaData
 
+from app.routing import RoutingSession
 from config import Config
 
 metadata = MetaData(
@@ -22,7 +22,7 @@ metadata = MetaData(
         "pk": "pk_%(table_name)s",
     }
 )
-db = SQLAlchemy(metadata=metadata)
+db = SQLAlchemy(metadata=metadata, session_options={"class_": RoutingSession})
 migrate = Migrate()
 ma = Marshmallow()
 login = LoginManager()
@@ -32,60 +32,57 @@ cache = Cache()
 
 
 def create_app(config_class=Config) -> Flask:
-    app = Flask(__name__)
-    app.config.from_object(config_class)
-
-    db.init_app(app)
-    migrate.init_app(app, db)
-    ma.init_app(app)
-    login.init_app(app)
-    csrf.init_app(app)
-    cache.init_app(app)
-
-    from app.main import blueprint as main_blueprint
-
-    app.register_blueprint(main_blueprint)
-
-    from app.api import blueprint as api_blueprint
-
-    app.register_blueprint(api_blueprint)  # url_prefix defined in view functions
-
-    from app.errors import blueprint as errors_blueprint
-
-    app.register_blueprint(errors_blueprint)
-
-    Path("./logs").mkdir(exist_ok=True)
-    if app.debug:
-        # Logging for debugging
-        stream_handler = logging.StreamHandler()
-        stream_handler.setLevel(logging.DEBUG)
-        app.logger.addHandler(stream_handler)
-    else:
-        # Logging for requests
-        requests_handler = RotatingFileHandler(
-            "logs/requests.log", maxBytes=10240, backupCount=10
-        )
-        logging.getLogger("werkzeug").addHandler(requests_handler)
-        logging.getLogger("werkzeug").setLevel(logging.INFO)
-
-        # Logging error tracebacks
-        errors_handler = RotatingFileHandler(
-            "logs/errors.log", maxBytes=10240, backupCount=10
-        )
-        errors_handler.setFormatter(
-            logging.Formatter(
-                "%(asctime)s %(levelname)s: %(message)s\n"
-                "[in %(pathname)s:%(lineno)d]"
-            )
-        )
-        app.logger.addHandler(errors_handler)
-        app.logger.setLevel(logging.INFO)
-
-        # Additional logging to stdout for PaaS monitoring
-        stream_handler = logging.StreamHandler()
-        stream_handler.setLevel(logging.INFO)
-        app.logger.addHandler(stream_handler)
+    from app.monitoring.startup import StartupTimer
 
+    timer = StartupTimer()
+    with timer.phase("config"):
+        app = Flask(__name__)
+        app.config.from_object(config_class)
+        if cache_dir := app.config["JINJA_BYTECODE_CACHE_DIR"]:
+            os.makedirs(cache_dir, exist_ok=True)
+            app.jinja_options = {
+                **app.jinja_options,
+                "bytecode_cache": FileSystemBytecodeCache(cache_dir),
+            }
+
+    with timer.phase("extensions"):
+        from app.monitoring.pool import engine_options
+
+        app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(app.config)
+        db.init_app(app)
+        migrate.init_app(app, db)
+        ma.init_app(app)
+        login.init_app(app)
+        csrf.init_app(app)
+        cache.init_app(app)
+
+    with timer.phase("blueprints"):
+        from app.main import blueprint as main_blueprint
+
+        app.register_blueprint(main_blueprint)
+
+        from app.api import blueprint as api_blueprint
+
+        app.register_blueprint(api_blueprint)  # url_prefix defined in view functions
+
+        from app.errors import blueprint as errors_blueprint
+
+        app.register_blueprint(errors_blueprint)
+
+    with timer.phase("monitoring"):
+        from app.monitoring import blueprint as monitoring_blueprint
+        from app.monitoring.health import db_monitor
+        from app.monitoring.logs import configure_logging
+        from app.monitoring.profiling import init_profiling
+        from app.monitoring.sql import sql_profiler
+
+        app.register_blueprint(monitoring_blueprint)
+        db_monitor.init_app(app)
+        sql_profiler.init_app(app)
+        configure_logging(app)
+        init_profiling(app)
+
+    app.extensions["startup"] = timer.phases
     return app
 
 
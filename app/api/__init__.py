@@ -2,4 +2,16 @@ from flask import Blueprint
 
 blueprint = Blueprint("api", __name__)
 
-from app.api import categories, handlers, session, transactions, users
+from app.api import (
+    bootstrap,
+    categories,
+    export,
+    handlers,
+    lookups,
+    replica,
+    rules,
+    session,
+    sync,
+    transactions,
+    users,
+)
@@ -0,0 +1,72 @@
+"""Data required by the dashboard on its first load, in a single response.
+
+Instead of four requests, each authenticating the user and running its own queries,
+the dashboard loads session and user entities, the most recent transactions and the
+monthly saldo at once. The data is inlined into the rendered dashboard as well, so
+its first paint needs no further requests.
+"""
+from typing import Any, Mapping
+
+from flask import current_app, request
+from flask.typing import ResponseReturnValue
+from flask_login import current_user, login_required
+
+from app.api import blueprint
+from app.api.session import session_entities
+from app.api.sync import sync_cursor
+from app.api.transactions import list_transactions, monthly_saldo
+from app.api.users import user_entities
+
+
+@blueprint.route("/api/bootstrap", methods=["GET"])
+@login_required
+def fetch_bootstrap() -> ResponseReturnValue:
+    """Fetch all data of the dashboard, transactions accept the same filtering and
+    projection parameters as `/api/transactions`
+
+    Response JSON structure example:
+    {
+        "session": {"currencies": [...], "banks": {...}},
+        "user": {"user_details": {...}, "categories": {...}, ...},
+        "transactions": [...],
+        "truncated": false,
+        "monthly": [{"month": "2023-01", "incoming": 10.0, ...}, ...],
+        "cursor": "2023-01-01T10:05:00.654321"
+    }
+
+    Returns:
+        ResponseReturnValue: data of the dashboard
+    """
+    return bootstrap_data(request.args), 200
+
+
+def bootstrap_data(args: Mapping[str, Any] | None = None) -> dict:
+    """Collect data of the dashboard of the current user. The user is loaded once
+    and shared by all parts, all queries run on the connection of the request.
+
+    Args:
+        args (Mapping[str, Any] | None, optional): filtering and projection values
+        of transactions. Defaults to None.
+
+    Returns:
+        dict: session and user entities, transactions, whether they were cut off
+        by the limit, monthly saldo and the cursor of synced changes of transactions
+    """
+    user = current_user.model
+    limit = current_app.config["BOOTSTRAP_TRANSACTIONS_LIMIT"]
+    # One more transaction is selected to tell whether there are more of them
+    transactions = list_transactions(args or {}, limit=limit + 1)["transactions"]
+    if isinstance(transactions, dict):
+        truncated = len(transactions["rows"]) > limit
+        transactions["rows"] = transactions["rows"][:limit]
+    else:
+        truncated = len(transactions) > limit
+        transactions = transactions[:limit]
+    return {
+        "session": session_entities(),
+        "user": user_entities(user),
+        "transactions": transactions,
+        "truncated": truncated,
+        "monthly": monthly_saldo(user.id) or [],
+        "cursor": sync_cursor().isoformat(),
+    }
@@ -14,7 +14,7 @@ def add_category() -> ResponseReturnValue:
     """Add a category"""
 
     verified_data = UniqueCategorySchema().load(request.json)
-    category = Category(user=current_user, **verified_data)
+    category = Category(user=current_user.model, **verified_data)
     db.session.add(category)
     db.session.commit()
     return CategorySchema().dump(category), 201
@@ -0,0 +1,323 @@
+import logging
+import re
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from threading import Lock
+from typing import Any, Iterable
+
+from sqlalchemy import update
+
+from app import db
+from app.caching import get_version, user_scope
+from app.models import CategoryRule, Transaction, User
+
+# Child of the app logger, so messages go to its handlers
+logger = logging.getLogger(__name__)
+
+# Maximum number of users whose compiled matchers are kept in memory
+MATCHER_CACHE_SIZE = 256
+# Maximum number of distinct texts with memoized matches, per matcher
+TEXT_CACHE_SIZE = 100_000
+
+
+class AhoCorasick:
+    """Automaton finding all occurrences of many substrings in a single pass over text,
+    so the cost of a search does not depend on the number of patterns"""
+
+    def __init__(self, patterns: Iterable[tuple[str, int]]) -> None:
+        """
+        Args:
+            patterns (Iterable[tuple[str, int]]): pairs of (pattern, value),
+            value is reported whenever its pattern is found
+        """
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._output: list[set[int]] = [set()]
+
+        # Build a trie of all patterns
+        for pattern, value in patterns:
+            state = 0
+            for char in pattern:
+                if char not in self._goto[state]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(set())
+                    self._goto[state][char] = len(self._goto) - 1
+                state = self._goto[state][char]
+            self._output[state].add(value)
+
+        # Link each state to the longest proper suffix present in the trie
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._output[next_state] |= self._output[self._fail[next_state]]
+
+    def search(self, text: str) -> set[int]:
+        """Return values of all patterns found in the text"""
+
+        goto, fail, output = self._goto, self._fail, self._output
+        found: set[int] = set()
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found |= output[state]
+        return found
+
+
+@dataclass(frozen=True)
+class CompiledRule:
+    category_id: int
+    amount_min: float | None
+    amount_max: float | None
+    bank_id: int | None
+
+    def accepts(self, amount: float, bank_id: int | None) -> bool:
+        """Check conditions which are not matched by text patterns"""
+        return (
+            (self.amount_min is None or amount >= self.amount_min)
+            and (self.amount_max is None or amount <= self.amount_max)
+            and (self.bank_id is None or bank_id == self.bank_id)
+        )
+
+
+def _joinable(pattern: str) -> bool:
+    """Check whether a regex keeps its meaning inside an alternation of named groups"""
+    if re.search(r"\\[1-9]", pattern):
+        # Numbers of groups are shifted by the enclosing groups
+        return False
+    try:
+        re.compile(f"(?:{pattern})|x")
+    except re.error:
+        return False
+    return True
+
+
+class RuleMatcher:
+    """All rules of a user compiled into a single multi-pattern matcher.
+
+    Substring patterns are searched with one Aho-Corasick automaton, so every
+    transaction text is scanned once regardless of the number of substring rules.
+    Regular expressions are joined into one alternation, so every text is scanned
+    once for positions where any of them matches. Only at these positions, a pattern
+    of optional named lookahead groups tells all regexes matching there, including
+    regexes hidden by an earlier alternative. Matching is case-insensitive and
+    the first matching rule by (priority, id) wins.
+    """
+
+    def __init__(self, rules: list[CategoryRule]) -> None:
+        rules = sorted(rules, key=lambda rule: (rule.priority, rule.id))
+        # Rules are referenced by their position, so lower index means precedence
+        self._rules = [
+            CompiledRule(
+                rule.category_id, rule.amount_min, rule.amount_max, rule.bank_id
+            )
+            for rule in rules
+        ]
+        self._substrings = AhoCorasick(
+            (rule.pattern.lower(), index)
+            for index, rule in enumerate(rules)
+            if rule.pattern and not rule.is_regex
+        )
+        # Rules with the same regex share a named group
+        regexes: dict[str, list[int]] = {}
+        for index, rule in enumerate(rules):
+            if not (rule.pattern and rule.is_regex):
+                continue
+            try:
+                re.compile(rule.pattern)
+            except re.error as error:
+                # Stored rule which is not valid anymore must not break imports
+                logger.warning("Skipping invalid regex of rule %s: %s", rule.id, error)
+                continue
+            regexes.setdefault(rule.pattern, []).append(index)
+        self._regex_positions: re.Pattern | None = None
+        self._regex_groups: re.Pattern | None = None
+        self._group_rules: dict[str, tuple[int, ...]] = {}
+        # Regexes which cannot be joined, e.g. with numbered backreferences or
+        # with global flags, are searched for separately
+        self._standalone: list[tuple[re.Pattern, tuple[int, ...]]] = []
+        joined: list[str] = []
+        for pattern, indexes in regexes.items():
+            if _joinable(pattern):
+                joined.append(pattern)
+                self._group_rules[f"r{len(self._group_rules)}"] = tuple(indexes)
+            else:
+                self._standalone.append(
+                    (re.compile(pattern, re.IGNORECASE), tuple(indexes))
+                )
+        if joined:
+            try:
+                # Lookahead does not consume text, so overlapping matches are found
+                self._regex_positions = re.compile(
+                    "(?=" + "|".join(f"(?:{pattern})" for pattern in joined) + ")",
+                    re.IGNORECASE,
+                )
+                self._regex_groups = re.compile(
+                    "".join(
+                        f"(?:(?=(?P<{name}>{pattern})))?"
+                        for name, pattern in zip(self._group_rules, joined)
+                    ),
+                    re.IGNORECASE,
+                )
+            except re.error:
+                # E.g. the same group name used by several regexes
+                self._regex_positions = self._regex_groups = None
+                self._standalone += [
+                    (re.compile(pattern, re.IGNORECASE), indexes)
+                    for pattern, indexes in zip(joined, self._group_rules.values())
+                ]
+        self._patternless = frozenset(
+            index for index, rule in enumerate(rules) if not rule.pattern
+        )
+        # Statements repeat the same merchants, so text matches are memoized
+        self._text_cache: dict[str, frozenset[int]] = {}
+
+    def _find_candidates(self, text: str) -> frozenset[int]:
+        """Find indexes of rules whose text pattern matches"""
+
+        if (candidates := self._text_cache.get(text)) is not None:
+            return candidates
+
+        found = self._substrings.search(text.lower())
+        if self._regex_positions and self._regex_groups:
+            for position in self._regex_positions.finditer(text):
+                groups = self._regex_groups.match(text, position.start())
+                for name, indexes in self._group_rules.items():
+                    if groups.group(name) is not None:
+                        found.update(indexes)
+        for regex, indexes in self._standalone:
+            if regex.search(text):
+                found.update(indexes)
+        candidates = frozenset(found) | self._patternless
+
+        if len(self._text_cache) >= TEXT_CACHE_SIZE:
+            self._text_cache.clear()
+        self._text_cache[text] = candidates
+        return candidates
+
+    def match(self, text: str, amount: float, bank_id: int | None) -> int | None:
+        """Find category id of the first rule matching a transaction
+
+        Args:
+            text (str): concatenated info, title and place of the transaction
+            amount (float): transaction amount in user's main currency
+            bank_id (int | None): id of transaction bank
+
+        Returns:
+            int | None: category id or None if no rule matches
+        """
+        for index in sorted(self._find_candidates(text)):
+            if self._rules[index].accepts(amount, bank_id):
+                return self._rules[index].category_id
+        return None
+
+
+class _MatcherCache:
+    """Per-process LRU cache of compiled matchers, rebuilt only when user's rules change"""
+
+    def __init__(self, size: int) -> None:
+        self._size = size
+        self._lock = Lock()
+        self._matchers: OrderedDict[int, tuple[int, RuleMatcher]] = OrderedDict()
+
+    def get(self, user: User) -> RuleMatcher:
+        # Any added, modified or deleted rule bumps the version of the user
+        version = get_version(user_scope(user.id))
+        with self._lock:
+            if user.id in self._matchers and self._matchers[user.id][0] == version:
+                self._matchers.move_to_end(user.id)
+                return self._matchers[user.id][1]
+
+        matcher = RuleMatcher(CategoryRule.query.filter_by(user_id=user.id).all())
+        with self._lock:
+            self._matchers[user.id] = (version, matcher)
+            self._matchers.move_to_end(user.id)
+            if len(self._matchers) > self._size:
+                self._matchers.popitem(last=False)
+        return matcher
+
+
+matchers = _MatcherCache(MATCHER_CACHE_SIZE)
+
+
+def transaction_text(*values: str | None) -> str:
+    """Join text columns of a transaction searched by rule patterns"""
+    return "\n".join(value for value in values if value)
+
+
+def categorize_transactions(user: User, rows: list[dict[str, Any]]) -> int:
+    """Assign categories to uncategorized transaction rows using user's rules
+
+    Args:
+        user (User): owner of transactions and rules
+        rows (list[dict[str, Any]]): rows of imported transactions,
+        categorized in place
+
+    Returns:
+        int: number of categorized transactions
+    """
+    matcher = matchers.get(user)
+    categorized = 0
+    for row in rows:
+        if row.get("category_id") is not None:
+            continue
+        category_id = matcher.match(
+            transaction_text(row.get("info"), row.get("title"), row.get("place")),
+            row["main_amount"],
+            row.get("bank_id"),
+        )
+        if category_id is not None:
+            row["category_id"] = category_id
+            categorized += 1
+    return categorized
+
+
+def apply_rules(user: User, overwrite: bool = False) -> int:
+    """Categorize already stored transactions of a user, with set-based updates
+
+    Args:
+        user (User): owner of transactions and rules
+        overwrite (bool, optional): whether to recategorize transactions
+        which already have a category. Defaults to False.
+
+    Returns:
+        int: number of categorized transactions
+    """
+    matcher = matchers.get(user)
+    query = db.session.query(
+        Transaction.id,
+        Transaction.info,
+        Transaction.title,
+        Transaction.place,
+        Transaction.main_amount,
+        Transaction.bank_id,
+    ).filter(Transaction.user_id == user.id)
+    if not overwrite:
+        query = query.filter(Transaction.category_id.is_(None))
+
+    # Group matched transactions by category to update each group with one statement
+    matched: dict[int, list[int]] = {}
+    for id, info, title, place, amount, bank_id in query.yield_per(5000):
+        category_id = matcher.match(
+            transaction_text(info, title, place), amount, bank_id
+        )
+        if category_id is not None:
+            matched.setdefault(category_id, []).append(id)
+
+    for category_id, ids in matched.items():
+        db.session.execute(
+            update(Transaction)
+            .where(Transaction.id.in_(ids))
+            .values(category_id=category_id)
+            .execution_options(synchronize_session=False)
+        )
+    return sum(len(ids) for ids in matched.values())
@@ -0,0 +1,206 @@
+"""Streaming export of filtered transactions into CSV, JSON Lines and Parquet.
+
+Rows are fetched from a server-side cursor in batches and every batch is encoded and
+sent before the next one is fetched. CSV and JSON Lines are gzipped on the fly,
+Parquet files compress their columns themselves. Memory used by an export is
+therefore bounded by the batch size, not by the number of exported transactions.
+Parquet is only available with the optional pyarrow package installed.
+"""
+import csv
+import io
+import json
+import zlib
+from typing import Any, Callable, Iterable, Iterator, Mapping, Sequence
+
+from flask import Response, current_app, request, stream_with_context
+from flask.typing import ResponseReturnValue
+from flask_login import current_user, login_required
+from sqlalchemy import select
+from sqlalchemy.engine import Row
+from sqlalchemy.sql import Select
+
+from app import db
+from app.api import blueprint
+from app.api.schemas import TRANSACTION_FIELDS, ExportSchema, FiltersSchema
+from app.api.transactions import dump_rows
+from app.api.utils import filter_conditions
+from app.models import Transaction
+
+# Extension and media type of exported files of each format
+EXPORT_FILES = {
+    "csv": ("csv", "text/csv"),
+    "ndjson": ("ndjson", "application/x-ndjson"),
+    "parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+
+
+@blueprint.route("/api/transactions/export", methods=["GET"])
+@login_required
+def export_transactions() -> ResponseReturnValue:
+    """Download transactions matching url-encoded filtering parameters as a file,
+    accepts the same filtering parameters and `fields` as `/api/transactions`
+
+    Request JSON structure example:
+    {
+        'date_min': '2022-01-01',
+        'category': ['Salary', 'Hobby'],
+        'fields': 'id,date,amount,category',
+        'format': 'ndjson',
+        'compression': 'gzip'
+    }
+
+    Returns:
+        ResponseReturnValue: streamed file
+    """
+    args = request.args.to_dict()
+    export = ExportSchema().load(
+        {
+            key: args.pop(key)
+            for key in ("fields", "format", "compression")
+            if key in args
+        }
+    )
+    filters = FiltersSchema().load(args)
+
+    extension, mimetype = EXPORT_FILES[export["format"]]
+    if export["format"] != "parquet" and export["compression"] == "gzip":
+        extension, mimetype = f"{extension}.gz", "application/gzip"
+    chunks = stream_transactions(current_user.id, filters, **export)
+    return Response(
+        stream_with_context(chunks),
+        mimetype=mimetype,
+        headers={
+            "Content-Disposition": f"attachment; filename=transactions.{extension}"
+        },
+    )
+
+
+def stream_transactions(
+    user_id: int,
+    filters: Mapping[str, Any],
+    field_names: list[str],
+    format: str,
+    compression: str,
+) -> Iterator[bytes]:
+    """Encode transactions of a user into chunks of an exported file
+
+    Args:
+        user_id (int): id of the user
+        filters (Mapping[str, Any]): filtering values loaded with FiltersSchema
+        field_names (list[str]): names of exported fields in TRANSACTION_FIELDS
+        format (str): 'csv', 'ndjson' or 'parquet'
+        compression (str): 'gzip' or 'none'
+
+    Returns:
+        Iterator[bytes]: chunks of the file, rows are fetched as they are consumed
+    """
+    query = (
+        select(*(TRANSACTION_FIELDS[name] for name in field_names))
+        .where(Transaction.user_id == user_id, *filter_conditions(filters))
+        .order_by(Transaction.transaction_date.desc())
+    )
+    batches = fetch_batches(query, current_app.config["EXPORT_BATCH_SIZE"])
+    if format == "parquet":
+        return encode_parquet(batches, field_names, compression)
+
+    encode: Callable = encode_csv if format == "csv" else encode_ndjson
+    chunks = encode(batches, field_names)
+    return gzipped(chunks) if compression == "gzip" else chunks
+
+
+def fetch_batches(query: Select, batch_size: int) -> Iterator[Sequence[Row]]:
+    """Fetch rows of a query in batches from a server-side cursor"""
+    result = db.session.connection().execute(
+        query.execution_options(yield_per=batch_size)
+    )
+    yield from result.partitions()
+
+
+def encode_csv(
+    batches: Iterable[Sequence[Row]], field_names: list[str]
+) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(field_names)
+    for batch in batches:
+        writer.writerows(dump_rows(batch, field_names))
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    # Header is written even without any transactions
+    yield buffer.getvalue().encode()
+
+
+def encode_ndjson(
+    batches: Iterable[Sequence[Row]], field_names: list[str]
+) -> Iterator[bytes]:
+    for batch in batches:
+        yield "".join(
+            json.dumps(dict(zip(field_names, row))) + "\n"
+            for row in dump_rows(batch, field_names)
+        ).encode()
+
+
+def encode_parquet(
+    batches: Iterable[Sequence[Row]], field_names: list[str], compression: str
+) -> Iterator[bytes]:
+    """Write every batch of rows as a row group of a Parquet file, with column types
+    of the fields
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    def arrow_type(name: str) -> pa.DataType:
+        column_type = TRANSACTION_FIELDS[name].type
+        if isinstance(column_type, db.Integer):
+            return pa.int64()
+        if isinstance(column_type, db.Float):
+            return pa.float64()
+        if isinstance(column_type, db.DateTime):
+            return pa.timestamp("us")
+        return pa.string()
+
+    schema = pa.schema([(name, arrow_type(name)) for name in field_names])
+    sink = ChunkSink()
+    with pq.ParquetWriter(sink, schema, compression=compression) as writer:
+        for batch in batches:
+            columns = [
+                pa.array(values, type=field.type)
+                for values, field in zip(zip(*batch), schema)
+            ]
+            writer.write_table(pa.Table.from_arrays(columns, schema=schema))
+            yield sink.drain()
+    yield sink.drain()
+
+
+def gzipped(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Compress chunks into a gzip file on the fly"""
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        if compressed := compressor.compress(chunk):
+            yield compressed
+    yield compressor.flush()
+
+
+class ChunkSink(io.RawIOBase):
+    """Write-only binary stream, which keeps written bytes until they are drained"""
+
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
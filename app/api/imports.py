@@ -2,59 +2,136 @@ import csv
 import io
 import typing
 import xml.etree.ElementTree as ET
-from datetime import datetime
+from datetime import date, datetime
+from operator import itemgetter
 from typing import Any
 
-from app import db
 from app.exceptions import FileError
-from app.models import Bank, MyBanks, Transaction, User
+from app.models import ExchangeRate, MyBanks, User, bank_registry
+
+# Revolut statement columns mapped to Transaction attributes
+REVOLUT_COLUMNS = {
+    "Type": "info",
+    "Description": "title",
+    "Amount": "base_amount",
+    "Currency": "base_currency",
+    "Completed Date": "transaction_date",
+}
 
 
-def import_revolut_statement(file: typing.BinaryIO, user: User) -> list[Transaction]:
-    """Load Transactions from Revolut monthly bank statement in .csv file format
+def parse_revolut_columns(file: typing.BinaryIO) -> dict[str, list]:
+    """Parse Revolut .csv statement into column arrays of transaction data.
+    Rows with internal revolut exchanges are skipped while reading.
 
     Args:
         file (typing.BinaryIO): binary stream from which data is parsed
 
-    Raises:
-        FileError: raised in case of any errors during file processing
-
     Returns:
-        list[Transaction]: list of parsed transactions
+        dict[str, list]: column arrays keyed by Transaction attribute names
     """
+    with io.TextIOWrapper(file, encoding="utf-8") as csv_file:
+        reader = csv.reader(csv_file, delimiter=",")
+        header = next(reader)
+        type_index = header.index("Type")
+        # Ignore rows with internal revolut exchanges
+        rows = [row for row in reader if row[type_index] != "EXCHANGE"]
+
+    # Slice rows into columns, only for the needed ones
+    parsed = {
+        name: list(map(itemgetter(header.index(column)), rows))
+        for column, name in REVOLUT_COLUMNS.items()
+    }
+    parsed["base_amount"] = list(map(float, parsed["base_amount"]))
+    # Completed Date is in 'YYYY-MM-DD HH:MM:SS' format, which
+    # fromisoformat parses considerably faster than strptime
+    parsed["transaction_date"] = list(
+        map(datetime.fromisoformat, parsed["transaction_date"])
+    )
+    return parsed
+
 
-    transactions: list[Transaction] = []
-    revolut_id = (
-        db.session.query(Bank.id).filter_by(name_enum=MyBanks.EQUABANK.value).scalar()
+def convert_amounts(columns: dict[str, list], main_currency: str) -> list[float]:
+    """Convert base amounts of parsed columns to the main currency of a user.
+    Each exchange rate is looked up once per day and currency.
+
+    Args:
+        columns (dict[str, list]): column arrays with base amounts, currencies
+        and transaction dates
+        main_currency (str): currency to convert amounts to
+
+    Returns:
+        list[float]: main amounts, rounded in the same way as by Transaction
+    """
+    ExchangeRate.preload_rates(
+        columns["transaction_date"], {*columns["base_currency"], main_currency}
     )
-    with io.TextIOWrapper(file, encoding="utf-8") as csv_file:
-        try:
-            reader = csv.DictReader(csv_file, delimiter=",")
+    rates: dict[tuple[date, str], float] = {}
+    main_amounts = []
+    for base_amount, base_currency, transaction_date in zip(
+        columns["base_amount"], columns["base_currency"], columns["transaction_date"]
+    ):
+        if base_currency == main_currency:
+            main_amounts.append(base_amount)
+            continue
+        key = (transaction_date.date(), base_currency)
+        if key not in rates:
+            rates[key] = ExchangeRate.find_exchange_rate(
+                transaction_date, base_currency, main_currency
+            )
+        main_amounts.append(round(base_amount * rates[key], 2))
+    return main_amounts
+
+
+def transaction_rows(
+    columns: dict[str, list], user: User, bank_id: int | None
+) -> list[dict[str, Any]]:
+    """Convert column arrays of a statement to rows of the transactions table,
+    which are inserted with a single statement instead of ORM objects
 
-            for row in reader:
-                # Ignore rows with internal revolut exchanges
-                if row["Type"] != "EXCHANGE":
-                    data = {}
-                    data["info"] = row["Type"]
-                    data["title"] = row["Description"]
-                    data["base_amount"] = float(row["Amount"])
-                    data["base_currency"] = row["Currency"]
-                    data["transaction_date"] = datetime.strptime(
-                        row["Completed Date"], "%Y-%m-%d %H:%M:%S"
-                    )
-                    data["bank_id"] = revolut_id
-                    data["user"] = user
+    Args:
+        columns (dict[str, list]): column arrays keyed by Transaction attribute names
+        user (User): owner of transactions
+        bank_id (int | None): id of the statement bank
 
-                    transaction = Transaction(**data)
-                    transactions.append(transaction)
-        except Exception as e:
-            raise FileError("Error during parsing necessary statement details") from e
+    Returns:
+        list[dict[str, Any]]: rows keyed by Transaction attribute names
+    """
+    columns = {
+        **columns,
+        "main_amount": convert_amounts(columns, user.main_currency),
+    }
+    # Every row has the same keys, as required by executemany
+    constants = {"user_id": user.id, "bank_id": bank_id, "category_id": None}
+    return [
+        {**dict(zip(columns, values)), **constants} for values in zip(*columns.values())
+    ]
 
-    return transactions
 
+def import_revolut_statement(file: typing.BinaryIO, user: User) -> list[dict[str, Any]]:
+    """Load transactions from Revolut monthly bank statement in .csv file format
 
-def import_equabank_statement(file: typing.BinaryIO, user: User) -> list[Transaction]:
-    """Load Transactions from Equabank monthly bank statement in .xml file format
+    Args:
+        file (typing.BinaryIO): binary stream from which data is parsed
+
+    Raises:
+        FileError: raised in case of any errors during file processing
+
+    Returns:
+        list[dict[str, Any]]: rows of parsed transactions
+    """
+
+    revolut = bank_registry.from_enum(MyBanks.REVOLUT)
+    try:
+        columns = parse_revolut_columns(file)
+        return transaction_rows(columns, user, revolut.id if revolut else None)
+    except Exception as e:
+        raise FileError("Error during parsing necessary statement details") from e
+
+
+def import_equabank_statement(
+    file: typing.BinaryIO, user: User
+) -> list[dict[str, Any]]:
+    """Load transactions from Equabank monthly bank statement in .xml file format
 
     Args:
         file (typing.BinaryIO): _description_
@@ -63,7 +140,7 @@ def import_equabank_statement(file: typing.BinaryIO, user: User) -> list[Transac
         FileError: raised in case of any errors during file processing
 
     Returns:
-        list[Transaction]: list of Transactions which were loaded
+        list[dict[str, Any]]: rows of parsed transactions
     """
     # TODO: Handling multiple transactions which are not unique by DB standards (UNIQUE amount, currency, date)
     # Due to incomplete/generalized transaction date in Equabank XML,
@@ -150,11 +227,20 @@ def import_equabank_statement(file: typing.BinaryIO, user: User) -> list[Transac
         else:
             return False
 
-    # temp list holding loaded Transactions
-    transactions: list[Transaction] = []
-    equabank_id: int = (
-        db.session.query(Bank.id).filter_by(name_enum=MyBanks.EQUABANK.value).scalar()
-    )
+    # Column arrays of parsed transaction data
+    columns: dict[str, list] = {
+        name: []
+        for name in (
+            "info",
+            "title",
+            "place",
+            "transaction_date",
+            "base_amount",
+            "base_currency",
+        )
+    }
+    equabank = bank_registry.from_enum(MyBanks.EQUABANK)
+    equabank_id = equabank.id if equabank else None
 
     with io.TextIOWrapper(file, encoding="utf-8") as xml_file:
         # Variable holding calculated sum of all parsed expenses from a single file
@@ -168,28 +254,26 @@ def import_equabank_statement(file: typing.BinaryIO, user: User) -> list[Transac
             # iterate through transaction elements in the statement tree
             for transaction_element in root.findall(".//nms:Ntry", namespace):
                 # Parsing transaction data
-                data: dict[str, Any] = {}
-                data["info"] = parse_record(
-                    transaction_element, ".//nms:RltdPties//nms:Nm"
+                columns["info"].append(
+                    parse_record(transaction_element, ".//nms:RltdPties//nms:Nm")
                 )
-                data["title"] = parse_record(transaction_element, ".//nms:Ustrd")
-                data["place"] = parse_record(
-                    transaction_element, ".//nms:PstlAdr/nms:TwnNm"
+                columns["title"].append(
+                    parse_record(transaction_element, ".//nms:Ustrd")
                 )
-                data["transaction_date"] = parse_date(
-                    transaction_element, ".//nms:BookgDt/nms:Dt"
+                columns["place"].append(
+                    parse_record(transaction_element, ".//nms:PstlAdr/nms:TwnNm")
                 )
-                data["base_amount"], data["base_currency"] = parse_amount(
+                columns["transaction_date"].append(
+                    parse_date(transaction_element, ".//nms:BookgDt/nms:Dt")
+                )
+                base_amount, base_currency = parse_amount(
                     transaction_element,
                     amount_XPath="./nms:Amt",
                     vector_XPath="./nms:CdtDbtInd",
                 )
-                data["bank_id"] = equabank_id
-                data["user"] = user
-
-                transaction = Transaction(**data)
-                transactions.append(transaction)
-                calculated_sum += transaction.base_amount
+                columns["base_amount"].append(base_amount)
+                columns["base_currency"].append(base_currency)
+                calculated_sum += base_amount
         except (ET.ParseError) as e:
             raise FileError("Error during parsing statement - general failure") from e
 
@@ -201,7 +285,10 @@ def import_equabank_statement(file: typing.BinaryIO, user: User) -> list[Transac
         ):
             raise FileError("Error during parsing statement - validation failed")
 
-    return transactions
+    try:
+        return transaction_rows(columns, user, equabank_id)
+    except Exception as e:
+        raise FileError("Error during parsing necessary statement details") from e
 
 
 BANK_IMPORT_MAP = {
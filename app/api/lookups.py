@@ -0,0 +1,68 @@
+from typing import Any, Iterable
+
+from flask import g
+from flask_login import current_user
+
+from app.api import blueprint
+from app.models import BankEntry, Category, bank_registry
+
+
+class EntityLookup:
+    """Request-scoped identity cache of entities referenced in validated data.
+
+    Each entity is fetched at most once per request, and lookups of many entities
+    are batched into a single query. Categories are always scoped to the user.
+    """
+
+    def __init__(self, user_id: int) -> None:
+        self.user_id = user_id
+        self._categories: dict[int, Category | None] = {}
+
+    def prefetch_categories(self, ids: Iterable[Any]) -> None:
+        """Fetch all not yet known categories with a single query
+
+        Args:
+            ids (Iterable[Any]): category ids, non-integer values are ignored
+        """
+        missing = {
+            id
+            for id in ids
+            if isinstance(id, int)
+            and not isinstance(id, bool)
+            and id not in self._categories
+        }
+        if not missing:
+            return
+
+        self._categories.update(dict.fromkeys(missing))
+        self._categories.update(
+            {
+                category.id: category
+                for category in Category.query.filter(
+                    Category.user_id == self.user_id, Category.id.in_(missing)
+                )
+            }
+        )
+
+    def category(self, id: int) -> Category | None:
+        self.prefetch_categories([id])
+        return self._categories[id]
+
+    def bank(self, id: int) -> BankEntry | None:
+        # Banks are static and served by the process-wide registry
+        return bank_registry.get(id)
+
+
+def get_lookup() -> EntityLookup:
+    """Get entity lookup of the current request"""
+
+    lookup = g.get("entity_lookup")
+    if lookup is None or lookup.user_id != current_user.id:
+        lookup = g.entity_lookup = EntityLookup(current_user.id)
+    return lookup
+
+
+@blueprint.teardown_app_request
+def reset_lookup(error: BaseException | None) -> None:
+    """Discard entity lookup at the end of a request"""
+    g.pop("entity_lookup", None)
@@ -0,0 +1,80 @@
+import time
+from threading import Lock
+
+from flask import current_app, g, request, session
+from flask.typing import ResponseReturnValue
+from sqlalchemy.exc import DBAPIError
+
+from app import db
+from app.api import blueprint
+from app.caching import CacheNamespace
+from app.routing import REPLICA_BIND
+
+# Users who recently wrote, whose reads must see their writes
+recent_writers = CacheNamespace("recent_writer")
+
+
+class ReplicaRouter:
+    """Decides whether reads of a request can go to the read replica.
+
+    Read-only requests are routed to the replica, unless the user wrote within
+    the last REPLICA_STICKY_SECONDS, as the replica might not have received the write
+    yet. The replica is checked out before a request is routed to it, so requests
+    fall back to the primary when it is down, and it is not tried again for
+    REPLICA_RETRY_INTERVAL seconds.
+    """
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._down_until = 0.0
+
+    @property
+    def configured(self) -> bool:
+        return REPLICA_BIND in current_app.config["SQLALCHEMY_BINDS"]
+
+    def available(self) -> bool:
+        if time.monotonic() < self._down_until:
+            return False
+        try:
+            # Checkout pings the connection, the connection is then reused by the request
+            with db.engines[REPLICA_BIND].connect():
+                pass
+        except DBAPIError:
+            with self._lock:
+                self._down_until = (
+                    time.monotonic() + current_app.config["REPLICA_RETRY_INTERVAL"]
+                )
+            current_app.logger.warning("Read replica is down, reading from primary")
+            return False
+        return True
+
+    def should_route(self) -> bool:
+        if request.method not in ("GET", "HEAD") or not self.configured:
+            return False
+        # User id is read from the session, loading the user would already query
+        user_id = session.get("_user_id")
+        if user_id is not None and recent_writers.get(user_id):
+            return False
+        return self.available()
+
+
+replica_router = ReplicaRouter()
+
+
+@blueprint.before_request
+def route_reads() -> None:
+    g.use_replica = replica_router.should_route()
+
+
+@blueprint.after_request
+def remember_writer(response: ResponseReturnValue) -> ResponseReturnValue:
+    if (
+        request.method not in ("GET", "HEAD", "OPTIONS")
+        and response.status_code < 400
+        and replica_router.configured
+        and (user_id := session.get("_user_id")) is not None
+    ):
+        recent_writers.set(
+            user_id, True, timeout=current_app.config["REPLICA_STICKY_SECONDS"]
+        )
+    return response
@@ -0,0 +1,86 @@
+from flask import abort, request
+from flask.typing import ResponseReturnValue
+from flask_login import current_user, login_required
+
+from app import db
+from app.api import blueprint
+from app.api.categorization import apply_rules
+from app.api.schemas import CategoryRuleSchema
+from app.models import CategoryRule
+
+
+@blueprint.route("/api/rules", methods=["GET"])
+@login_required
+def fetch_rules() -> ResponseReturnValue:
+    """Get categorization rules of a user, in order of evaluation"""
+
+    rules = current_user.select_rules()
+    return {"rules": CategoryRuleSchema(many=True).dump(rules)}, 200
+
+
+@blueprint.route("/api/rules/add", methods=["POST"])
+@login_required
+def add_rule() -> ResponseReturnValue:
+    """Add a categorization rule
+
+    Request JSON structure example:
+    {
+        "pattern": "lidl|albert",
+        "is_regex": true,
+        "amount_min": null,
+        "amount_max": 0,
+        "bank": 1,
+        "category": 3,
+        "priority": 0
+    }
+    """
+
+    verified_data = CategoryRuleSchema().load(request.json)
+    rule = CategoryRule(user=current_user.model, **verified_data)
+    db.session.add(rule)
+    db.session.commit()
+    return CategoryRuleSchema().dump(rule), 201
+
+
+@blueprint.route("/api/rules/<int:id>/modify", methods=["PATCH"])
+@login_required
+def modify_rule(id: int) -> ResponseReturnValue:
+    """Modify a categorization rule"""
+
+    if not (rule := CategoryRule.get_from_id(id, current_user)):
+        abort(404, "Rule not found")
+    # Whole modified rule is validated, as conditions depend on each other
+    current_data = CategoryRuleSchema(exclude=("id",)).dump(rule)
+    verified_data = CategoryRuleSchema().load({**current_data, **request.json})
+    rule.update(verified_data)
+    db.session.commit()
+    return CategoryRuleSchema().dump(rule), 200
+
+
+@blueprint.route("/api/rules/<int:id>/delete", methods=["DELETE"])
+@login_required
+def delete_rule(id: int) -> ResponseReturnValue:
+    """Delete a categorization rule"""
+
+    if not (rule := CategoryRule.get_from_id(id, current_user)):
+        abort(404, "Rule not found")
+    db.session.delete(rule)
+    db.session.commit()
+    return {}, 200
+
+
+@blueprint.route("/api/rules/apply", methods=["POST"])
+@login_required
+def apply_user_rules() -> ResponseReturnValue:
+    """Categorize stored transactions using user's rules
+
+    Request JSON structure example:
+    {
+        "overwrite": false
+    }
+    """
+
+    data = request.get_json(silent=True) or {}
+    number_of_categorized = apply_rules(current_user, bool(data.get("overwrite")))
+    db.session.commit()
+    return {"number_of_categorized": number_of_categorized}, 200
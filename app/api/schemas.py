@@ -1,5 +1,7 @@
 import datetime as dt
+import re
 from datetime import datetime
+from importlib.util import find_spec
 from typing import Any
 
 from flask import current_app
@@ -15,10 +17,12 @@ from marshmallow import (
     validates,
     validates_schema,
 )
-from marshmallow.validate import Email, Length, Range, Regexp
+from marshmallow.validate import Email, Length, OneOf, Range, Regexp
 
 from app import ma
-from app.models import Bank, Category, Transaction, User
+from app.api.lookups import get_lookup
+from app.api.search import search_words
+from app.models import Bank, Category, CategoryRule, Transaction, User
 from config import Config
 
 
@@ -151,7 +155,9 @@ class UniqueCategorySchema(CategorySchema):
 
     @validates_schema
     def _check_duplicates(self, data: dict, **kwargs: dict) -> None:
-        if Category.query.filter_by(name=data.get("name"), user=current_user).scalar():
+        if Category.query.filter_by(
+            name=data.get("name"), user_id=current_user.id
+        ).scalar():
             raise ValidationError("Category with this name already exists")
 
 
@@ -187,6 +193,15 @@ class TransactionSchema(ma.SQLAlchemySchema):
     category = fields.Pluck(CategorySchema, "id", allow_none=True)
     bank = fields.Pluck(BankSchema, "id", allow_none=True)
 
+    @pre_load(pass_many=True)
+    def _prefetch_categories(self, data: Any, many: bool, **kwargs: dict) -> Any:
+        """Fetch categories referenced by all loaded items at once"""
+        items = data if many else [data]
+        get_lookup().prefetch_categories(
+            item.get("category") for item in items if isinstance(item, dict)
+        )
+        return data
+
     @pre_load
     def _convert_to_nones(self, data: dict, **kwargs: dict) -> dict:
         """Convert values with empty strings to Nones"""
@@ -199,14 +214,12 @@ class TransactionSchema(ma.SQLAlchemySchema):
 
     @validates("category")
     def _check_available_categories(self, category: dict[str, int]) -> None:
-        if category is not None and not Category.get_from_id(
-            category["id"], current_user
-        ):
+        if category is not None and not get_lookup().category(category["id"]):
             raise ValidationError("User does not have a specified category")
 
     @validates("bank")
     def _check_available_banks(self, bank: dict[str, int]) -> None:
-        if bank is not None and not Bank.query.filter_by(id=bank["id"]).first():
+        if bank is not None and not get_lookup().bank(bank["id"]):
             raise ValidationError("Specified bank is not available")
 
     @post_load
@@ -214,11 +227,11 @@ class TransactionSchema(ma.SQLAlchemySchema):
         """Convert nested schema name to referenced model objects"""
 
         if "category" in data and data["category"]:
-            data["category"] = Category.query.filter_by(
-                id=data["category"]["id"]
-            ).first()
-        if "bank" in data and data["bank"]:
-            data["bank"] = Bank.query.filter_by(id=data["bank"]["id"]).first()
+            data["category"] = get_lookup().category(data["category"]["id"])
+        if "bank" in data:
+            # Banks are assigned by id, as the registry holds no ORM objects
+            bank = data.pop("bank")
+            data["bank_id"] = bank["id"] if bank else None
         return data
 
     @post_dump(pass_many=True)
@@ -235,23 +248,103 @@ class ModifyTransactionSchema(ma.Schema):
     category = fields.Pluck(CategorySchema, "id", allow_none=True, load_only=True)
     bank = fields.Pluck(BankSchema, "id", allow_none=True, load_only=True)
 
+    @validates("category")
+    def _check_available_categories(self, category: dict[str, int] | None) -> None:
+        if category is not None and not get_lookup().category(category["id"]):
+            raise ValidationError("User does not have a specified category")
+
+    @validates("bank")
+    def _check_available_banks(self, bank: dict[str, int] | None) -> None:
+        if bank is not None and not get_lookup().bank(bank["id"]):
+            raise ValidationError("Specified bank is not available")
+
     @post_load
     def _findModelObjects(self, data: dict[str, Any], **kwargs: dict) -> dict[str, Any]:
         if "category" in data:
-            if data["category"]:
-                data["category"] = Category.get_from_id(
-                    data["category"]["id"], current_user
-                )
-            else:
-                data["category"] = None
+            category = data.pop("category")
+            data["category"] = (
+                get_lookup().category(category["id"]) if category else None
+            )
         if "bank" in data:
-            if data["bank"]:
-                data["bank"] = Bank.query.filter_by(id=data["bank"]["id"]).first()
-            else:
-                data["bank"] = None
+            bank = data.pop("bank")
+            data["bank_id"] = bank["id"] if bank else None
         return data
 
 
+class CategoryRuleSchema(ma.SQLAlchemySchema):
+    """Schema used for validation of categorization rules"""
+
+    class Meta:
+        model = CategoryRule
+        ordered = True
+
+    id = ma.auto_field(dump_only=True)
+    pattern = ma.auto_field(validate=Length(min=1), allow_none=True)
+    is_regex = ma.auto_field()
+    amount_min = ma.auto_field(allow_none=True)
+    amount_max = ma.auto_field(allow_none=True)
+    priority = ma.auto_field()
+    category = fields.Integer(attribute="category_id", required=True)
+    bank = fields.Integer(attribute="bank_id", allow_none=True)
+
+    @validates("category")
+    def _check_available_categories(self, category_id: int) -> None:
+        if not get_lookup().category(category_id):
+            raise ValidationError("User does not have a specified category")
+
+    @validates("bank")
+    def _check_available_banks(self, bank_id: int | None) -> None:
+        if bank_id is not None and not get_lookup().bank(bank_id):
+            raise ValidationError("Specified bank is not available")
+
+    @validates_schema
+    def _check_conditions(self, data: dict, **kwargs: dict) -> None:
+        if not any(
+            data.get(condition) is not None
+            for condition in ("pattern", "amount_min", "amount_max", "bank_id")
+        ):
+            raise ValidationError("Rule needs to have at least one condition")
+
+    @validates_schema
+    def _check_amount_range(self, data: dict, **kwargs: dict) -> None:
+        if (
+            data.get("amount_min") is not None
+            and data.get("amount_max") is not None
+            and data["amount_min"] > data["amount_max"]
+        ):
+            raise ValidationError("Lower end cannot be higher than the higher end")
+
+    @validates_schema
+    def _check_regex(self, data: dict, **kwargs: dict) -> None:
+        if not data.get("is_regex") or not data.get("pattern"):
+            return
+        # Pattern is validated as it is embedded into the alternation of all regexes
+        try:
+            compiled = re.compile(f"(?:{data['pattern']})|x", re.IGNORECASE)
+        except re.error:
+            raise ValidationError("Pattern is not a valid regular expression")
+        # Regexes are compiled into a single pattern, so they cannot reference groups
+        if compiled.groupindex or re.search(r"\\\d|\(\?P=", data["pattern"]):
+            raise ValidationError("Pattern cannot use named groups or backreferences")
+
+
+class BatchTransactionsSchema(ma.Schema):
+    """Schema used for validation of the structure of batch requests,
+    items themselves are validated one by one"""
+
+    add = fields.List(fields.Dict(), load_default=list)
+    modify = fields.List(fields.Dict(), load_default=list)
+    delete = fields.List(fields.Integer(), load_default=list)
+
+    @validates_schema
+    def _check_batch_size(self, data: dict, **kwargs: dict) -> None:
+        if (
+            sum(len(items) for items in data.values())
+            > current_app.config["MAX_BATCH_SIZE"]
+        ):
+            raise ValidationError("Too many items in a single batch")
+
+
 MonthlySaldoSchema = ma.Schema.from_dict(
     {
         "month": fields.DateTime(format="%Y-%m"),
@@ -277,6 +370,12 @@ class FiltersSchema(ma.Schema):
     )
     banks = fields.List(fields.Integer(), allow_none=True, data_key="bank")
     categories = fields.List(fields.Integer(), allow_none=True, data_key="category")
+    search = fields.String(validate=Length(max=200), data_key="q")
+
+    @validates("search")
+    def _check_search_words(self, search: str) -> None:
+        if not search_words(search):
+            raise ValidationError("Search text has to contain letters or digits")
 
     @validates("base_currencies")
     def _check_available_currencies(self, currencies: list[str]) -> None:
@@ -308,12 +407,74 @@ class FiltersSchema(ma.Schema):
         """Split comma separated values into a list"""
 
         for param in "base_currency", "category", "bank":
-            if data.get(param, None):
+            if data.get(param, None) and isinstance(data[param], str):
                 data[param] = data[param].split(",")
 
         return data
 
 
+# Columns selected for fields of dumped transactions, in the order of TransactionSchema
+TRANSACTION_FIELDS = {
+    "id": Transaction.id,
+    "info": Transaction.info,
+    "title": Transaction.title,
+    "amount": Transaction.main_amount,
+    "base_amount": Transaction.base_amount,
+    "base_currency": Transaction.base_currency,
+    "date": Transaction.transaction_date,
+    "creation_date": Transaction.creation_date,
+    "place": Transaction.place,
+    "category": Transaction.category_id,
+    "bank": Transaction.bank_id,
+}
+
+
+class ProjectionSchema(ma.Schema):
+    """Schema used for validation of fields and format of dumped transactions"""
+
+    field_names = fields.List(
+        fields.String(validate=OneOf(TRANSACTION_FIELDS)),
+        validate=Length(min=1),
+        data_key="fields",
+        load_default=lambda: list(TRANSACTION_FIELDS),
+    )
+    format = fields.String(
+        validate=OneOf(("objects", "columns")), load_default="objects"
+    )
+
+    @pre_load
+    def _create_list_from_string(self, data: dict, **kwargs: dict) -> dict:
+        """Split comma separated values into a list"""
+        if isinstance(data.get("fields"), str):
+            data["fields"] = data["fields"].split(",")
+        return data
+
+    @post_load
+    def _drop_duplicates(self, data: dict, **kwargs: dict) -> dict:
+        data["field_names"] = list(dict.fromkeys(data["field_names"]))
+        return data
+
+
+class SyncSchema(ProjectionSchema):
+    """Schema used for validation of the cursor of synced changes of transactions"""
+
+    since = fields.NaiveDateTime(load_default=None)
+
+
+class ExportSchema(ProjectionSchema):
+    """Schema used for validation of fields, format and compression of exports"""
+
+    format = fields.String(
+        validate=OneOf(("csv", "ndjson", "parquet")), load_default="csv"
+    )
+    compression = fields.String(validate=OneOf(("gzip", "none")), load_default="gzip")
+
+    @validates("format")
+    def _check_parquet_available(self, format: str) -> None:
+        if format == "parquet" and find_spec("pyarrow") is None:
+            raise ValidationError("Parquet export requires the pyarrow package")
+
+
 class UserEntitiesSchema(ma.Schema):
     """Schema used for dumping entities assigned to a user"""
 
@@ -0,0 +1,72 @@
+"""Full-text search of transactions by their info, title and place.
+
+Words of the texts are indexed in the `search_vector` column of transactions, every
+searched word has to match a prefix of an indexed word. Where the pg_trgm extension is
+installed, the searched text matches similar words as well, which tolerates typos,
+using the trigram index of the texts created by migrations.
+"""
+import re
+
+from sqlalchemy import func, literal, literal_column, or_, text
+from sqlalchemy.sql import ColumnElement
+
+from app import db
+from app.caching import CacheNamespace
+from app.models import SEARCH_CONFIG, SEARCH_DOCUMENT, Transaction
+
+WORD = re.compile(r"\w+")
+# Expression has to be identical to the one of the trigram index to use it
+DOCUMENT = literal_column(f"({SEARCH_DOCUMENT})")
+
+database_features = CacheNamespace("database_feature", local=True)
+
+
+def search_words(search: str) -> list[str]:
+    return WORD.findall(search.lower())
+
+
+def trigram_available() -> bool:
+    """Check once per worker, whether the pg_trgm extension is installed"""
+    available = database_features.get("pg_trgm")
+    if available is None:
+        available = db.session.execute(
+            text("SELECT EXISTS (SELECT FROM pg_extension WHERE extname = 'pg_trgm')")
+        ).scalar()
+        database_features.set("pg_trgm", available)
+    return available
+
+
+def _tsquery(search: str) -> ColumnElement:
+    words = " & ".join(f"{word}:*" for word in search_words(search))
+    return func.to_tsquery(SEARCH_CONFIG, words)
+
+
+def search_condition(search: str) -> ColumnElement:
+    """Condition on transactions matching the searched text
+
+    Args:
+        search (str): searched text, containing at least one word
+
+    Returns:
+        ColumnElement: condition to be used in a WHERE clause
+    """
+    condition = Transaction.search_vector.op("@@")(_tsquery(search))
+    if trigram_available():
+        # Word similarity of the searched text to a part of the texts is high enough
+        condition = or_(condition, DOCUMENT.op("%>")(literal(search)))
+    return condition
+
+
+def search_rank(search: str) -> ColumnElement:
+    """Relevance of transactions to the searched text, higher is more relevant
+
+    Args:
+        search (str): searched text, containing at least one word
+
+    Returns:
+        ColumnElement: rank to be used in an ORDER BY clause
+    """
+    rank = func.ts_rank(Transaction.search_vector, _tsquery(search))
+    if trigram_available():
+        rank = rank + func.word_similarity(search, DOCUMENT)
+    return rank
@@ -6,7 +6,7 @@ from flask_login import login_required
 
 from app.api import blueprint
 from app.api.schemas import SessionEntitiesSchema
-from app.models import Bank
+from app.models import bank_registry
 
 
 @blueprint.route("/api/entities", methods=["GET"])
@@ -27,9 +27,14 @@ def fetch_session_entities() -> ResponseReturnValue:
     Returns:
         ResponseReturnValue: _description_
     """
+    return session_entities(), 200
+
+
+def session_entities() -> dict:
+    """Dump currencies and banks available to all users, without querying the database"""
     response_body: dict[str, dict] = defaultdict(dict)
     response_body["currencies"] = current_app.config["SUPPORTED_CURRENCIES"]
-    for bank in Bank.query.all():
+    for bank in bank_registry.all():
         response_body["banks"][bank.name] = bank
 
-    return SessionEntitiesSchema().dump(response_body), 200
+    return SessionEntitiesSchema().dump(response_body)
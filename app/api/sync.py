@@ -0,0 +1,100 @@
+"""Incremental sync of transactions, which costs payloads proportional to changes.
+
+Every response carries a cursor, which the client sends back with its next request
+to receive only transactions created or changed since, and ids of transactions
+deleted since. Changes are synced again from a short overlap before the cursor, as
+changes of transactions still running at the time of the cursor commit later with
+older timestamps; applying a change or deletion twice has no effect on the client.
+"""
+from datetime import datetime, timedelta
+
+from flask import current_app, request
+from flask.typing import ResponseReturnValue
+from flask_login import current_user, login_required
+from sqlalchemy import select, text
+
+from app import db
+from app.api import blueprint
+from app.api.schemas import TRANSACTION_FIELDS, SyncSchema
+from app.api.transactions import project_transactions
+from app.models import UTC_NOW, Transaction, TransactionTombstone
+
+
+@blueprint.route("/api/transactions/changes", methods=["GET"])
+@login_required
+def fetch_transaction_changes() -> ResponseReturnValue:
+    """Fetch transactions changed since a cursor, accepts `fields` and `format`
+    like `/api/transactions`
+
+    Request JSON structure example:
+    {
+        'since': '2023-01-01T10:00:00.123456',
+        'fields': 'id,date,amount',
+    }
+
+    When `reset` is true, the client has to replace all of its transactions with
+    the returned ones, which happens without `since`, with a cursor older than
+    kept tombstones, or after all transactions of the user were deleted.
+
+    Response JSON structure example:
+    {
+        'transactions': [{'id': 3, 'date': '2023-01-01T00:00:00', ...}, ...],
+        'deleted': [1, 2],
+        'reset': false,
+        'cursor': '2023-01-01T10:05:00.654321'
+    }
+
+    Returns:
+        ResponseReturnValue: changes and the cursor of the next sync
+    """
+    data = SyncSchema().load(request.args.to_dict())
+    return transaction_changes(current_user.id, data.pop("since"), data), 200
+
+
+def transaction_changes(user_id: int, since: datetime | None, projection: dict) -> dict:
+    """Select transactions of a user changed and deleted since a cursor
+
+    Args:
+        user_id (int): id of the user
+        since (datetime | None): cursor of the previous sync, None to sync all
+        projection (dict): fields and format loaded with ProjectionSchema
+
+    Returns:
+        dict: changed transactions, ids of deleted ones, reset flag and new cursor
+    """
+    cursor = sync_cursor()
+    retention = timedelta(days=current_app.config["SYNC_TOMBSTONE_RETENTION"])
+    deleted: list[int] = []
+    reset = since is None or since < cursor - retention
+
+    query = select(*(TRANSACTION_FIELDS[name] for name in projection["field_names"]))
+    query = query.where(Transaction.user_id == user_id)
+    if not reset:
+        since -= timedelta(seconds=current_app.config["SYNC_CURSOR_OVERLAP"])
+        tombstones = db.session.execute(
+            select(TransactionTombstone.transaction_id).where(
+                TransactionTombstone.user_id == user_id,
+                TransactionTombstone.deleted_at > since,
+            )
+        ).scalars()
+        deleted = list(tombstones)
+        # Deletion of all transactions is marked by a tombstone without an id
+        reset = None in deleted
+    if reset:
+        deleted = []
+    else:
+        query = query.where(Transaction.updated_at > since)
+
+    return {
+        "transactions": project_transactions(
+            query.order_by(Transaction.transaction_date.desc()), projection
+        ),
+        "deleted": deleted,
+        "reset": reset,
+        "cursor": cursor.isoformat(),
+    }
+
+
+def sync_cursor() -> datetime:
+    """Get the cursor of changes visible to the current database transaction"""
+    return db.session.execute(select(text(UTC_NOW))).scalar_one()
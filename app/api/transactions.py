@@ -1,26 +1,43 @@
+from collections import defaultdict
 from datetime import datetime
-from typing import Callable
+from time import perf_counter
+from typing import IO, Any, Callable, Iterable, Mapping
 
 from dateutil.relativedelta import relativedelta
 from dateutil.rrule import MONTHLY, rrule
-from flask import abort, current_app, request
+from flask import abort, request
 from flask.typing import ResponseReturnValue
 from flask_login import current_user, login_required
-from sqlalchemy import and_, between, case, func, select
+from marshmallow import ValidationError
+from sqlalchemy import and_, between, case, delete, func, insert, select, update
+from sqlalchemy.engine import Row
+from sqlalchemy.sql import Select
 from werkzeug.utils import secure_filename
 
 from app import db
 from app.api import blueprint
+from app.api.categorization import categorize_transactions
 from app.api.imports import BANK_IMPORT_MAP
+from app.api.lookups import get_lookup
 from app.api.schemas import (
+    TRANSACTION_FIELDS,
+    BatchTransactionsSchema,
     FiltersSchema,
     ModifyTransactionSchema,
     MonthlySaldoSchema,
+    ProjectionSchema,
     TransactionSchema,
 )
-from app.api.utils import validate_statement
+from app.api.search import search_rank
+from app.api.utils import (
+    filter_conditions,
+    is_archive,
+    iter_archive_members,
+    validate_statement,
+)
 from app.exceptions import FileError
-from app.models import MyBanks, Transaction, User
+from app.models import ExchangeRate, MyBanks, Transaction, TransactionTombstone, User
+from app.monitoring.metrics import IMPORT_FAILURES, record_import
 
 
 @blueprint.route("/api/transactions", methods=["GET"])
@@ -37,41 +54,97 @@ def fetch_transactions() -> ResponseReturnValue:
         'base_currency': ['CZK', 'USD'],
         'bank': ['mBank', 'Revolut'],
         'category': ['Salary', 'Hobby', 'Restaurant'],
+        'q': 'coffee',
+        'fields': 'id,date,amount,category',
+        'format': 'columns',
+    }
+
+    Transactions matching the searched text are ordered by relevance. Only columns
+    of requested `fields` are selected, all fields by default. Transactions are
+    dumped as objects like with TransactionSchema, or in the compact `columns` format
+    of names of the fields and rows of their values:
+    {
+        'transactions': {
+            'columns': ['id', 'date', 'amount', 'category'],
+            'rows': [[1, '2022-07-07T10:00:00', -213.0, 4], ...]
+        }
     }
 
     Returns:
         dict: list of transactions
     """
 
-    filters = FiltersSchema().load(dict(request.args))
+    return list_transactions(request.args), 200
 
-    FILTER_MAP = {
-        "amount_min": Transaction.base_amount,
-        "amount_max": Transaction.base_amount,
-        "date_min": Transaction.transaction_date,
-        "date_max": Transaction.transaction_date,
-        "base_currencies": Transaction.base_currency,
-        "banks": Transaction.bank_id,
-        "categories": Transaction.category_id,
-    }
 
-    query = Transaction.query.filter_by(user=current_user)
+def list_transactions(args: Mapping[str, Any], limit: int | None = None) -> dict:
+    """Select transactions of the current user and dump them in the requested format
 
-    for filter_name, filter_values in filters.items():
-        if filter_name in ("amount_min", "date_min"):
-            query = query.filter(FILTER_MAP[filter_name] >= filter_values)
-        if filter_name in ("amount_max", "date_max"):
-            query = query.filter(FILTER_MAP[filter_name] <= filter_values)
-        if filter_name in ("base_currencies", "categories", "banks"):
-            query = query.filter(FILTER_MAP[filter_name].in_(filter_values))
+    Args:
+        args (Mapping[str, Any]): filtering values, `fields` and `format`
+        limit (int | None, optional): maximum number of the most relevant or recent
+        transactions. Defaults to None.
 
-    query = query.order_by(Transaction.transaction_date.desc())
-    transactions: list[Transaction] = query.all()
-    current_app.logger.debug(
-        str(query.statement.compile(compile_kwargs={"literal_binds": True}))
+    Returns:
+        dict: transactions in the envelope of TransactionSchema
+    """
+    args = dict(args)
+    projection = ProjectionSchema().load(
+        {key: args.pop(key) for key in ("fields", "format") if key in args}
     )
+    filters = FiltersSchema().load(args)
+    field_names = projection["field_names"]
+
+    query = select(*(TRANSACTION_FIELDS[name] for name in field_names)).where(
+        Transaction.user_id == current_user.id, *filter_conditions(filters)
+    )
+    if "search" in filters:
+        query = query.order_by(search_rank(filters["search"]).desc())
+    query = query.order_by(Transaction.transaction_date.desc()).limit(limit)
+    return {"transactions": project_transactions(query, projection)}
+
 
-    return TransactionSchema(many=True).dump(transactions), 200
+def project_transactions(query: Select, projection: dict) -> list[dict] | dict:
+    """Execute a selection of transaction fields and dump rows in the requested format
+
+    Args:
+        query (Select): selection of columns of the projected fields, in their order
+        projection (dict): fields and format loaded with ProjectionSchema
+
+    Returns:
+        list[dict] | dict: transactions as objects, or in the `columns` format
+    """
+    field_names = projection["field_names"]
+    # Rows are fetched without the ORM, which only adds overhead to plain columns
+    rows = dump_rows(db.session.connection().execute(query), field_names)
+
+    if projection["format"] == "columns":
+        return {"columns": field_names, "rows": rows}
+    return [dict(zip(field_names, row)) for row in rows]
+
+
+def dump_rows(rows: Iterable[Row], field_names: list[str]) -> list[list[Any]]:
+    """Serialize selected rows of transaction fields the same way as TransactionSchema
+
+    Args:
+        rows (Iterable[Row]): rows with values of the fields
+        field_names (list[str]): names of the fields in TRANSACTION_FIELDS
+
+    Returns:
+        list[list[Any]]: serialized values of each row
+    """
+    dates = [
+        index
+        for index, name in enumerate(field_names)
+        if isinstance(TRANSACTION_FIELDS[name].type, db.DateTime)
+    ]
+    dumped = []
+    for row in rows:
+        values = list(row)
+        for index in dates:
+            values[index] = values[index].isoformat()
+        dumped.append(values)
+    return dumped
 
 
 @blueprint.route("/api/transactions/add", methods=["POST"])
@@ -80,7 +153,7 @@ def add_transaction() -> ResponseReturnValue:
     """Add transaction"""
 
     verified_data = TransactionSchema().load(request.json)
-    transaction = Transaction(user=current_user, **verified_data)
+    transaction = Transaction(user=current_user.model, **verified_data)
     db.session.add(transaction)
     db.session.commit()
 
@@ -108,10 +181,177 @@ def delete_transaction(id: int) -> tuple[dict, int]:
     if not (transaction := Transaction.get_from_id(id, current_user)):
         abort(404, "Transaction not found")
     db.session.delete(transaction)
+    TransactionTombstone.record(current_user.id, [transaction.id])
     db.session.commit()
     return {}, 200
 
 
+@blueprint.route("/api/transactions/batch", methods=["POST"])
+@login_required
+def batch_transactions() -> ResponseReturnValue:
+    """Add, modify and delete many transactions within a single DB transaction.
+    Invalid items are reported and skipped, the valid ones are applied.
+
+    Request JSON structure example:
+    {
+        'add': [{'base_amount': 10, 'base_currency': 'CZK', 'date': '...'}, ...],
+        'modify': [{'id': 1, 'category': 3}, {'id': 2, 'title': 'Rent'}, ...],
+        'delete': [4, 5, ...]
+    }
+
+    Response JSON structure example:
+    {
+        'add': [{'status': 201, 'transaction': {...}}, {'status': 400, 'errors': {...}}],
+        'modify': [{'id': 1, 'status': 200}, {'id': 2, 'status': 404}],
+        'delete': [{'id': 4, 'status': 200}, {'id': 5, 'status': 404}]
+    }
+
+    Returns:
+        ResponseReturnValue: (response, http_code)
+    """
+    batch = BatchTransactionsSchema().load(request.json)
+
+    results = {
+        "add": _batch_add(batch["add"]),
+        "modify": _batch_modify(batch["modify"]),
+        "delete": _batch_delete(batch["delete"]),
+    }
+    db.session.commit()
+
+    statuses = [result["status"] for items in results.values() for result in items]
+    if all(status < 400 for status in statuses):
+        return results, 200
+    if all(status >= 400 for status in statuses):
+        return results, 400
+    else:
+        return results, 206
+
+
+@blueprint.route("/api/transactions/modify", methods=["PATCH"])
+@login_required
+def modify_filtered_transactions() -> ResponseReturnValue:
+    """Modify all transactions matching filters with a single UPDATE
+
+    Request JSON structure example:
+    {
+        'filters': {'date_min': '2022-07-07', 'bank': [1], 'category': [2]},
+        'patch': {'category': 3}
+    }
+    """
+    data = request.json or {}
+    filters = FiltersSchema().load(data.get("filters") or {})
+    values = _column_values(ModifyTransactionSchema().load(data.get("patch") or {}))
+    if not values:
+        abort(400, "No values to modify were provided")
+
+    result = db.session.execute(
+        update(Transaction)
+        .where(Transaction.user_id == current_user.id, *filter_conditions(filters))
+        .values(values)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return {"number_of_modified": result.rowcount}, 200
+
+
+def _column_values(data: dict[str, Any]) -> dict[str, Any]:
+    """Convert data loaded with ModifyTransactionSchema into column values"""
+
+    if "category" in data:
+        category = data.pop("category")
+        data["category_id"] = category.id if category else None
+    return data
+
+
+def _batch_add(items: list[dict]) -> list[dict]:
+    schema = TransactionSchema()
+    # Categories of all items are validated against a single query
+    get_lookup().prefetch_categories(item.get("category") for item in items)
+    results: list[dict] = []
+    loaded: list[tuple[int, dict]] = []
+    for index, item in enumerate(items):
+        try:
+            loaded.append((index, schema.load(item)))
+            results.append({})
+        except ValidationError as error:
+            results.append({"status": 400, "errors": error.messages})
+
+    # Fetch exchange rates for all valid transactions at once
+    ExchangeRate.preload_rates(
+        [data["transaction_date"] for _, data in loaded],
+        {data["base_currency"] for _, data in loaded} | {current_user.main_currency},
+    )
+    transactions = [
+        (index, Transaction(user=current_user.model, **data)) for index, data in loaded
+    ]
+    db.session.add_all(transaction for _, transaction in transactions)
+    db.session.flush()
+
+    for index, transaction in transactions:
+        dumped = schema.dump(transaction)["transactions"]
+        results[index] = {"status": 201, "transaction": dumped}
+    return results
+
+
+def _batch_modify(items: list[dict]) -> list[dict]:
+    schema = ModifyTransactionSchema()
+    ids = {item.get("id") for item in items if isinstance(item.get("id"), int)}
+    owned = set(
+        db.session.scalars(
+            select(Transaction.id).where(
+                Transaction.user_id == current_user.id, Transaction.id.in_(ids)
+            )
+        )
+    )
+
+    get_lookup().prefetch_categories(item.get("category") for item in items)
+
+    results: list[dict] = []
+    # Transactions grouped by identical modifications, to update each group at once
+    patches: dict[tuple, list[int]] = defaultdict(list)
+    for item in items:
+        patch = {key: value for key, value in item.items() if key != "id"}
+        id = item.get("id")
+        if not isinstance(id, int) or id not in owned:
+            results.append({"id": id, "status": 404, "errors": "Transaction not found"})
+            continue
+        try:
+            values = _column_values(schema.load(patch))
+        except ValidationError as error:
+            results.append({"id": id, "status": 400, "errors": error.messages})
+            continue
+        patches[tuple(sorted(values.items()))].append(id)
+        results.append({"id": id, "status": 200})
+
+    for values, patch_ids in patches.items():
+        if values:
+            db.session.execute(
+                update(Transaction)
+                .where(Transaction.id.in_(patch_ids))
+                .values(dict(values))
+                .execution_options(synchronize_session=False)
+            )
+    return results
+
+
+def _batch_delete(ids: list[int]) -> list[dict]:
+    deleted = set(
+        db.session.execute(
+            delete(Transaction)
+            .where(Transaction.user_id == current_user.id, Transaction.id.in_(ids))
+            .returning(Transaction.id)
+            .execution_options(synchronize_session=False)
+        ).scalars()
+    )
+    TransactionTombstone.record(current_user.id, deleted)
+    return [
+        {"id": id, "status": 200}
+        if id in deleted
+        else {"id": id, "status": 404, "errors": "Transaction not found"}
+        for id in ids
+    ]
+
+
 @blueprint.route("/api/users/<int:id>/delete_transactions", methods=["DELETE"])
 @login_required
 def delete_all_transactions(id: int) -> ResponseReturnValue:
@@ -120,6 +360,7 @@ def delete_all_transactions(id: int) -> ResponseReturnValue:
         abort(404, "User not found")
 
     no_of_deleted = Transaction.query.filter_by(user=user).delete()
+    TransactionTombstone.record_all(user.id)
     db.session.commit()
     return {"number_of_deleted": no_of_deleted}, 200
 
@@ -129,6 +370,9 @@ def delete_all_transactions(id: int) -> ResponseReturnValue:
 def upload_statements() -> ResponseReturnValue:
     """Parse and save transactions from uploaded files
 
+    Statements can also be uploaded in .zip/.gz archives, in which case
+    every archive member is reported as '<archive>/<member>'.
+
     Response JSON structure example:
     {
         'amount': 34,
@@ -156,36 +400,59 @@ def upload_statements() -> ResponseReturnValue:
     failed_upload: dict[str, str] = {}
     # dictionary holding filenames which were successfully uploaded
     success_upload: dict[str, str] = {}
-    # list holding all imported transactions
-    uploaded_transactions: list[Transaction] = []
+    # number of all imported transactions
+    uploaded_amount = 0
+
+    def import_statement(bank_name: str, filename: str, stream: IO[bytes]) -> None:
+        """Validate and import a single statement, recording the outcome"""
+        nonlocal uploaded_amount
+
+        if not validate_statement(MyBanks(bank_name), filename, stream):
+            failed_upload[filename] = "Corrupted file type or contents"
+            IMPORT_FAILURES.labels(bank_name).inc()
+            return
+
+        # Run import function corresponding to bank_name
+        import_function: Callable = BANK_IMPORT_MAP[MyBanks(bank_name)]
+        start = perf_counter()
+        try:
+            rows = import_function(stream, current_user.model)
+        except FileError:
+            failed_upload[filename] = "Errors while parsing the file"
+            IMPORT_FAILURES.labels(bank_name).inc()
+            return
+
+        categorize_transactions(current_user, rows)
+        # Rows are inserted with a single statement for each statement file,
+        # without building ORM objects
+        if rows:
+            db.session.execute(insert(Transaction), rows)
+        record_import(bank_name, len(rows), perf_counter() - start)
+        uploaded_amount += len(rows)
+        success_upload[filename] = bank_name
 
     for i, (bank_name, file) in enumerate(request.files.items(True)):
         # Sanitize the filename
         filename = secure_filename(file.filename)
         filename = f"sanitized_filename_{i}" if not filename else filename
 
-        if validate_statement(MyBanks(bank_name), filename, file.stream):
-            # Run import function corresponding to bank_name
-            import_function: Callable = BANK_IMPORT_MAP[MyBanks(bank_name)]
-
-            try:
-                temp_transactions = import_function(file, current_user)
-            except FileError:
-                failed_upload[filename] = "Errors while parsing the file"
+        if not is_archive(filename):
+            import_statement(bank_name, filename, file.stream)
+            continue
 
-            # Append transactions from all files to the main list
-            uploaded_transactions.extend(temp_transactions)
-            success_upload[filename] = bank_name
-        else:
-            failed_upload[filename] = "Corrupted file type or contents"
+        # Archive members are decompressed and imported one by one
+        try:
+            for member_name, member in iter_archive_members(filename, file.stream):
+                import_statement(bank_name, f"{filename}/{member_name}", member)
+        except FileError as error:
+            failed_upload[filename] = error.message
 
-    db.session.add_all(uploaded_transactions)
     db.session.commit()
 
     upload_results = {
         "failed": failed_upload,
         "success": success_upload,
-        "amount": len(uploaded_transactions),
+        "amount": uploaded_amount,
         "info": "",
     }
 
@@ -215,23 +482,40 @@ def monthly_statements(id: int) -> ResponseReturnValue:
     Returns:
         ResponseReturnValue: (response, http_code)
     """
-    user: User = User.query.get(id)
-    if user != current_user:
+    if id != current_user.id:
         abort(404, "User not found")
 
+    saldo = monthly_saldo(id)
+    # No transactions related to the user
+    if saldo is None:
+        abort(404, "User has no transactions to build summary from")
+    return saldo, 200
+
+
+def monthly_saldo(user_id: int) -> list[dict] | None:
+    """Sum incoming and outgoing amounts of a user in each ended month.
+    Months without incoming transactions are left out.
+
+    Args:
+        user_id (int): id of the user
+
+    Returns:
+        list[dict] | None: saldos dumped with MonthlySaldoSchema, from the oldest
+        month, or None if the user has no transactions
+    """
     oldest = (
         Transaction.query.with_entities(func.min(Transaction.transaction_date))
-        .filter_by(user=current_user)
+        .filter_by(user_id=user_id)
         .scalar()
     )
     # No transactions related to the user
     if not oldest:
-        abort(404, "User has no transactions to build summary from")
+        return None
 
     oldest = oldest - relativedelta(day=1, hour=0, minute=0, second=0)
     newest = (
         Transaction.query.with_entities(func.max(Transaction.transaction_date))
-        .filter_by(user=user)
+        .filter_by(user_id=user_id)
         .scalar()
     )
 
@@ -259,14 +543,11 @@ def monthly_statements(id: int) -> ResponseReturnValue:
                     month,
                     month + relativedelta(months=+1),
                 ),
-                Transaction.user == user,
+                Transaction.user_id == user_id,
             )
         )
 
         results = db.session.execute(query).all()[0]
-        current_app.logger.debug(
-            query.compile(compile_kwargs={"literal_binds": True}).string
-        )
 
         if results[0]:
             saldo.append(
@@ -278,4 +559,4 @@ def monthly_statements(id: int) -> ResponseReturnValue:
                 }
             )
 
-    return MonthlySaldoSchema(many=True).dump(saldo), 200
+    return MonthlySaldoSchema(many=True).dump(saldo)
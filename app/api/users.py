@@ -73,15 +73,19 @@ def fetch_user_entities() -> ResponseReturnValue:
     Returns:
         dict: lists containing values for each filtering parameter
     """
+    return user_entities(current_user.model), 200
 
+
+def user_entities(user: User) -> dict:
+    """Dump details of a user together with entities assigned to the user"""
     response_body: dict[str, dict] = defaultdict(dict)
 
-    response_body["user_details"] = current_user
-    response_body["base_currencies"] = current_user.select_base_currencies()
-    for category in current_user.select_categories():
+    response_body["user_details"] = user
+    response_body["base_currencies"] = user.select_base_currencies()
+    for category in user.select_categories():
         response_body["categories"][category.name] = category
-    for bank in current_user.select_banks():
+    for bank in user.select_banks():
         response_body["banks"][bank.name] = bank
 
     # Schema used only to map server-side 'json' names to general ones specified by schema
-    return UserEntitiesSchema().dump(response_body), 200
+    return UserEntitiesSchema().dump(response_body)
@@ -1,9 +1,19 @@
+import gzip
+import io
 import typing as t
+import zipfile
+import zlib
 from pathlib import Path
 
-from app import db
-from app.exceptions import InvalidConfigError
-from app.models import Bank, MyBanks
+from flask import current_app
+from sqlalchemy.sql import ColumnElement
+from werkzeug.utils import secure_filename
+
+from app.api.search import search_condition
+from app.exceptions import FileError, InvalidConfigError
+from app.models import MyBanks, Transaction, bank_registry
+
+ARCHIVE_SUFFIXES = {".zip", ".gz"}
 
 
 def validate_statement(origin: MyBanks, filename: str, file: t.IO[bytes]) -> bool:
@@ -20,7 +30,8 @@ def validate_statement(origin: MyBanks, filename: str, file: t.IO[bytes]) -> boo
     # TODO: Additional file content validation
 
     is_validated = False
-    correct = db.session.query(Bank.statement_type).filter_by(name_enum=origin).scalar()
+    bank = bank_registry.from_enum(origin)
+    correct = bank.statement_type if bank else None
 
     try:
         # Check correctness of the associated filetype
@@ -31,3 +42,126 @@ def validate_statement(origin: MyBanks, filename: str, file: t.IO[bytes]) -> boo
         raise InvalidConfigError
 
     return is_validated
+
+
+def filter_conditions(filters: dict[str, t.Any]) -> list[ColumnElement]:
+    """Translate values loaded with FiltersSchema into SQL conditions on transactions
+
+    Args:
+        filters (dict[str, t.Any]): validated filtering values
+
+    Returns:
+        list[ColumnElement]: conditions to be used in a WHERE clause
+    """
+    FILTER_MAP = {
+        "amount_min": Transaction.base_amount,
+        "amount_max": Transaction.base_amount,
+        "date_min": Transaction.transaction_date,
+        "date_max": Transaction.transaction_date,
+        "base_currencies": Transaction.base_currency,
+        "banks": Transaction.bank_id,
+        "categories": Transaction.category_id,
+    }
+
+    conditions = []
+    for filter_name, filter_values in filters.items():
+        if filter_name in ("amount_min", "date_min"):
+            conditions.append(FILTER_MAP[filter_name] >= filter_values)
+        if filter_name in ("amount_max", "date_max"):
+            conditions.append(FILTER_MAP[filter_name] <= filter_values)
+        if filter_name in ("base_currencies", "categories", "banks"):
+            conditions.append(FILTER_MAP[filter_name].in_(filter_values))
+        if filter_name == "search":
+            conditions.append(search_condition(filter_values))
+    return conditions
+
+
+def is_archive(filename: str) -> bool:
+    """Check if uploaded file is a .zip/.gz container of statements"""
+    return Path(filename).suffix.lower() in ARCHIVE_SUFFIXES
+
+
+class LimitedReader(io.RawIOBase):
+    """Binary stream wrapper which fails once more than `limit` bytes were read from it.
+    Used to guard against decompression bombs, as declared archive sizes can be forged."""
+
+    def __init__(self, stream: t.IO[bytes], limit: int) -> None:
+        self.stream = stream
+        self.limit = limit
+        self.bytes_read = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: t.Any) -> int:
+        try:
+            # Read one byte over the limit to detect exceeding it
+            data = self.stream.read(min(len(buffer), self.limit - self.bytes_read + 1))
+        except (OSError, EOFError, zlib.error, zipfile.BadZipFile) as e:
+            raise FileError("Archive is corrupted") from e
+        self.bytes_read += len(data)
+        if self.bytes_read > self.limit:
+            raise FileError("Archive member exceeds allowed decompressed size")
+        buffer[: len(data)] = data
+        return len(data)
+
+    def close(self) -> None:
+        self.stream.close()
+        super().close()
+
+
+def iter_archive_members(
+    filename: str, stream: t.IO[bytes]
+) -> t.Iterator[tuple[str, t.BinaryIO]]:
+    """Lazily decompress members of a .zip/.gz archive, one at a time.
+    Each member is yielded as a stream, so it is decompressed only while being read.
+
+    Args:
+        filename (str): sanitized archive filename
+        stream (t.IO[bytes]): seekable binary stream of the archive
+
+    Raises:
+        FileError: raised if the archive is corrupted or exceeds decompression limits
+
+    Yields:
+        tuple[str, t.BinaryIO]: sanitized member filename and its decompressed stream
+    """
+    config = current_app.config
+    # Number of bytes which can still be decompressed from the whole archive
+    remaining = config["ARCHIVE_MAX_TOTAL_SIZE"]
+
+    if Path(filename).suffix.lower() == ".gz":
+        compressed_size = stream.seek(0, io.SEEK_END)
+        stream.seek(0)
+        limit = min(
+            config["ARCHIVE_MAX_MEMBER_SIZE"],
+            remaining,
+            compressed_size * config["ARCHIVE_MAX_COMPRESSION_RATIO"],
+        )
+        member = gzip.GzipFile(fileobj=stream, mode="rb")
+        yield Path(filename).stem, io.BufferedReader(LimitedReader(member, limit))
+        return
+
+    try:
+        archive = zipfile.ZipFile(stream)
+    except zipfile.BadZipFile as e:
+        raise FileError("Archive is corrupted") from e
+
+    with archive:
+        members = [info for info in archive.infolist() if not info.is_dir()]
+        if len(members) > config["ARCHIVE_MAX_MEMBERS"]:
+            raise FileError("Archive contains too many files")
+
+        for i, info in enumerate(members):
+            limit = min(
+                config["ARCHIVE_MAX_MEMBER_SIZE"],
+                remaining,
+                max(info.compress_size, 1) * config["ARCHIVE_MAX_COMPRESSION_RATIO"],
+            )
+            if info.file_size > limit:
+                raise FileError("Archive member exceeds allowed decompressed size")
+
+            reader = LimitedReader(archive.open(info), limit)
+            member_name = secure_filename(Path(info.filename).name) or f"member_{i}"
+            yield member_name, io.BufferedReader(reader)
+            remaining -= reader.bytes_read
@@ -0,0 +1,152 @@
+"""Cache layer used by every cache of the app.
+
+Values are kept in the backend configured by CACHE_TYPE, which is shared by all
+workers, or in memory of the worker for namespaces of immutable values. Keys are
+prefixed by the namespace, and keys of per-user values also contain the current
+version of the user. Bumping the version invalidates all values of the user at once,
+in all workers.
+"""
+from time import time_ns
+from typing import Any, Iterable
+
+from cachelib import SimpleCache
+from flask import current_app
+from flask_caching.backends import RedisCache as FlaskRedisCache
+
+from app import cache
+from app.monitoring.metrics import CACHE_REQUESTS
+
+
+class RedisCache(FlaskRedisCache):
+    """Redis backend created from CACHE_REDIS_URL, or from CACHE_REDIS_CLIENT, which
+    can be any object with the API of the redis-py client, e.g. a local stand-in"""
+
+    @classmethod
+    def factory(cls, app: Any, config: dict, args: list, kwargs: dict) -> "RedisCache":
+        client = config.get("CACHE_REDIS_CLIENT")
+        if client is None:
+            # Redis is an optional dependency, needed only with this backend
+            from redis import from_url
+
+            client = from_url(config["CACHE_REDIS_URL"])
+        kwargs.update(host=client, key_prefix=config.get("CACHE_KEY_PREFIX"))
+        return cls(*args, **kwargs)
+
+
+def get_version(scope: str) -> int:
+    """Get version of a scope of cached values, created if it does not exist yet
+
+    Args:
+        scope (str): name of the scope, e.g. 'user:1'
+
+    Returns:
+        int: current version
+    """
+    key = f"version:{scope}"
+    version = cache.get(key)
+    if version is None:
+        # Another worker might have created the version in the meantime
+        cache.add(key, time_ns(), timeout=0)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(scope: str) -> None:
+    """Invalidate all values cached under the version of a scope"""
+    cache.set(f"version:{scope}", time_ns(), timeout=0)
+
+
+def user_scope(user_id: int) -> str:
+    return f"user:{user_id}"
+
+
+class CacheNamespace:
+    """Values of a single kind, stored under keys prefixed by the namespace name.
+    Hits and misses are counted for each namespace."""
+
+    def __init__(
+        self,
+        name: str,
+        per_user: bool = False,
+        local: bool = False,
+        timeout: int | None = None,
+    ) -> None:
+        """
+        Args:
+            name (str): prefix of keys
+            per_user (bool, optional): whether values belong to users and are
+            invalidated with their version. Defaults to False.
+            local (bool, optional): whether values are kept in memory of the worker,
+            only suitable for values which never change. Defaults to False.
+            timeout (int | None, optional): timeout of values in seconds, None for
+            the default of the backend. Defaults to None.
+        """
+        self.name = name
+        self.per_user = per_user
+        self.local = local
+        self.timeout = timeout
+
+    @property
+    def _backend(self) -> Any:
+        if not self.local:
+            return cache
+        stores = current_app.extensions.setdefault("local_cache", {})
+        if self.name not in stores:
+            stores[self.name] = SimpleCache(
+                threshold=current_app.config["LOCAL_CACHE_THRESHOLD"],
+                default_timeout=0,
+            )
+        return stores[self.name]
+
+    def _prefix(self, user_id: int | None) -> str:
+        if not self.per_user:
+            return f"{self.name}:"
+        if user_id is None:
+            raise ValueError(f"Values of '{self.name}' namespace belong to users")
+        return f"{self.name}:{user_id}:{get_version(user_scope(user_id))}:"
+
+    def _count(self, values: Iterable[Any]) -> None:
+        hits = misses = 0
+        for value in values:
+            if value is None:
+                misses += 1
+            else:
+                hits += 1
+        if hits:
+            CACHE_REQUESTS.labels(self.name, "hit").inc(hits)
+        if misses:
+            CACHE_REQUESTS.labels(self.name, "miss").inc(misses)
+
+    def get(self, key: str, user_id: int | None = None) -> Any:
+        value = self._backend.get(self._prefix(user_id) + key)
+        self._count([value])
+        return value
+
+    def get_many(self, keys: list[str], user_id: int | None = None) -> list[Any]:
+        prefix = self._prefix(user_id)
+        values = self._backend.get_many(*(prefix + key for key in keys))
+        self._count(values)
+        return values
+
+    def set(
+        self,
+        key: str,
+        value: Any,
+        user_id: int | None = None,
+        timeout: int | None = None,
+    ) -> None:
+        self._backend.set(
+            self._prefix(user_id) + key,
+            value,
+            timeout=self.timeout if timeout is None else timeout,
+        )
+
+    def set_many(self, mapping: dict[str, Any], user_id: int | None = None) -> None:
+        prefix = self._prefix(user_id)
+        self._backend.set_many(
+            {prefix + key: value for key, value in mapping.items()},
+            timeout=self.timeout,
+        )
+
+    def delete(self, key: str, user_id: int | None = None) -> None:
+        self._backend.delete(self._prefix(user_id) + key)
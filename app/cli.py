@@ -1,14 +1,19 @@
-from datetime import datetime
+import sys
+import time
+from contextlib import nullcontext
+from datetime import datetime, timedelta
 from pathlib import Path
 
 import click
 from flask import Flask
 
+from app import db
 from app.exceptions import FileError
-from app.external.exchange_rates import RatesManager
 
 
 def register(app: Flask) -> None:
+    # Commands are registered with the app, which web workers start as well,
+    # so modules needed only by the commands are imported when they run
     @app.cli.group()
     def rates() -> None:
         """Commands for loading/downloading exchange rates"""
@@ -26,6 +31,8 @@ def register(app: Flask) -> None:
             end (str | None, optional): ending date in 'YYYY-MM-DD' format.
             If not specified, just starting day is downloaded.
         """
+        from app.external.exchange_rates import RatesManager
+
         end = start if end is None else end
         try:
             start_date = datetime.strptime(start, "%Y-%m-%d")
@@ -64,24 +71,291 @@ def register(app: Flask) -> None:
                 break
 
     @rates.command()
-    @click.argument("file")
-    def load(file: str) -> None:
-        """Load exchange rates from the .csv file and save them to the datebase
+    @click.argument("files", nargs=-1, required=True)
+    def load(files: tuple[str, ...]) -> None:
+        """Load exchange rates from .csv files and save them to the datebase
 
         Args:
-            file (str): path to file
+            files (tuple[str, ...]): paths to files
         """
+        from app.external.exchange_rates import RatesManager
+
+        for file in files:
+            path = Path(file).resolve()
+            if not path.exists():
+                print(f"File '{path}' could not be found")
+                return
+
+            rates_manager = RatesManager()
+
+            try:
+                rates_manager.load_from_csv(path)
+            except FileError as error:
+                print(error.message)
+                return
+            rates_manager.save_to_db()
+
+    @app.cli.group()
+    def profiling() -> None:
+        """Commands for profiling of requests"""
+        pass
+
+    @profiling.command()
+    @click.argument("username")
+    def token(username: str) -> None:
+        """Create a value of the X-Wallit-Profile header, which enables profiling
+        of requests sent by a user
 
-        path = Path(file).resolve()
-        if not path.exists():
-            print("File '{path}' could not be found")
+        Args:
+            username (str): username of the user
+        """
+        from app.models import User
+        from app.monitoring.profiling import profile_token
+
+        user = User.query.filter_by(username=username).first()
+        if user is None:
+            print(f"User '{username}' does not exist")
             return
+        print(profile_token(user.id))
 
-        rates_manager = RatesManager()
+    @app.cli.group()
+    def startup() -> None:
+        """Commands for measuring startup of the app"""
+        pass
+
+    @startup.command()
+    @click.option(
+        "--budget",
+        type=float,
+        help="Maximum startup time in seconds. Defaults to STARTUP_BUDGET.",
+    )
+    @click.option(
+        "--top", default=15, show_default=True, help="Number of shown imports."
+    )
+    def report(budget: float | None, top: int) -> None:
+        """Start the app in a fresh interpreter and break its startup time down
+        into imports and initialization phases. Exits with status 1 when the startup
+        takes longer than the budget.
+        """
+        from app.monitoring.startup import measure_startup
+
+        budget = app.config["STARTUP_BUDGET"] if budget is None else budget
+        result = measure_startup()
+
+        print(f"{'Imports (self time)':<40}{'ms':>10}")
+        imports = sorted(result["imports"].items(), key=lambda item: -item[1])
+        for group, duration in imports[:top]:
+            print(f"{group:<40}{duration * 1000:>10.1f}")
+        rest = sum(duration for _, duration in imports[top:])
+        print(f"{f'{len(imports[top:])} others':<40}{rest * 1000:>10.1f}")
+
+        print(f"\n{'Initialization (with imports)':<40}{'ms':>10}")
+        for phase, duration in result["phases"].items():
+            print(f"{phase:<40}{duration * 1000:>10.1f}")
+
+        print(f"\n{'App import and creation':<40}{result['total'] * 1000:>10.1f}")
+        print(f"{'Whole process':<40}{result['process'] * 1000:>10.1f}")
+        if result["total"] > budget:
+            print(f"Startup exceeds the budget of {budget * 1000:.0f} ms")
+            sys.exit(1)
+        print(f"Startup is within the budget of {budget * 1000:.0f} ms")
+
+    @app.cli.group()
+    def partitions() -> None:
+        """Commands for maintenance of the partitioned transactions table"""
+        pass
+
+    @partitions.command()
+    @click.option(
+        "--ahead",
+        type=int,
+        help="Years to create partitions ahead. Defaults to "
+        "TRANSACTION_PARTITIONS_AHEAD.",
+    )
+    def ensure(ahead: int | None) -> None:
+        """Create partitions of upcoming years and of years which have transactions
+        in the default partition, moving the transactions over
+        """
+        from app.partitioning import ensure_partitions
+
+        ahead = app.config["TRANSACTION_PARTITIONS_AHEAD"] if ahead is None else ahead
+        created = ensure_partitions(db.session.connection(), ahead)
+        db.session.commit()
+        print(f"Created partitions: {', '.join(created) or 'none'}")
+
+    @app.cli.group()
+    def transactions() -> None:
+        """Commands for transactions of users"""
+        pass
 
+    @transactions.command()
+    @click.argument("username")
+    @click.option(
+        "--output",
+        "-o",
+        type=click.Path(dir_okay=False, path_type=Path),
+        help="File to write the export into. Defaults to the standard output.",
+    )
+    @click.option(
+        "--format",
+        "format_",
+        type=click.Choice(["csv", "ndjson", "parquet"]),
+        default="csv",
+        show_default=True,
+    )
+    @click.option(
+        "--compression",
+        type=click.Choice(["gzip", "none"]),
+        default="gzip",
+        show_default=True,
+    )
+    @click.option(
+        "--fields", help="Comma separated exported fields. Defaults to all fields."
+    )
+    @click.option(
+        "--filter",
+        "filters",
+        multiple=True,
+        help="Filtering value in 'name=value' format, as accepted by the API, "
+        "e.g. 'date_min=2022-01-01' or 'category=1,2'.",
+    )
+    def export(
+        username: str,
+        output: Path | None,
+        format_: str,
+        compression: str,
+        fields: str | None,
+        filters: tuple[str, ...],
+    ) -> None:
+        """Export filtered transactions of a user, streaming them from the database
+
+        Args:
+            username (str): username of the user
+        """
+        from marshmallow import ValidationError
+
+        from app.api.export import stream_transactions
+        from app.api.schemas import ExportSchema, FiltersSchema
+        from app.models import User
+
+        user = User.query.filter_by(username=username).first()
+        if user is None:
+            print(f"User '{username}' does not exist")
+            return
+
+        if invalid := [item for item in filters if "=" not in item]:
+            print(f"Filters should be specified in 'name=value' format: {invalid}")
+            sys.exit(1)
+
+        export = {"format": format_, "compression": compression}
+        if fields:
+            export["fields"] = fields
+        try:
+            export = ExportSchema().load(export)
+            loaded_filters = FiltersSchema().load(
+                dict(item.split("=", 1) for item in filters)
+            )
+        except ValidationError as error:
+            print(f"Invalid export options: {error.messages}")
+            sys.exit(1)
+
+        chunks = stream_transactions(user.id, loaded_filters, **export)
+        stdout = click.get_binary_stream("stdout")
+        with output.open("wb") if output else nullcontext(stdout) as file:
+            for chunk in chunks:
+                file.write(chunk)
+
+    @app.cli.group()
+    def tombstones() -> None:
+        """Commands for maintenance of tombstones of deleted transactions"""
+        pass
+
+    @tombstones.command()
+    def purge() -> None:
+        """Delete tombstones older than SYNC_TOMBSTONE_RETENTION days, clients with
+        older cursors sync all of their transactions again
+        """
+        from app.models import TransactionTombstone
+
+        retention = timedelta(days=app.config["SYNC_TOMBSTONE_RETENTION"])
+        purged = TransactionTombstone.purge(datetime.utcnow() - retention)
+        db.session.commit()
+        print(f"Purged {purged} tombstones")
+
+    @app.cli.group()
+    def dev() -> None:
+        """Commands for development and testing at scale"""
+        pass
+
+    @dev.command()
+    @click.option("--users", default=10, show_default=True, help="Number of users.")
+    @click.option(
+        "--transactions",
+        default=10_000,
+        show_default=True,
+        help="Number of transactions of each user.",
+    )
+    @click.option("--years", default=3, show_default=True, help="Length of ledgers.")
+    @click.option(
+        "--end",
+        default="2022-12",
+        show_default=True,
+        help="Last month of ledgers in 'YYYY-MM' format.",
+    )
+    @click.option(
+        "--statements",
+        type=click.Path(file_okay=False, path_type=Path),
+        help="Directory to write matching bank statements of each user into.",
+    )
+    @click.option(
+        "--prefix", default="seed", show_default=True, help="Username prefix."
+    )
+    @click.option("--password", default="password", show_default=True)
+    @click.option("--seed", "random_seed", default=0, show_default=True)
+    @click.option("--replace", is_flag=True, help="Delete previously seeded users.")
+    def seed(
+        users: int,
+        transactions: int,
+        years: int,
+        end: str,
+        statements: Path | None,
+        prefix: str,
+        password: str,
+        random_seed: int,
+        replace: bool,
+    ) -> None:
+        """Generate users with realistic ledgers, spanning several years, currencies,
+        banks and categories, and bulk load them to the database.
+        Banks and exchange rates are created as well, if missing.
+        """
+        from app.dev.seed import delete_users, seed_ledgers, seeded_users
+
+        if not prefix:
+            print("Username prefix must not be empty")
+            return
         try:
-            rates_manager.load_from_csv(path)
-        except FileError as error:
-            print(error.message)
+            end_date = datetime.strptime(end, "%Y-%m").date()
+        except ValueError:
+            print("Last month should be specified in 'YYYY-MM' format")
             return
-        rates_manager.save_to_db()
+        if replace:
+            print(f"Deleted {delete_users(prefix)} users")
+        elif seeded_users(prefix).first():
+            print(f"Users prefixed '{prefix}' already exist, use --replace")
+            return
+
+        start = time.perf_counter()
+        total = 0
+        for username, loaded in seed_ledgers(
+            users,
+            transactions,
+            end_date,
+            years * 12,
+            prefix=prefix,
+            password=password,
+            statements=statements,
+            seed=random_seed,
+        ):
+            total += loaded
+            print(f"{username}: {loaded} transactions")
+        print(f"Loaded {total} transactions in {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,167 @@
+import csv
+import io
+import random
+from datetime import datetime, timedelta
+from typing import Any, Iterable
+from xml.sax.saxutils import escape
+
+REVOLUT_HEADER = [
+    "Type",
+    "Product",
+    "Started Date",
+    "Completed Date",
+    "Description",
+    "Amount",
+    "Fee",
+    "Currency",
+    "State",
+    "Balance",
+]
+REVOLUT_TYPES = ["CARD_PAYMENT", "TOPUP", "TRANSFER", "EXCHANGE"]
+CURRENCIES = ["CZK", "EUR", "USD", "PLN"]
+TOWNS = ["PRAHA", "BRNO", "OSTRAVA", "PLZEN", "OLOMOUC"]
+CAMT_NAMESPACE = "urn:iso:std:iso:20022:tech:xsd:camt.053.001.06"
+
+
+def revolut_csv(transactions: Iterable[dict[str, Any]]) -> bytes:
+    """Render transactions as a Revolut .csv statement
+
+    Args:
+        transactions (Iterable[dict[str, Any]]): transactions with `info`, `title`,
+        `base_amount`, `base_currency` and `transaction_date` keys
+
+    Returns:
+        bytes: content of the statement
+    """
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(REVOLUT_HEADER)
+    balance = 0.0
+    for transaction in transactions:
+        date = transaction["transaction_date"]
+        balance += transaction["base_amount"]
+        writer.writerow(
+            [
+                transaction["info"],
+                "Current",
+                (date - timedelta(minutes=1)).strftime("%Y-%m-%d %H:%M:%S"),
+                date.strftime("%Y-%m-%d %H:%M:%S"),
+                transaction["title"],
+                f"{transaction['base_amount']:.2f}",
+                "0.00",
+                transaction["base_currency"],
+                "COMPLETED",
+                f"{balance:.2f}",
+            ]
+        )
+    return output.getvalue().encode()
+
+
+def camt053(transactions: Iterable[dict[str, Any]]) -> bytes:
+    """Render transactions as an Equabank camt.053 .xml statement, including
+    the control sum checked by the importer
+
+    Args:
+        transactions (Iterable[dict[str, Any]]): transactions with `info`, `title`,
+        `base_amount`, `base_currency` and `transaction_date` keys, `place` is optional
+
+    Returns:
+        bytes: content of the statement
+    """
+    entries = []
+    total = 0.0
+    for transaction in transactions:
+        amount = transaction["base_amount"]
+        total += amount
+        place = transaction.get("place")
+        address = f"<PstlAdr><TwnNm>{escape(place)}</TwnNm></PstlAdr>" if place else ""
+        entries.append(
+            "<Ntry>"
+            f'<Amt Ccy="{transaction["base_currency"]}">{abs(amount):.2f}</Amt>'
+            f"<CdtDbtInd>{'DBIT' if amount < 0 else 'CRDT'}</CdtDbtInd>"
+            f"<BookgDt><Dt>{transaction['transaction_date']:%Y-%m-%d}+01:00</Dt></BookgDt>"
+            "<NtryDtls><TxDtls>"
+            f"<RltdPties><Cdtr><Nm>{escape(transaction['info'])}</Nm>{address}</Cdtr>"
+            "</RltdPties>"
+            f"<RmtInf><Ustrd>{escape(transaction['title'])}</Ustrd></RmtInf>"
+            "</TxDtls></NtryDtls>"
+            "</Ntry>"
+        )
+
+    # Importer expects the net sum with an inverted sign of the indicator
+    total = round(total, 2)
+    summary = (
+        "<TxsSummry><TtlNtries>"
+        f"<NbOfNtries>{len(entries)}</NbOfNtries>"
+        f"<TtlNetNtry><Amt>{abs(total):.2f}</Amt>"
+        f"<CdtDbtInd>{'CRDT' if total < 0 else 'DBIT'}</CdtDbtInd></TtlNetNtry>"
+        "</TtlNtries></TxsSummry>"
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        f'<Document xmlns="{CAMT_NAMESPACE}"><BkToCstmrStmt><Stmt>'
+        f"{summary}{''.join(entries)}"
+        "</Stmt></BkToCstmrStmt></Document>"
+    ).encode()
+
+
+def revolut_statement(
+    rows: int,
+    seed: int | None = None,
+    start: datetime = datetime(2022, 1, 1),
+    days: int = 365,
+) -> bytes:
+    """Generate a Revolut .csv statement with random transactions
+
+    Args:
+        rows (int): number of transactions
+        seed (int | None, optional): seed of generated values. Defaults to `rows`.
+        start (datetime, optional): first day of the statement period
+        days (int, optional): length of the statement period
+
+    Returns:
+        bytes: content of the statement
+    """
+    generator = random.Random(rows if seed is None else seed)
+    return revolut_csv(
+        dict(
+            info=generator.choice(REVOLUT_TYPES),
+            title=f"Merchant {generator.randrange(1000)}",
+            base_amount=round(generator.uniform(-500, 500), 2),
+            base_currency=generator.choice(CURRENCIES),
+            transaction_date=start
+            + timedelta(seconds=generator.randrange(days * 24 * 3600)),
+        )
+        for _ in range(rows)
+    )
+
+
+def equabank_statement(
+    rows: int,
+    seed: int | None = None,
+    start: datetime = datetime(2022, 1, 1),
+    days: int = 28,
+) -> bytes:
+    """Generate an Equabank camt.053 .xml statement with random transactions
+
+    Args:
+        rows (int): number of transactions
+        seed (int | None, optional): seed of generated values. Defaults to `rows`.
+        start (datetime, optional): first day of the statement period
+        days (int, optional): length of the statement period
+
+    Returns:
+        bytes: content of the statement
+    """
+    generator = random.Random(rows if seed is None else seed)
+    return camt053(
+        dict(
+            info=f"Merchant {generator.randrange(1000)}",
+            title=f"Payment {generator.randrange(10000)}",
+            place=generator.choice(TOWNS),
+            base_amount=round(generator.uniform(1, 500), 2) * generator.choice([-1, 1]),
+            base_currency=generator.choice(CURRENCIES),
+            transaction_date=start + timedelta(days=generator.randrange(days)),
+        )
+        for _ in range(rows)
+    )
@@ -0,0 +1,526 @@
+import csv
+import io
+import math
+import random
+import re
+from calendar import monthrange
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Sequence
+
+from sqlalchemy import distinct, insert, select, text
+from sqlalchemy.orm import Query
+from werkzeug.security import generate_password_hash
+
+from app import db
+from app.dev.generators import camt053, revolut_csv
+from app.models import Bank, Category, ExchangeRate, MyBanks, Transaction, User
+
+BANKS = [("Revolut", "csv", MyBanks.REVOLUT), ("Equabank", "xml", MyBanks.EQUABANK)]
+RATES_FILE = Path(
+    "deployment/exchange_rates_data/exchange_rates_2018-01-01_2022-12-31.csv"
+)
+# Number of rows sent to the database by a single COPY statement
+COPY_CHUNK_SIZE = 50_000
+
+# Merchants of each spending category, with a typical amount in EUR and a weight
+# of the category in the number of card payments
+MERCHANTS = {
+    "groceries": (["Albert", "Lidl", "Billa", "Tesco", "Kaufland", "Penny"], 25, 30),
+    "restaurants": (
+        ["Bistro", "Pizzeria Roma", "Starbucks", "McDonalds", "Sushi Bar"],
+        15,
+        20,
+    ),
+    "transport": (["Bolt", "Uber", "DPP", "Ceske drahy", "Shell"], 12, 15),
+    "shopping": (["Amazon", "Alza", "IKEA", "Zara", "Decathlon"], 60, 12),
+    "entertainment": (["Netflix", "Spotify", "Cinema City", "Steam"], 12, 8),
+    "health": (["Dr.Max", "Benu", "Dentist"], 30, 5),
+    "travel": (["Booking.com", "Airbnb", "Ryanair", "Wizz Air"], 150, 3),
+}
+CATEGORIES = [*MERCHANTS, "salary", "housing"]
+TOWNS = ["Praha", "Brno", "Ostrava", "Plzen", "Olomouc", "Wien", "Berlin"]
+MAIN_CURRENCIES = {"CZK": 70, "EUR": 20, "USD": 10}
+FOREIGN_CURRENCIES = ["EUR", "USD", "PLN", "GBP"]
+# Relative number of card payments on each weekday (Monday first) and hour
+WEEKDAY_WEIGHTS = [1.0, 1.0, 1.0, 1.05, 1.2, 1.35, 0.9]
+HOUR_WEIGHTS = [
+    1,
+    0,
+    0,
+    0,
+    0,
+    1,
+    2,
+    4,
+    6,
+    6,
+    7,
+    8,
+    10,
+    9,
+    7,
+    7,
+    8,
+    10,
+    11,
+    10,
+    8,
+    6,
+    4,
+    2,
+]
+# Share of card payments made in a foreign currency, except for travel
+FOREIGN_SHARE = 0.08
+# Share of transactions the user has not categorized
+UNCATEGORIZED_SHARE = 0.3
+
+TRANSACTION_COLUMNS = [
+    "user_id",
+    "info",
+    "title",
+    "place",
+    "base_amount",
+    "base_currency",
+    "main_amount",
+    "transaction_date",
+    "creation_date",
+    "bank_id",
+    "category_id",
+]
+
+
+def copy_rows(table: str, columns: Sequence[str], rows: Iterable[Sequence]) -> int:
+    """Bulk load rows into a table with COPY, within the current session transaction.
+    None values are loaded as NULLs.
+
+    Args:
+        table (str): name of the table
+        columns (Sequence[str]): names of loaded columns
+        rows (Iterable[Sequence]): values of loaded columns
+
+    Returns:
+        int: number of loaded rows
+    """
+    cursor = db.session.connection().connection.cursor()
+    statement = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+    loaded = 0
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(row)
+        loaded += 1
+        if loaded % COPY_CHUNK_SIZE == 0:
+            buffer.seek(0)
+            cursor.copy_expert(statement, buffer)
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        buffer.seek(0)
+        cursor.copy_expert(statement, buffer)
+    cursor.close()
+    return loaded
+
+
+def load_rates(rates_file: Path) -> int:
+    """Load exchange rates from a .csv file for the days which have none in the database
+
+    Args:
+        rates_file (Path): .csv file with exchange rates in the format written
+        by RatesManager
+
+    Returns:
+        int: number of loaded rates
+    """
+    loaded_dates = {
+        loaded.date()
+        for loaded in db.session.scalars(select(distinct(ExchangeRate.date)))
+    }
+
+    def rows() -> Iterator[tuple]:
+        with open(rates_file, newline="") as csv_file:
+            for row in csv.DictReader(csv_file):
+                day = row.pop("date")
+                if date.fromisoformat(day) in loaded_dates:
+                    continue
+                for currency, rate in row.items():
+                    yield day, "EUR", currency, rate or None
+
+    return copy_rows("exchange_rates", ["date", "target", "source", "rate"], rows())
+
+
+def ensure_reference_data(rates_file: Path = RATES_FILE) -> None:
+    """Create banks, if the database has none of them, and load missing exchange rates
+
+    Args:
+        rates_file (Path, optional): .csv file with exchange rates to be loaded
+    """
+    if not Bank.query.first():
+        db.session.add_all(
+            Bank(name=name, statement_type=statement_type, name_enum=bank)
+            for name, statement_type, bank in BANKS
+        )
+    load_rates(rates_file)
+    db.session.commit()
+
+
+def months(end: date, count: int) -> list[date]:
+    """First days of `count` consecutive months, the last one being the month of `end`"""
+    first = end.year * 12 + end.month - count
+    return [
+        date(month // 12, month % 12 + 1, 1) for month in range(first, first + count)
+    ]
+
+
+class LedgerGenerator:
+    """Generator of realistic transactions of a user, month by month.
+
+    Salary and rent are paid monthly in user's main currency, card payments are
+    spread over days and hours like real spending, with merchants chosen by
+    a Zipf distribution and log-normally distributed amounts. Transactions carry
+    only the values which importers read from statements of their bank, so generated
+    statements import into the same transactions.
+    """
+
+    def __init__(
+        self,
+        rng: random.Random,
+        rates: dict[date, dict[str, float]],
+        banks: dict[MyBanks, int],
+    ) -> None:
+        """
+        Args:
+            rng (random.Random): source of randomness
+            rates (dict[date, dict[str, float]]): exchange rates to EUR by day
+            banks (dict[MyBanks, int]): ids of banks
+        """
+        self.rng = rng
+        self.rates = rates
+        self.banks = banks
+        # Typical rate of each currency, used to express amounts in it
+        totals: dict[str, list[float]] = defaultdict(list)
+        for day_rates in rates.values():
+            for currency, rate in day_rates.items():
+                totals[currency].append(rate)
+        self.scale = {currency: sum(r) / len(r) for currency, r in totals.items()}
+        self.categories, weights = zip(
+            *((name, weight) for name, (_, _, weight) in MERCHANTS.items())
+        )
+        self.category_weights = list(weights)
+
+    def _currency(self, day: date, currency: str, main_currency: str) -> str:
+        # Importers fail on days without rates, so such payments are made in the
+        # main currency, which needs no conversion
+        day_rates = self.rates.get(day, {})
+        if currency in day_rates and main_currency in day_rates:
+            return currency
+        return main_currency
+
+    def _amount(self, amount_eur: float, currency: str) -> float:
+        return round(amount_eur * self.scale.get(currency, 1), 2)
+
+    def _convert(self, amount: float, day: date, source: str, target: str) -> float:
+        if source == target:
+            return amount
+        # Same computation as Transaction.convert_to_main_amount
+        rates = self.rates[day]
+        return round(amount * ((1 / rates[source]) * rates[target]), 2)
+
+    def _transaction(
+        self,
+        bank: MyBanks,
+        moment: datetime,
+        amount: float,
+        currency: str,
+        main_currency: str,
+        category: str,
+        counterparty: str,
+        description: str,
+        place: str | None = None,
+    ) -> dict[str, Any]:
+        if bank == MyBanks.REVOLUT:
+            info, title = description, counterparty
+            place = None
+        else:
+            # Equabank statements have dates without time, which the importer
+            # parses with the time zone offset as the hour
+            info, title = counterparty.upper(), description.upper()
+            place = place.upper() if place else None
+            moment = datetime.combine(moment.date(), datetime.min.time()).replace(
+                hour=1
+            )
+        return dict(
+            info=info,
+            title=title,
+            place=place,
+            base_amount=amount,
+            base_currency=currency,
+            main_amount=self._convert(amount, moment.date(), currency, main_currency),
+            transaction_date=moment,
+            bank=bank,
+            category=None if self.rng.random() < UNCATEGORIZED_SHARE else category,
+        )
+
+    def user_profile(self) -> dict[str, Any]:
+        """Randomly choose attributes of a user, which stay the same over months"""
+
+        rng = self.rng
+        # Most users have accounts in both banks
+        banks = rng.choice(
+            [[MyBanks.REVOLUT, MyBanks.EQUABANK]] * 3
+            + [[MyBanks.REVOLUT], [MyBanks.EQUABANK]]
+        )
+        salary = rng.lognormvariate(math.log(2000), 0.4)
+        return dict(
+            main_currency=rng.choices(*zip(*MAIN_CURRENCIES.items()))[0],
+            banks=banks,
+            salary=salary,
+            rent=salary * rng.uniform(0.25, 0.45),
+            town=rng.choice(TOWNS),
+            # Merchants are ranked by preference of each user
+            merchants={
+                category: rng.sample(names, len(names))
+                for category, (names, _, _) in MERCHANTS.items()
+            },
+        )
+
+    def month(
+        self, profile: dict[str, Any], first_day: date, count: int
+    ) -> list[dict[str, Any]]:
+        """Generate transactions of a single month, sorted by date
+
+        Args:
+            profile (dict[str, Any]): user attributes created by `user_profile`
+            first_day (date): first day of the month
+            count (int): number of transactions
+
+        Returns:
+            list[dict[str, Any]]: transactions with Transaction attribute names,
+            `bank` and `category` name
+        """
+        rng = self.rng
+        main_currency = profile["main_currency"]
+        banks = profile["banks"]
+        days = [
+            first_day + timedelta(days=day)
+            for day in range(monthrange(first_day.year, first_day.month)[1])
+        ]
+        day_weights = [WEEKDAY_WEIGHTS[day.weekday()] for day in days]
+        transactions = []
+
+        # Salary and rent are paid to the last of user's banks
+        bank = banks[-1]
+        recurring = [
+            ("salary", profile["salary"], "Employer s.r.o.", "Salary", 10, "TOPUP"),
+            ("housing", -profile["rent"], "Landlord", "Rent", 1, "TRANSFER"),
+        ]
+        for category, amount_eur, counterparty, description, day, info in recurring:
+            if len(transactions) == count:
+                break
+            transactions.append(
+                self._transaction(
+                    bank,
+                    datetime(first_day.year, first_day.month, day, 8),
+                    self._amount(amount_eur * rng.uniform(0.98, 1.02), main_currency),
+                    main_currency,
+                    main_currency,
+                    category,
+                    counterparty,
+                    info if bank == MyBanks.REVOLUT else description,
+                )
+            )
+
+        for _ in range(count - len(transactions)):
+            category = rng.choices(self.categories, self.category_weights)[0]
+            names, typical_amount, _ = MERCHANTS[category]
+            # Zipf distribution of merchant popularity
+            merchant = rng.choices(
+                profile["merchants"][category],
+                [1 / rank for rank in range(1, len(names) + 1)],
+            )[0]
+            day = rng.choices(days, day_weights)[0]
+            moment = datetime.combine(day, datetime.min.time()) + timedelta(
+                hours=rng.choices(range(24), HOUR_WEIGHTS)[0],
+                seconds=rng.randrange(3600),
+            )
+            foreign = category == "travel" or rng.random() < FOREIGN_SHARE
+            currency = self._currency(
+                day,
+                rng.choice(FOREIGN_CURRENCIES) if foreign else main_currency,
+                main_currency,
+            )
+            amount = self._amount(
+                rng.lognormvariate(math.log(typical_amount), 0.6), currency
+            )
+            # Few card payments are refunded
+            amount = amount if rng.random() < 0.02 else -amount
+            bank = rng.choice(banks)
+            transactions.append(
+                self._transaction(
+                    bank,
+                    moment,
+                    amount,
+                    currency,
+                    main_currency,
+                    category,
+                    merchant,
+                    "CARD_PAYMENT" if bank == MyBanks.REVOLUT else "Card payment",
+                    profile["town"] if not foreign else rng.choice(TOWNS),
+                )
+            )
+
+        transactions.sort(key=lambda transaction: transaction["transaction_date"])
+        return transactions
+
+
+def load_rates_table(start: date, end: date) -> dict[date, dict[str, float]]:
+    """Fetch exchange rates of currencies used by generated ledgers for a period"""
+
+    query = db.session.query(
+        ExchangeRate.date, ExchangeRate.source, ExchangeRate.rate
+    ).filter(
+        ExchangeRate.date.between(start, end),
+        ExchangeRate.source.in_({*MAIN_CURRENCIES, *FOREIGN_CURRENCIES}),
+        ExchangeRate.rate.isnot(None),
+    )
+    rates: dict[date, dict[str, float]] = defaultdict(dict)
+    for day, source, rate in query:
+        rates[day.date()][source] = rate
+    return rates
+
+
+def write_statements(
+    directory: Path, first_day: date, transactions: list[dict[str, Any]]
+) -> None:
+    """Write monthly statements of each bank with the given transactions"""
+
+    directory.mkdir(parents=True, exist_ok=True)
+    for bank, render, suffix in (
+        (MyBanks.REVOLUT, revolut_csv, "csv"),
+        (MyBanks.EQUABANK, camt053, "xml"),
+    ):
+        bank_transactions = [t for t in transactions if t["bank"] == bank]
+        if bank_transactions:
+            path = directory / f"{bank.value}_{first_day:%Y-%m}.{suffix}"
+            path.write_bytes(render(bank_transactions))
+
+
+def seed_ledgers(
+    users: int,
+    transactions: int,
+    end: date,
+    month_count: int,
+    prefix: str = "seed",
+    password: str = "password",
+    statements: Path | None = None,
+    seed: int = 0,
+    rates_file: Path = RATES_FILE,
+) -> Iterator[tuple[str, int]]:
+    """Create users with generated ledgers, bulk loaded with COPY. Users are committed
+    one by one, so memory use does not grow with the number of users.
+
+    Args:
+        users (int): number of users, named `prefix` followed by their number
+        transactions (int): number of transactions of each user
+        end (date): day in the last month of ledgers
+        month_count (int): number of months of ledgers
+        prefix (str, optional): prefix of usernames. Defaults to "seed".
+        password (str, optional): password of all users. Defaults to "password".
+        statements (Path | None, optional): directory to write bank statements of
+        each user into, matching the loaded transactions. Defaults to None.
+        seed (int, optional): seed of generated values. Defaults to 0.
+        rates_file (Path, optional): .csv file with exchange rates to be loaded
+
+    Yields:
+        tuple[str, int]: username and number of loaded transactions
+    """
+    ensure_reference_data(rates_file)
+    periods = months(end, month_count)
+    last_day = periods[-1].replace(day=monthrange(end.year, end.month)[1])
+    generator = LedgerGenerator(
+        random.Random(seed),
+        load_rates_table(periods[0], last_day),
+        {bank.name_enum: bank.id for bank in Bank.query.all()},
+    )
+    # Hashing is slow on purpose, so all users share a single password hash
+    password_hash = generate_password_hash(password)
+    creation_date = datetime.utcnow()
+
+    for number in range(users):
+        username = f"{prefix}{number}"
+        profile = generator.user_profile()
+        user_id = db.session.scalar(
+            insert(User)
+            .values(
+                username=username,
+                email=f"{username}@example.com",
+                password_hash=password_hash,
+                main_currency=profile["main_currency"],
+            )
+            .returning(User.id)
+        )
+        category_ids = dict(
+            db.session.execute(
+                insert(Category)
+                .values([dict(name=name, user_id=user_id) for name in CATEGORIES])
+                .returning(Category.name, Category.id)
+            ).all()
+        )
+
+        def rows() -> Iterator[tuple]:
+            for index, first_day in enumerate(periods):
+                count = transactions // month_count + (
+                    index < transactions % month_count
+                )
+                generated = generator.month(profile, first_day, count)
+                if statements:
+                    write_statements(statements / username, first_day, generated)
+                for transaction in generated:
+                    yield (
+                        user_id,
+                        transaction["info"],
+                        transaction["title"],
+                        transaction["place"],
+                        transaction["base_amount"],
+                        transaction["base_currency"],
+                        transaction["main_amount"],
+                        transaction["transaction_date"],
+                        creation_date,
+                        generator.banks[transaction["bank"]],
+                        category_ids.get(transaction["category"]),
+                    )
+
+        loaded = copy_rows(Transaction.__tablename__, TRANSACTION_COLUMNS, rows())
+        db.session.commit()
+        yield username, loaded
+
+    # Refresh planner statistics, which are outdated after loading many rows
+    db.session.execute(text(f"ANALYZE {Transaction.__tablename__}"))
+    db.session.commit()
+
+
+def seeded_users(prefix: str) -> Query:
+    """Query of users seeded with a prefix, i.e. named the prefix followed by
+    a number. Other users starting with the prefix are not included.
+
+    Raises:
+        ValueError: if the prefix is empty
+    """
+    if not prefix:
+        raise ValueError("Prefix of seeded users must not be empty")
+    return User.query.filter(User.username.regexp_match(f"^{re.escape(prefix)}[0-9]+$"))
+
+
+def delete_users(prefix: str) -> int:
+    """Delete users seeded with a prefix, together with their data
+
+    Raises:
+        ValueError: if the prefix is empty
+
+    Returns:
+        int: number of deleted users
+    """
+    deleted = seeded_users(prefix).delete(synchronize_session=False)
+    db.session.commit()
+    return deleted
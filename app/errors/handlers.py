@@ -1,10 +1,11 @@
 from flask import render_template
 from flask.typing import ResponseReturnValue
 from sqlalchemy.exc import SQLAlchemyError
-from werkzeug.exceptions import HTTPException
+from werkzeug.exceptions import HTTPException, ServiceUnavailable
 
 from app import db
 from app.errors import blueprint
+from app.monitoring.health import db_monitor, unavailable_error
 
 
 @blueprint.app_errorhandler(HTTPException)
@@ -18,9 +19,17 @@ def http_error(error: HTTPException) -> ResponseReturnValue:
 @blueprint.app_errorhandler(SQLAlchemyError)
 def sqlalchemy_error(error: SQLAlchemyError) -> ResponseReturnValue:
     db.session.rollback()
+    if not db_monitor.available:
+        return error_503(unavailable_error())
     return render_template("error500.html"), 500
 
 
+@blueprint.app_errorhandler(503)
+def error_503(error: ServiceUnavailable) -> ResponseReturnValue:
+    headers = {"Retry-After": str(error.retry_after)} if error.retry_after else {}
+    return {"code": error.code, "message": error.description}, 503, headers
+
+
 @blueprint.app_errorhandler(500)
 def error_500(error: HTTPException) -> ResponseReturnValue:
     return render_template("error500.html"), 500
@@ -11,7 +11,7 @@ from flask import current_app
 from httpx import Response
 from httpx._exceptions import HTTPError
 
-from app import cache, db
+from app import db
 from app.exceptions import ExternalApiError, FileError
 from app.external.schemas import ExchangeRateSchema
 from app.models import ExchangeRate
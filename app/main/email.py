@@ -1,12 +1,13 @@
 from flask import current_app, render_template
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail
 
 from app.exceptions import ExternalApiError
 from app.models import User
 
 
 def send_password_reset_email(user: User) -> None:
+    # SendGrid client is slow to import and only needed once an email is sent
+    from sendgrid import SendGridAPIClient
+    from sendgrid.helpers.mail import Mail
 
     token = user.get_reset_password_token()
     message = Mail(
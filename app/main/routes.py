@@ -1,12 +1,12 @@
-from flask import flash, redirect, render_template, url_for
-from flask_login import current_user, login_required, login_user, logout_user 
+from flask import current_app, flash, redirect, render_template, url_for
+from flask_login import current_user, login_required, login_user, logout_user
 from werkzeug.wrappers import Response
 
 from app import db
+from app.api.bootstrap import bootstrap_data
 from app.main import blueprint
 from app.main.email import send_password_reset_email
 from app.main.forms import LoginForm, RequestPasswordForm, ResetPasswordForm, SignUpForm
-from app.main.utils import wait_for_db
 from app.models import User
 
 
@@ -14,15 +14,17 @@ from app.models import User
 @blueprint.route("/")
 @login_required
 def index() -> str:
-    wait_for_db()
+    # Inlined data spares the dashboard requests made right after it is loaded
+    bootstrap = bootstrap_data() if current_app.config["BOOTSTRAP_INLINE"] else None
     return render_template(
-        "index.html", current_user=current_user._get_current_object()
+        "index.html",
+        current_user=current_user._get_current_object(),
+        bootstrap=bootstrap,
     )
 
 
 @blueprint.route("/welcome", methods=["GET"])
 def welcome() -> str | Response:
-    wait_for_db()
     if current_user.is_authenticated:
         return redirect(url_for("main.index"))
 
@@ -1,17 +1,23 @@
 from __future__ import annotations
 
+from dataclasses import dataclass
 from datetime import datetime
 from enum import Enum
+from threading import Lock
 from time import time
+from types import MappingProxyType
+from typing import Any, Iterable, Mapping
 
-import jwt
-from flask import current_app
+from flask import current_app, g, has_app_context, has_request_context
 from flask_login import UserMixin
-from sqlalchemy import CheckConstraint, UniqueConstraint, select
+from sqlalchemy import CheckConstraint, UniqueConstraint, delete, event, insert, select
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import with_parent
 from werkzeug.security import check_password_hash, generate_password_hash
 
 from app import db, login
+from app.caching import CacheNamespace, bump_version, get_version, user_scope
+from app.partitioning import create_default_partition
 
 
 class UpdatableMixin:
@@ -47,6 +53,14 @@ class User(UserMixin, UpdatableMixin, db.Model):
         lazy=True,
         uselist=True,
     )
+    rules = db.relationship(
+        "CategoryRule",
+        cascade="all, delete",
+        passive_deletes=True,
+        back_populates="user",
+        lazy=True,
+        uselist=True,
+    )
 
     def __init__(self, username: str, email: str, password: str, **kwargs) -> None:
         super(User, self).__init__(username=username, email=email, **kwargs)
@@ -55,6 +69,11 @@ class User(UserMixin, UpdatableMixin, db.Model):
     def __repr__(self) -> str:
         return f"{self.username}: {self.first_name} {self.last_name} under email: {self.email}"
 
+    @property
+    def model(self) -> User:
+        """Interface shared with CachedUser, as current user can be either of them"""
+        return self
+
     def update(self, data: dict) -> None:
         if "main_currency" in data and data["main_currency"] != self.main_currency:
             for transaction in self.select_transactions():
@@ -73,6 +92,8 @@ class User(UserMixin, UpdatableMixin, db.Model):
         Returns:
             str: generated token
         """
+        import jwt
+
         return jwt.encode(
             {
                 "email": self.email,
@@ -92,6 +113,8 @@ class User(UserMixin, UpdatableMixin, db.Model):
         Returns:
             User | None: User model object if token was authenticated successfully
         """
+        import jwt
+
         try:
             email = jwt.decode(token, current_app.config["SECRET_KEY"], ["HS256"])[
                 "email"
@@ -106,6 +129,13 @@ class User(UserMixin, UpdatableMixin, db.Model):
     def select_categories(self) -> list[Category]:
         return Category.query.where(with_parent(self, User.categories)).all()
 
+    def select_rules(self) -> list[CategoryRule]:
+        return (
+            CategoryRule.query.where(with_parent(self, User.rules))
+            .order_by(CategoryRule.priority, CategoryRule.id)
+            .all()
+        )
+
     def select_banks(self) -> list[Bank]:
         return (
             Bank.query.select_from(Transaction)
@@ -123,25 +153,131 @@ class User(UserMixin, UpdatableMixin, db.Model):
         ).all()
 
 
+class CachedUser(UserMixin):
+    """Lightweight snapshot of an authenticated user, kept in the cache between requests.
+
+    Attributes not held by the snapshot are delegated to the full `User` model,
+    which is fetched only the first time such an attribute is accessed.
+    """
+
+    def __init__(
+        self, id: int, username: str, main_currency: str, version: int
+    ) -> None:
+        self.id = id
+        self.username = username
+        self.main_currency = main_currency
+        self.version = version
+        self._model: User | None = None
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.model, name)
+
+    @property
+    def model(self) -> User:
+        """Full ORM user, attached to the current session on first use"""
+        if self._model is None:
+            self._model = db.session.get(User, self.id)
+        return self._model
+
+    @classmethod
+    def load(cls, id: int) -> CachedUser | None:
+        """Get user snapshot from the cache or build it with a single query
+
+        Args:
+            id (int): id of the user
+
+        Returns:
+            CachedUser | None: user snapshot or None if the user does not exist
+        """
+        snapshot = user_snapshots.get("snapshot", user_id=id)
+        if snapshot is None:
+            row = db.session.execute(
+                select(User.id, User.username, User.main_currency).where(User.id == id)
+            ).one_or_none()
+            if row is None:
+                return None
+            # Snapshot carries the version of user's cached values it was built with
+            snapshot = (*row, get_version(user_scope(id)))
+            user_snapshots.set(
+                "snapshot",
+                snapshot,
+                user_id=id,
+                timeout=current_app.config["USER_CACHE_TIMEOUT"],
+            )
+        return cls(*snapshot)
+
+    @classmethod
+    def invalidate(cls, mapper: Any, connection: Any, user: User) -> None:
+        """Drop all cached values of a modified user, including its snapshot.
+        Signature allows usage as an event listener."""
+        bump_version(user_scope(user.id))
+
+
+user_snapshots = CacheNamespace("user", per_user=True)
+for identifier in ("after_update", "after_delete"):
+    event.listen(User, identifier, CachedUser.invalidate)
+
+
 @login.user_loader
-def load_user(id: str) -> User:
-    return User.query.get(int(id))
+def load_user(id: str) -> CachedUser | None:
+    return CachedUser.load(int(id))
+
+
+# Searchable text of a transaction, words of it are indexed in `search_vector`
+SEARCH_DOCUMENT = (
+    "coalesce(info, '') || ' ' || coalesce(title, '') || ' ' || coalesce(place, '')"
+)
+# Text search configuration without stemming, as texts are names in many languages
+SEARCH_CONFIG = "simple"
+# Trigram index of the searchable text, created by migrations only where the pg_trgm
+# extension is available, so it is not declared in the model
+SEARCH_TRIGRAM_INDEX = "ix_transactions_search_trigram"
+# Timestamps of changes are taken from the database, so that all workers share a clock
+UTC_NOW = "timezone('utc', now())"
 
 
 class Transaction(UpdatableMixin, db.Model):
     __tablename__ = "transactions"
+    __table_args__ = (
+        db.Index(
+            "ix_transactions_user_id_transaction_date", "user_id", "transaction_date"
+        ),
+        db.Index(
+            "ix_transactions_search_vector", "search_vector", postgresql_using="gin"
+        ),
+        db.Index("ix_transactions_user_id_updated_at", "user_id", "updated_at"),
+        {"postgresql_partition_by": "RANGE (transaction_date)"},
+    )
 
-    id = db.Column(db.Integer, primary_key=True)
+    # Primary key of partitions has to contain the partition key, ids are unique
+    # nonetheless, so the ORM identifies transactions by ids only
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     info = db.Column(db.Text, index=True)
     title = db.Column(db.Text)
     main_amount = db.Column("main_amount", db.Float, index=True, nullable=False)
     base_amount = db.Column(db.Float, index=True, nullable=False)
     base_currency = db.Column(db.String(3), index=True, nullable=False)
-    transaction_date = db.Column(db.DateTime, index=True, nullable=False)
+    transaction_date = db.Column(
+        db.DateTime, primary_key=True, index=True, nullable=False
+    )
     creation_date = db.Column(
         db.DateTime, index=True, nullable=False, default=datetime.utcnow
     )
     place = db.Column(db.Text)
+    # Time of the last change, used by clients syncing only changed transactions
+    updated_at = db.Column(
+        db.DateTime,
+        server_default=db.text(UTC_NOW),
+        onupdate=db.text(UTC_NOW),
+        nullable=False,
+    )
+    # Only used in queries, so it is not loaded with transactions
+    search_vector = db.deferred(
+        db.Column(
+            TSVECTOR,
+            db.Computed(f"to_tsvector('{SEARCH_CONFIG}', {SEARCH_DOCUMENT})"),
+        )
+    )
 
     category_id = db.Column(db.Integer, db.ForeignKey("categories.id"), index=True)
     user_id = db.Column(
@@ -153,6 +289,8 @@ class Transaction(UpdatableMixin, db.Model):
     user = db.relationship("User", back_populates="transactions")
     bank = db.relationship("Bank", back_populates="transactions")
 
+    __mapper_args__ = {"primary_key": [id]}
+
     def __init__(
         self,
         base_amount: float,
@@ -196,7 +334,7 @@ class Transaction(UpdatableMixin, db.Model):
         self.main_amount = round(self.base_amount * exchange_rate, 2)
 
     @classmethod
-    def get_from_id(cls, id: int, user: User) -> Transaction | None:
+    def get_from_id(cls, id: int, user: User | CachedUser) -> Transaction | None:
         """Get transaction by id and check if it belongs to specified user.
 
         Args:
@@ -205,7 +343,55 @@ class Transaction(UpdatableMixin, db.Model):
         Returns:
             Transaction: transaction found
         """
-        return cls.query.filter_by(id=id, user=user).first()
+        return cls.query.filter_by(id=id, user_id=user.id).first()
+
+
+# Rows of years without a partition are kept in the default partition
+event.listen(
+    Transaction.__table__,
+    "after_create",
+    lambda target, connection, **kwargs: create_default_partition(connection),
+)
+
+
+class TransactionTombstone(db.Model):
+    """Record of a deleted transaction, which lets clients syncing changes of
+    transactions drop it. A tombstone without a transaction id marks deletion of all
+    transactions of the user.
+    """
+
+    __tablename__ = "transaction_tombstones"
+    __table_args__ = (
+        db.Index(
+            "ix_transaction_tombstones_user_id_deleted_at", "user_id", "deleted_at"
+        ),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    transaction_id = db.Column(db.Integer)
+    deleted_at = db.Column(db.DateTime, server_default=db.text(UTC_NOW), nullable=False)
+
+    user_id = db.Column(
+        db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+
+    @classmethod
+    def record(cls, user_id: int, transaction_ids: Iterable[int]) -> None:
+        """Add tombstones of deleted transactions of a user with a single statement"""
+        rows = [{"user_id": user_id, "transaction_id": id} for id in transaction_ids]
+        if rows:
+            db.session.execute(insert(cls), rows)
+
+    @classmethod
+    def record_all(cls, user_id: int) -> None:
+        """Add a tombstone of all transactions of a user, replacing the previous ones"""
+        db.session.execute(delete(cls).where(cls.user_id == user_id))
+        db.session.execute(insert(cls).values(user_id=user_id))
+
+    @classmethod
+    def purge(cls, before: datetime) -> int:
+        """Delete tombstones older than a time, returns the number of deleted ones"""
+        return db.session.execute(delete(cls).where(cls.deleted_at < before)).rowcount
 
 
 class MyBanks(Enum):
@@ -233,6 +419,89 @@ class Bank(db.Model):
         return f"Bank: {self.name}"
 
 
+@dataclass(frozen=True)
+class BankEntry:
+    """Immutable, session-independent snapshot of a Bank row"""
+
+    id: int
+    name: str
+    statement_type: str
+    name_enum: MyBanks
+
+
+class BankRegistry:
+    """Process-wide read-only cache of the static 'banks' table.
+
+    Banks are loaded on first access and kept in memory, so lookups by id, name
+    or MyBanks enum do not touch the DB. The registry is invalidated whenever
+    banks are modified through the ORM or the table is (re)created, in other workers
+    through the shared version of banks. The shared version is read at most once per
+    request.
+    """
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._version: int | None = None
+        self._by_id: Mapping[int, BankEntry] | None = None
+        self._by_name: Mapping[str, BankEntry] = MappingProxyType({})
+        self._by_enum: Mapping[MyBanks, BankEntry] = MappingProxyType({})
+
+    @staticmethod
+    def _current_version() -> int:
+        if not has_request_context():
+            return get_version("banks")
+        if "banks_version" not in g:
+            g.banks_version = get_version("banks")
+        return g.banks_version
+
+    def _load(self) -> Mapping[int, BankEntry]:
+        version = self._current_version()
+        with self._lock:
+            if self._by_id is None or self._version != version:
+                entries = [
+                    BankEntry(*row)
+                    for row in db.session.query(
+                        Bank.id, Bank.name, Bank.statement_type, Bank.name_enum
+                    ).order_by(Bank.id)
+                ]
+                self._by_name = MappingProxyType({bank.name: bank for bank in entries})
+                self._by_enum = MappingProxyType(
+                    {bank.name_enum: bank for bank in entries}
+                )
+                self._by_id = MappingProxyType({bank.id: bank for bank in entries})
+                self._version = version
+            return self._by_id
+
+    def all(self) -> list[BankEntry]:
+        return list(self._load().values())
+
+    def get(self, id: int) -> BankEntry | None:
+        return self._load().get(id)
+
+    def from_name(self, name: str) -> BankEntry | None:
+        self._load()
+        return self._by_name.get(name)
+
+    def from_enum(self, name_enum: MyBanks) -> BankEntry | None:
+        self._load()
+        return self._by_enum.get(name_enum)
+
+    def invalidate(self, *args: Any, **kwargs: Any) -> None:
+        """Drop loaded banks, signature allows usage as an event listener"""
+        with self._lock:
+            self._by_id = None
+        if has_app_context():
+            g.pop("banks_version", None)
+            bump_version("banks")
+
+
+bank_registry = BankRegistry()
+for identifier in ("after_insert", "after_update", "after_delete"):
+    event.listen(Bank, identifier, bank_registry.invalidate)
+for identifier in ("after_create", "after_drop"):
+    event.listen(Bank.__table__, identifier, bank_registry.invalidate)
+
+
 class Category(db.Model, UpdatableMixin):
     __tablename__ = "categories"
     __table_args__ = (UniqueConstraint("name", "user_id"),)
@@ -255,14 +524,74 @@ class Category(db.Model, UpdatableMixin):
 
     user = db.relationship("User", back_populates="categories", lazy=True)
     transactions = db.relationship("Transaction", back_populates="category", lazy=True)
+    rules = db.relationship(
+        "CategoryRule",
+        cascade="all, delete",
+        passive_deletes=True,
+        back_populates="category",
+        lazy=True,
+    )
 
     def __repr__(self) -> str:
         return f"Category: {self.name}"
 
     @classmethod
-    def get_from_id(cls, category_id: int, user: User) -> Category | None:
+    def get_from_id(cls, category_id: int, user: User | CachedUser) -> Category | None:
         """Query for Category with an id"""
-        return cls.query.filter_by(id=category_id, user=user).first()
+        return cls.query.filter_by(id=category_id, user_id=user.id).first()
+
+
+class CategoryRule(db.Model, UpdatableMixin):
+    """Rule assigning a category to transactions matching all of its conditions"""
+
+    __tablename__ = "category_rules"
+
+    id = db.Column(db.Integer, primary_key=True)
+    # Substring or regular expression searched for in info, title and place
+    pattern = db.Column(db.Text)
+    is_regex = db.Column(db.Boolean, default=False, nullable=False)
+    amount_min = db.Column(db.Float)
+    amount_max = db.Column(db.Float)
+    # Rules are evaluated in ascending order of priority
+    priority = db.Column(db.Integer, default=0, nullable=False)
+    updated_at = db.Column(
+        db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False
+    )
+
+    category_id = db.Column(
+        db.Integer, db.ForeignKey("categories.id", ondelete="CASCADE"), nullable=False
+    )
+    user_id = db.Column(
+        db.Integer,
+        db.ForeignKey("users.id", ondelete="CASCADE"),
+        index=True,
+        nullable=False,
+    )
+    bank_id = db.Column(db.Integer, db.ForeignKey("banks.id"))
+
+    category = db.relationship("Category", back_populates="rules")
+    user = db.relationship("User", back_populates="rules")
+
+    def __repr__(self) -> str:
+        return f"CategoryRule: {self.pattern} -> {self.category_id}"
+
+    @classmethod
+    def get_from_id(cls, id: int, user: User | CachedUser) -> CategoryRule | None:
+        """Query for CategoryRule with an id, belonging to a user"""
+        return cls.query.filter_by(id=id, user_id=user.id).first()
+
+
+def invalidate_rules(
+    mapper: Any, connection: Any, target: Category | CategoryRule
+) -> None:
+    """Drop cached values of the owner of modified rules, including compiled rules.
+    Rules of a deleted category are deleted by the DB, without ORM events."""
+    bump_version(user_scope(target.user_id))
+
+
+for identifier in ("after_insert", "after_update", "after_delete"):
+    event.listen(CategoryRule, identifier, invalidate_rules)
+event.listen(Category, "after_delete", invalidate_rules)
 
 
 class ExchangeRate(db.Model, UpdatableMixin):
@@ -292,7 +621,54 @@ class ExchangeRate(db.Model, UpdatableMixin):
         Returns:
             float: final exchange rate
         """
-        source_rate = cls.query.filter_by(date=date.date(), source=source).scalar()
-        target_rate = cls.query.filter_by(date=date.date(), source=target).scalar()
+        source_rate = cls.get_rate(date, source)
+        target_rate = cls.get_rate(date, target)
+
+        return (1 / source_rate) * target_rate
+
+    @classmethod
+    def get_rate(cls, date: datetime, currency: str) -> float | None:
+        """Get exchange rate of a currency to the 'bridge' currency on a given day.
+        Rates are cached, as they do not change once loaded."""
+
+        key = cls._cache_key(date, currency)
+        rate = exchange_rates.get(key)
+        if rate is None:
+            rate = (
+                db.session.query(cls.rate)
+                .filter_by(date=date.date(), source=currency)
+                .scalar()
+            )
+            exchange_rates.set(key, rate)
+        return rate
+
+    @classmethod
+    def preload_rates(
+        cls, dates: Iterable[datetime], currencies: Iterable[str]
+    ) -> None:
+        """Fetch exchange rates for a batch of dates and currencies with a single query
+        and store them in the cache
+
+        Args:
+            dates (Iterable[datetime]): dates for which exchange rates are needed
+            currencies (Iterable[str]): currencies for which exchange rates are needed
+        """
+        dates = list(dates)
+        if not dates:
+            return
+
+        query = db.session.query(cls.date, cls.source, cls.rate).filter(
+            cls.date.between(min(dates).date(), max(dates).date()),
+            cls.source.in_(set(currencies)),
+        )
+        exchange_rates.set_many(
+            {cls._cache_key(date, source): rate for date, source, rate in query}
+        )
+
+    @staticmethod
+    def _cache_key(date: datetime, currency: str) -> str:
+        return f"{date.strftime('%Y-%m-%d')}:{currency}"
+
 
-        return (1 / source_rate.rate) * target_rate.rate
+# Rates never change, so each worker keeps them in its memory
+exchange_rates = CacheNamespace("exchange_rate", local=True)
@@ -0,0 +1,5 @@
+from flask import Blueprint
+
+blueprint = Blueprint("monitoring", __name__)
+
+from app.monitoring import health, metrics, pool, sql
@@ -0,0 +1,114 @@
+import time
+from os import getpid
+from threading import Event, Lock, Thread
+from typing import Any
+
+from flask import Flask, current_app, request
+from flask.typing import ResponseReturnValue
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from werkzeug.exceptions import ServiceUnavailable
+
+from app import db
+from app.monitoring import blueprint
+
+
+class DatabaseMonitor:
+    """Tracker of database availability, shared by all requests of a worker.
+
+    While the database is available the monitor stays passive and costs no queries,
+    it only observes connection errors reported by the engine. Once a connection
+    fails, requests are rejected immediately instead of waiting for retries, and
+    a background thread probes the database with exponential backoff until it
+    responds again.
+    """
+
+    def __init__(self) -> None:
+        self.available = True
+        self._engine: Engine | None = None
+        self._config: dict[str, Any] = {}
+        self._wake = Event()
+        self._lock = Lock()
+        self._thread: Thread | None = None
+        self._pid: int | None = None
+
+    def init_app(self, app: Flask) -> None:
+        self.available = True
+        self._config = app.config
+        with app.app_context():
+            self._engine = db.engine
+        event.listen(self._engine, "handle_error", self._handle_error)
+
+    def mark_unavailable(self) -> None:
+        """Reject following requests and start probing the database"""
+        self.available = False
+        self._wake.set()
+        self._ensure_thread()
+
+    def _ensure_thread(self) -> None:
+        # Threads do not survive forking of workers, so the thread is started lazily
+        with self._lock:
+            if self._thread and self._thread.is_alive() and self._pid == getpid():
+                return
+            self._pid = getpid()
+            self._thread = Thread(target=self._run, name="db-monitor", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            self.wait_until_available()
+
+    def wait_until_available(self) -> None:
+        """Probe the database with exponential backoff until it responds"""
+        delay = self._config["DB_CONNECT_BACKOFF"]
+        while not self.probe():
+            time.sleep(delay)
+            delay = min(delay * 2, self._config["DB_CONNECT_BACKOFF_MAX"])
+        self.available = True
+
+    def probe(self) -> bool:
+        """Check if the database accepts connections
+
+        Returns:
+            bool: True if the database responded
+        """
+        try:
+            with self._engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
+            return True
+        except Exception:
+            return False
+
+    def _handle_error(self, context: Any) -> None:
+        # Missing connection means that the connection could not be established,
+        # failed probes of the already unavailable database do not wake the thread
+        if (context.is_disconnect or context.connection is None) and self.available:
+            self.mark_unavailable()
+
+
+db_monitor = DatabaseMonitor()
+
+
+def unavailable_error() -> ServiceUnavailable:
+    return ServiceUnavailable(
+        "Database is not available, please try again later",
+        retry_after=current_app.config["DB_RETRY_AFTER"],
+    )
+
+
+@blueprint.before_app_request
+def reject_when_unavailable() -> None:
+    if not db_monitor.available and request.endpoint not in (
+        "static",
+        "monitoring.health",
+    ):
+        raise unavailable_error()
+
+
+@blueprint.route("/health", methods=["GET"])
+def health() -> ResponseReturnValue:
+    """Report database availability as seen by the worker, without querying it"""
+    status = "available" if db_monitor.available else "unavailable"
+    return {"database": status}, 200 if db_monitor.available else 503
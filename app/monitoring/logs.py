@@ -0,0 +1,211 @@
+import atexit
+import copy
+import json
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from pathlib import Path
+
+from flask import Flask
+
+# Listener of the running application, replaced when logging is configured again
+_listener: QueueListener | None = None
+_queue_handler: QueueHandler | None = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as single-line JSON objects"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "location": f"{record.pathname}:{record.lineno}",
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """Hand records over to the listener thread, dropping them if its queue is full,
+    so that logging never blocks the calling thread"""
+
+    def __init__(self, queue: queue.Queue) -> None:
+        super().__init__(queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Message and traceback are rendered eagerly, as the arguments and frames
+        # could change or be released before the record is written
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class BatchedRotatingFileHandler(RotatingFileHandler):
+    """File handler writing a batch of records at once, with a single size check
+    and flush per batch"""
+
+    def handle_batch(self, records: list[logging.LogRecord]) -> None:
+        records = [record for record in records if self.filter(record)]
+        if not records:
+            return
+
+        self.acquire()
+        try:
+            data = "".join(self.format(record) + self.terminator for record in records)
+            if self.stream is None:
+                self.stream = self._open()
+            size = self.stream.seek(0, 2)
+            if self.maxBytes > 0 and size and size + len(data) >= self.maxBytes:
+                self.doRollover()
+            self.stream.write(data)
+            self.stream.flush()
+        except Exception:
+            self.handleError(records[0])
+        finally:
+            self.release()
+
+
+class BatchQueueListener(QueueListener):
+    """Queue listener passing records to handlers in batches of up to `batch_size`"""
+
+    def __init__(
+        self, queue: queue.Queue, *handlers: logging.Handler, batch_size: int
+    ) -> None:
+        super().__init__(queue, *handlers, respect_handler_level=True)
+        self.batch_size = batch_size
+
+    def _monitor(self) -> None:
+        stop = False
+        while not stop:
+            batch = [self.dequeue(True)]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            records = []
+            for record in batch:
+                if record is self._sentinel:
+                    stop = True
+                else:
+                    records.append(self.prepare(record))
+                self.queue.task_done()
+            self.handle_batch(records)
+
+    def handle_batch(self, records: list[logging.LogRecord]) -> None:
+        for handler in self.handlers:
+            handled = [record for record in records if record.levelno >= handler.level]
+            if isinstance(handler, BatchedRotatingFileHandler):
+                handler.handle_batch(handled)
+            else:
+                for record in handled:
+                    handler.handle(record)
+
+
+def configure_logging(app: Flask) -> None:
+    """Route application logs through a queue to a background writer thread
+
+    Args:
+        app (Flask): configured application
+    """
+    global _listener, _queue_handler
+
+    config = app.config
+    Path("./logs").mkdir(exist_ok=True)
+    json_formatter = JsonFormatter() if config["LOG_FORMAT"] == "json" else None
+    handlers: list[logging.Handler] = []
+
+    def add_handler(
+        handler: logging.Handler, logger_name: str, level: int, format: str
+    ) -> None:
+        handler.setLevel(level)
+        handler.addFilter(logging.Filter(logger_name))
+        handler.setFormatter(json_formatter or logging.Formatter(format))
+        handlers.append(handler)
+
+    def file_handler(filename: str) -> BatchedRotatingFileHandler:
+        return BatchedRotatingFileHandler(
+            Path("./logs", filename),
+            maxBytes=config["LOG_MAX_BYTES"],
+            backupCount=config["LOG_BACKUP_COUNT"],
+            delay=True,
+        )
+
+    # Logging SQL statements exceeding SLOW_QUERY_THRESHOLD
+    add_handler(
+        file_handler("slow_queries.log"),
+        "wallit.sql.slow",
+        logging.INFO,
+        "%(asctime)s %(levelname)s: %(message)s",
+    )
+    loggers = {"wallit.sql.slow": logging.INFO}
+
+    if app.debug:
+        # Logging for debugging
+        add_handler(
+            logging.StreamHandler(), app.logger.name, logging.DEBUG, "%(message)s"
+        )
+        loggers[app.logger.name] = logging.DEBUG
+    else:
+        # Logging for requests
+        add_handler(
+            file_handler("requests.log"), "werkzeug", logging.INFO, "%(message)s"
+        )
+        # Logging error tracebacks
+        add_handler(
+            file_handler("errors.log"),
+            app.logger.name,
+            logging.INFO,
+            "%(asctime)s %(levelname)s: %(message)s\n[in %(pathname)s:%(lineno)d]",
+        )
+        # Additional logging to stdout for PaaS monitoring
+        add_handler(
+            logging.StreamHandler(), app.logger.name, logging.INFO, "%(message)s"
+        )
+        loggers.update({"werkzeug": logging.INFO, app.logger.name: logging.INFO})
+
+    if _listener:
+        _listener.stop()
+    log_queue: queue.Queue = queue.Queue(config["LOG_QUEUE_SIZE"])
+    queue_handler = NonBlockingQueueHandler(log_queue)
+    for name, level in loggers.items():
+        logger = logging.getLogger(name)
+        if _queue_handler:
+            logger.removeHandler(_queue_handler)
+        logger.addHandler(queue_handler)
+        logger.setLevel(level)
+
+    _queue_handler = queue_handler
+    _listener = BatchQueueListener(
+        log_queue, *handlers, batch_size=config["LOG_BATCH_SIZE"]
+    )
+    _listener.start()
+
+
+def stop_logging() -> None:
+    """Write out all queued records and stop the writer thread"""
+    global _listener
+    if _listener:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_logging)
@@ -0,0 +1,91 @@
+import os
+from ipaddress import ip_address, ip_network
+from time import perf_counter
+
+from flask import abort, current_app, g, request
+from flask.typing import ResponseReturnValue
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client.multiprocess import MultiProcessCollector
+
+from app.monitoring import blueprint
+
+# Metrics are shared by gunicorn workers through files in PROMETHEUS_MULTIPROC_DIR,
+# without the variable they are kept in the memory of a single process
+REQUEST_LATENCY = Histogram(
+    "wallit_request_duration_seconds",
+    "Request latency by endpoint",
+    ["endpoint", "method"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+REQUESTS = Counter(
+    "wallit_requests_total", "Handled requests", ["endpoint", "method", "status"]
+)
+REQUEST_DB_TIME = Histogram(
+    "wallit_request_db_seconds",
+    "Time spent executing SQL statements per request",
+    ["endpoint"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5),
+)
+IMPORTED_ROWS = Counter(
+    "wallit_import_rows_total", "Transactions imported from statements", ["bank"]
+)
+IMPORT_TIME = Counter(
+    "wallit_import_duration_seconds_total", "Time spent importing statements", ["bank"]
+)
+IMPORT_FAILURES = Counter(
+    "wallit_import_failures_total", "Statements which failed to import", ["bank"]
+)
+CACHE_REQUESTS = Counter(
+    "wallit_cache_requests_total", "Cache lookups by namespace", ["namespace", "result"]
+)
+
+
+def record_import(bank: str, rows: int, duration: float) -> None:
+    IMPORTED_ROWS.labels(bank).inc(rows)
+    IMPORT_TIME.labels(bank).inc(duration)
+
+
+@blueprint.after_app_request
+def record_request(response: ResponseReturnValue) -> ResponseReturnValue:
+    if "request_start" not in g:
+        return response
+    # Unmatched URLs are grouped together to keep the number of series bounded
+    endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+    REQUEST_LATENCY.labels(endpoint, request.method).observe(
+        perf_counter() - g.request_start
+    )
+    REQUESTS.labels(endpoint, request.method, response.status_code).inc()
+    REQUEST_DB_TIME.labels(endpoint).observe(g.get("sql_time", 0.0))
+    return response
+
+
+def require_allowed_network() -> None:
+    """Respond with 404 to clients outside of METRICS_ALLOWED_NETWORKS, so internal
+    endpoints are not revealed to them"""
+
+    address = ip_address(request.remote_addr or "0.0.0.0")
+    if not any(
+        address in ip_network(network)
+        for network in current_app.config["METRICS_ALLOWED_NETWORKS"]
+    ):
+        abort(404)
+
+
+@blueprint.route("/metrics", methods=["GET"])
+def metrics() -> ResponseReturnValue:
+    """Expose collected metrics in Prometheus text format, to allowed networks only"""
+
+    require_allowed_network()
+
+    registry = REGISTRY
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        MultiProcessCollector(registry)
+    return generate_latest(registry), 200, {"Content-Type": CONTENT_TYPE_LATEST}
@@ -0,0 +1,113 @@
+from threading import Lock
+from time import perf_counter
+from typing import Any, Mapping
+
+from flask.typing import ResponseReturnValue
+from sqlalchemy.exc import TimeoutError
+from sqlalchemy.pool import Pool, QueuePool
+
+from app import db
+from app.monitoring import blueprint
+from app.monitoring.metrics import require_allowed_network
+
+
+class PoolStatistics:
+    """Counters of connection checkouts from the pool of a worker process"""
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record_checkout(self, wait: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.timeouts += timed_out
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+
+    def snapshot(self, pool: Pool) -> dict[str, Any]:
+        """Collect current state of the pool together with checkout counters
+
+        Args:
+            pool (Pool): pool of the engine
+
+        Returns:
+            dict[str, Any]: pool statistics
+        """
+        with self._lock:
+            statistics = {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": round(self.wait_total, 6),
+                "wait_seconds_max": round(self.wait_max, 6),
+            }
+        if isinstance(pool, QueuePool):
+            statistics.update(
+                size=pool.size(),
+                checked_out=pool.checkedout(),
+                checked_in=pool.checkedin(),
+                overflow=max(pool.overflow(), 0),
+                max_overflow=pool._max_overflow,
+            )
+        return statistics
+
+
+pool_statistics = PoolStatistics()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool measuring how long requests wait to obtain a connection"""
+
+    def _do_get(self) -> Any:
+        start = perf_counter()
+        try:
+            connection = super()._do_get()
+        except TimeoutError:
+            pool_statistics.record_checkout(perf_counter() - start, timed_out=True)
+            raise
+        pool_statistics.record_checkout(perf_counter() - start)
+        return connection
+
+
+def engine_options(config: Mapping[str, Any]) -> dict[str, Any]:
+    """Build engine options from DB_* configuration values
+
+    In PgBouncer mode, the connection health and lifetime are managed by PgBouncer,
+    so pre-ping and recycling are disabled and only connections to PgBouncer are
+    pooled. Server-side prepared statements, which break in transaction pooling
+    mode, are disabled for drivers which use them.
+
+    Args:
+        config (Mapping[str, Any]): application config
+
+    Returns:
+        dict[str, Any]: options passed to `create_engine`
+    """
+    options: dict[str, Any] = {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": config["DB_POOL_SIZE"],
+        "max_overflow": config["DB_MAX_OVERFLOW"],
+        "pool_timeout": config["DB_POOL_TIMEOUT"],
+        "pool_recycle": config["DB_POOL_RECYCLE"],
+        "pool_pre_ping": config["DB_POOL_PRE_PING"],
+        "query_cache_size": config["DB_STATEMENT_CACHE_SIZE"],
+        "connect_args": {"connect_timeout": config["DB_CONNECT_TIMEOUT"]},
+    }
+    if config["DB_PGBOUNCER"]:
+        options.update(pool_pre_ping=False, pool_recycle=-1)
+        if config["SQLALCHEMY_DATABASE_URI"].startswith("postgresql+psycopg:"):
+            options["connect_args"]["prepare_threshold"] = None
+        if config["SQLALCHEMY_DATABASE_URI"].startswith("postgresql+asyncpg:"):
+            options["connect_args"]["statement_cache_size"] = 0
+    return options
+
+
+@blueprint.route("/health/pool", methods=["GET"])
+def pool_health() -> ResponseReturnValue:
+    """Report connection pool statistics of the worker, to allowed networks only"""
+
+    require_allowed_network()
+    return pool_statistics.snapshot(db.engine.pool), 200
@@ -0,0 +1,123 @@
+import cProfile
+import sys
+import threading
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from types import FrameType
+
+from flask import Flask, current_app, g, request
+from flask.typing import ResponseReturnValue
+from flask_login import current_user
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+
+PROFILE_HEADER = "X-Wallit-Profile"
+PROFILE_DIR = Path("./logs/profiles")
+
+
+class SamplingProfiler:
+    """Profiler sampling the call stack of a single thread in fixed intervals.
+    Samples are saved as folded stacks, the input format of flamegraph tools."""
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self.samples: Counter[str] = Counter()
+        self._thread_id = threading.get_ident()
+        self._stopped = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, daemon=True)
+
+    def enable(self) -> None:
+        self._sampler.start()
+
+    def disable(self) -> None:
+        self._stopped.set()
+        self._sampler.join()
+
+    def _sample(self) -> None:
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is not None:
+                self.samples[self._fold(frame)] += 1
+
+    @staticmethod
+    def _fold(frame: FrameType | None) -> str:
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+            frame = frame.f_back
+        return ";".join(reversed(stack))
+
+    def dump_stats(self, path: Path) -> None:
+        path.write_text(
+            "".join(f"{stack} {count}\n" for stack, count in self.samples.items())
+        )
+
+
+def profile_token(user_id: int) -> str:
+    """Create a signed value of the profiling header, authorizing a single user"""
+    serializer = URLSafeTimedSerializer(current_app.config["SECRET_KEY"], "profiling")
+    return serializer.dumps(user_id)
+
+
+def _is_profiling_requested() -> bool:
+    if token := request.headers.get(PROFILE_HEADER):
+        serializer = URLSafeTimedSerializer(
+            current_app.config["SECRET_KEY"], "profiling"
+        )
+        try:
+            user_id = serializer.loads(
+                token, max_age=current_app.config["PROFILING_TOKEN_MAX_AGE"]
+            )
+        except BadSignature:
+            return False
+        return current_user.is_authenticated and current_user.id == user_id
+
+    return (
+        "profile" in request.args
+        and current_user.is_authenticated
+        and current_user.id in current_app.config["PROFILING_USER_IDS"]
+    )
+
+
+def start_profiling() -> None:
+    if not _is_profiling_requested():
+        return
+    if current_app.config["PROFILER"] == "sampling":
+        g.profiler = SamplingProfiler(current_app.config["PROFILING_INTERVAL"])
+    else:
+        g.profiler = cProfile.Profile()
+    g.profiler.enable()
+
+
+def save_profile(response: ResponseReturnValue) -> ResponseReturnValue:
+    profiler = g.pop("profiler", None)
+    if profiler is None:
+        return response
+    profiler.disable()
+
+    # cProfile output is read by pstats-based viewers, e.g. snakeviz or flameprof
+    suffix = "folded" if isinstance(profiler, SamplingProfiler) else "prof"
+    endpoint = (request.endpoint or "unmatched").replace(".", "_")
+    path = PROFILE_DIR / f"{datetime.now():%Y%m%d_%H%M%S_%f}_{endpoint}.{suffix}"
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    profiler.dump_stats(path)
+    response.headers[PROFILE_HEADER] = path.name
+    return response
+
+
+def discard_profile(error: BaseException | None) -> None:
+    """Stop profiler of a request which failed before its response was created"""
+    if (profiler := g.pop("profiler", None)) is not None:
+        profiler.disable()
+
+
+def init_profiling(app: Flask) -> None:
+    """Register profiling hooks, only if enabled in config, so that
+    requests are not affected at all when profiling is off"""
+
+    if not app.config["PROFILING_ENABLED"]:
+        return
+    app.before_request(start_profiling)
+    app.after_request(save_profile)
+    app.teardown_request(discard_profile)
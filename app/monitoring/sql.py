@@ -0,0 +1,118 @@
+import logging
+import random
+from time import perf_counter
+from typing import Any
+
+from flask import Flask, g, has_request_context
+from flask.typing import ResponseReturnValue
+from sqlalchemy import event
+
+from app import db
+from app.monitoring import blueprint
+
+slow_query_logger = logging.getLogger("wallit.sql.slow")
+
+
+class SQLProfiler:
+    """Instrumentation of SQL statements executed by the engine.
+
+    Statements run within a request are counted and timed per request, and statements
+    taking longer than SLOW_QUERY_THRESHOLD seconds are written to the slow-query log.
+    A sample of slow SELECT statements is logged together with its EXPLAIN ANALYZE plan.
+    """
+
+    def __init__(self) -> None:
+        self._config: dict[str, Any] = {}
+
+    def init_app(self, app: Flask) -> None:
+        self._config = app.config
+        # Statements of all binds are profiled, the read replica included
+        with app.app_context():
+            engines = list(db.engines.values())
+        for engine in engines:
+            event.listen(engine, "before_cursor_execute", self._before_execute)
+            event.listen(engine, "after_cursor_execute", self._after_execute)
+
+    def _before_execute(
+        self,
+        connection: Any,
+        cursor: Any,
+        statement: str,
+        parameters: Any,
+        context: Any,
+        executemany: bool,
+    ) -> None:
+        connection.info.setdefault("query_start", []).append(perf_counter())
+
+    def _after_execute(
+        self,
+        connection: Any,
+        cursor: Any,
+        statement: str,
+        parameters: Any,
+        context: Any,
+        executemany: bool,
+    ) -> None:
+        duration = perf_counter() - connection.info["query_start"].pop()
+        if has_request_context():
+            g.sql_queries = g.get("sql_queries", 0) + 1
+            g.sql_time = g.get("sql_time", 0.0) + duration
+
+        if duration >= self._config["SLOW_QUERY_THRESHOLD"]:
+            plan = None
+            if (
+                not executemany
+                and statement.lstrip()[:6].upper() == "SELECT"
+                and random.random() < self._config["SLOW_QUERY_EXPLAIN_RATE"]
+            ):
+                plan = self._explain(connection, statement, parameters)
+            self._log_slow_query(statement, parameters, duration, plan)
+
+    def _explain(self, connection: Any, statement: str, parameters: Any) -> str | None:
+        """Get execution plan of a statement, by executing it once more.
+        A separate DBAPI cursor is used, so that the results of the original
+        statement are preserved and no engine events are triggered. The savepoint
+        keeps the transaction usable if EXPLAIN fails."""
+
+        with connection.connection.cursor() as cursor:
+            cursor.execute("SAVEPOINT explain_slow_query")
+            try:
+                cursor.execute(f"EXPLAIN ANALYZE {statement}", parameters)
+                plan = "\n".join(row[0] for row in cursor.fetchall())
+                cursor.execute("RELEASE SAVEPOINT explain_slow_query")
+                return plan
+            except Exception as e:
+                cursor.execute("ROLLBACK TO SAVEPOINT explain_slow_query")
+                return f"EXPLAIN failed: {e}"
+
+    def _log_slow_query(
+        self, statement: str, parameters: Any, duration: float, plan: str | None
+    ) -> None:
+        message = f"{duration * 1000:.1f} ms\n{statement}\nparameters: {parameters!r}"
+        if plan:
+            message += f"\nplan:\n{plan}"
+        slow_query_logger.warning(message)
+
+
+sql_profiler = SQLProfiler()
+
+
+@blueprint.before_app_request
+def start_profiling() -> None:
+    g.request_start = perf_counter()
+    g.sql_queries = 0
+    g.sql_time = 0.0
+
+
+@blueprint.after_app_request
+def add_server_timing(response: ResponseReturnValue) -> ResponseReturnValue:
+    """Expose the number and duration of SQL statements in the Server-Timing header"""
+
+    if "request_start" not in g:
+        return response
+    total = (perf_counter() - g.request_start) * 1000
+    response.headers["Server-Timing"] = (
+        f'db;desc="{g.sql_queries} queries";dur={g.sql_time * 1000:.1f}, '
+        f"total;dur={total:.1f}"
+    )
+    return response
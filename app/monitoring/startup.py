@@ -0,0 +1,78 @@
+import json
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+# Line written by `python -X importtime`, self and cumulative times are in microseconds
+IMPORT_TIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s+)(\S+)$")
+# Script measuring import of the app in a fresh interpreter
+STARTUP_SCRIPT = """
+import json, time
+start = time.perf_counter()
+import wallit
+total = time.perf_counter() - start
+print(json.dumps({"total": total, "phases": wallit.app.extensions["startup"]}))
+"""
+
+
+class StartupTimer:
+    """Durations of phases of the app initialization, in seconds.
+    Phases include imports made during them."""
+
+    def __init__(self) -> None:
+        self.phases: dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = time.perf_counter() - start
+
+
+def module_group(module: str) -> str:
+    """Group modules of the app by subpackage and other modules by top-level package"""
+    parts = module.split(".")
+    return ".".join(parts[:2]) if parts[0] == "app" else parts[0]
+
+
+def parse_import_times(output: str) -> dict[str, float]:
+    """Sum self import times of modules by their group
+
+    Args:
+        output (str): stderr of a `python -X importtime` run
+
+    Returns:
+        dict[str, float]: import time of each group, in seconds
+    """
+    groups: dict[str, float] = defaultdict(float)
+    for line in output.splitlines():
+        if match := IMPORT_TIME_LINE.match(line):
+            groups[module_group(match[4])] += int(match[1]) / 1_000_000
+    return dict(groups)
+
+
+def measure_startup() -> dict[str, Any]:
+    """Start the app in a fresh interpreter and measure its startup
+
+    Returns:
+        dict[str, Any]: `process` time of the whole interpreter run, `total` time
+        of importing the app, which creates it, durations of initialization `phases`
+        and `imports` times by group of modules, all in seconds
+    """
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", STARTUP_SCRIPT],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    report = json.loads(result.stdout.splitlines()[-1])
+    report["process"] = time.perf_counter() - start
+    report["imports"] = parse_import_times(result.stderr)
+    return report
@@ -0,0 +1,123 @@
+"""Range partitioning of the transactions table by year of the transaction date.
+
+Every year has its own partition, so queries filtered by dates only scan partitions
+of the queried years, and indexes and vacuum work on partitions of bounded size.
+Rows of years without a partition go to the default partition, inserts therefore
+never fail. `ensure_partitions` creates partitions of upcoming years ahead of time
+and moves rows of the default partition into partitions of their years.
+"""
+import re
+from datetime import date
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+PARTITIONED_TABLE = "transactions"
+DEFAULT_PARTITION = "transactions_default"
+PARTITION_NAME = re.compile(r"^transactions_y(\d{4})$")
+
+
+def partition_name(year: int) -> str:
+    return f"transactions_y{year}"
+
+
+def year_partitions(connection: Connection) -> set[int]:
+    """Get years which already have a partition
+
+    Args:
+        connection (Connection): database connection
+
+    Returns:
+        set[int]: years of existing partitions
+    """
+    names = connection.execute(
+        text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE parent.relname = :table"
+        ),
+        {"table": PARTITIONED_TABLE},
+    ).scalars()
+    return {int(match[1]) for name in names if (match := PARTITION_NAME.match(name))}
+
+
+def create_default_partition(connection: Connection) -> None:
+    connection.execute(
+        text(
+            f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} "
+            f"PARTITION OF {PARTITIONED_TABLE} DEFAULT"
+        )
+    )
+
+
+def create_partition(connection: Connection, year: int) -> None:
+    """Create partition of a year, moving rows of the year from the default partition.
+    The partition is filled before it is attached, as a partition cannot be attached
+    while the default partition has rows belonging to it.
+
+    Args:
+        connection (Connection): database connection
+        year (int): year of the partition
+    """
+    name = partition_name(year)
+    start, end = f"'{year}-01-01'", f"'{year + 1}-01-01'"
+    connection.execute(
+        text(
+            f"CREATE TABLE {name} "
+            f"(LIKE {PARTITIONED_TABLE} INCLUDING DEFAULTS INCLUDING GENERATED)"
+        )
+    )
+    # Generated columns cannot be inserted, they are computed again
+    columns = ", ".join(
+        connection.execute(
+            text(
+                "SELECT column_name FROM information_schema.columns "
+                "WHERE table_name = :table AND is_generated = 'NEVER' "
+                "ORDER BY ordinal_position"
+            ),
+            {"table": PARTITIONED_TABLE},
+        ).scalars()
+    )
+    connection.execute(
+        text(
+            f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+            f"WHERE transaction_date >= {start} AND transaction_date < {end} "
+            f"RETURNING {columns}) INSERT INTO {name} ({columns}) "
+            f"SELECT {columns} FROM moved"
+        )
+    )
+    connection.execute(
+        text(
+            f"ALTER TABLE {PARTITIONED_TABLE} ATTACH PARTITION {name} "
+            f"FOR VALUES FROM ({start}) TO ({end})"
+        )
+    )
+
+
+def ensure_partitions(connection: Connection, years_ahead: int) -> list[str]:
+    """Create missing partitions of the current and upcoming years, and of years
+    which have rows in the default partition
+
+    Args:
+        connection (Connection): database connection
+        years_ahead (int): number of years after the current one to create
+        partitions for
+
+    Returns:
+        list[str]: names of created partitions
+    """
+    current = date.today().year
+    years = set(range(current, current + years_ahead + 1))
+    years.update(
+        connection.execute(
+            text(
+                "SELECT DISTINCT CAST(EXTRACT(YEAR FROM transaction_date) AS INTEGER) "
+                f"FROM {DEFAULT_PARTITION}"
+            )
+        ).scalars()
+    )
+    missing = sorted(years - year_partitions(connection))
+    for year in missing:
+        create_partition(connection, year)
+    return [partition_name(year) for year in missing]
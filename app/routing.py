@@ -0,0 +1,29 @@
+from typing import Any
+
+from flask import g, has_request_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy.engine import Connection, Engine
+
+# Name of the bind in SQLALCHEMY_BINDS with the read replica of the database
+REPLICA_BIND = "replica"
+
+
+class RoutingSession(Session):
+    """Session sending statements of requests marked with `g.use_replica` to the read
+    replica. Flushes, and therefore all ORM writes, always go to the primary."""
+
+    def get_bind(
+        self,
+        mapper: Any | None = None,
+        clause: Any | None = None,
+        bind: Engine | Connection | None = None,
+        **kwargs: Any,
+    ) -> Engine | Connection:
+        if (
+            bind is None
+            and not self._flushing
+            and has_request_context()
+            and g.get("use_replica", False)
+        ):
+            return self._db.engines[REPLICA_BIND]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
@@ -100,8 +100,9 @@ export const categoryChart = new Chart(categoryChartCell, {
   },
 });
 
-export async function reloadMonthlyChart(chart) {
-  const data = await fetch(`/api/users/${user.user_details.id}/monthly`, {
+export async function reloadMonthlyChart(chart, data) {
+  // Data loaded with the dashboard is used as is
+  data ??= await fetch(`/api/users/${user.user_details.id}/monthly`, {
     method: "GET",
     mode: "cors",
     credentials: "same-origin",
@@ -16,6 +16,7 @@ import {
   addCategory,
   modifyCategory,
   deleteCategory,
+  syncTransactions,
 } from "./utils.js";
 import "./settings.js";
 
@@ -245,6 +246,10 @@ uploadSubmit.addEventListener("click", async function uploadStatements() {
     .then((data) => data);
 
   showUploadModal(responseStatus, uploadResults);
+  // Imported transactions are added to the loaded ones
+  await syncTransactions();
+  reloadTable(transactionsTable);
+  reloadCategoryChart(categoryChart);
 });
 
 const addTransactionForm = document.getElementsByName("create_transaction")[0];
@@ -325,37 +330,6 @@ deleteCategoriesForm.addEventListener("submit", async (event) => {
   reloadCategoryChart(categoryChart);
 });
 
-async function updateSessionEntities() {
-  // Fetch filter data based on user's transactions from server
-  const entities = await fetch("/api/entities", {
-    method: "GET", // *GET, POST, PUT, DELETE, etc.
-    headers: {
-      "X-CSRFToken": document.getElementsByName("csrf-token")[0].content,
-    },
-  }).then((response) => {
-    if (!response.ok) throw new Error(`HTTP error! Status: ${response.status}`);
-    return response.json();
-  });
-
-  // Save entities into a global variable
-  Object.assign(session, entities);
-}
-
-async function updateUserEntities() {
-  // Fetch filter data based on user's transactions from server
-  const entities = await fetch(`/api/user/entities`, {
-    method: "GET", // *GET, POST, PUT, DELETE, etc.
-    headers: {
-      "X-CSRFToken": document.getElementsByName("csrf-token")[0].content,
-    },
-  }).then((response) => {
-    if (!response.ok) throw new Error(`HTTP error! Status: ${response.status}`);
-    return response.json();
-  });
-
-  Object.assign(user, entities);
-}
-
 function showUploadModal(responseStatus, uploadResults) {
   const backgroundDim = document.getElementsByClassName("dim-background")[0];
   backgroundDim.classList.remove("inactive");
@@ -440,11 +414,53 @@ function logOut() {
   sessionStorage.clear();
 }
 
+async function loadBootstrap() {
+  // Data inlined into the page by the server spares a request
+  const inlined = document.getElementById("bootstrap");
+  if (inlined) return JSON.parse(inlined.textContent);
+
+  return await fetch("/api/bootstrap", {
+    method: "GET",
+    headers: {
+      "X-CSRFToken": document.getElementsByName("csrf-token")[0].content,
+    },
+  }).then((response) => {
+    if (!response.ok) throw new Error(`HTTP error! Status: ${response.status}`);
+    return response.json();
+  });
+}
+
+async function loadAllTransactions() {
+  return await fetch("/api/transactions", {
+    method: "GET",
+    headers: {
+      "X-CSRFToken": document.getElementsByName("csrf-token")[0].content,
+    },
+  }).then((response) => {
+    if (!response.ok) throw new Error(`HTTP error! Status: ${response.status}`);
+    return response.json();
+  });
+}
+
 window.addEventListener("load", async () => {
-  await updateUserEntities();
-  await updateSessionEntities();
-  reloadMonthlyChart(monthlyChart);
+  const bootstrap = await loadBootstrap();
+  Object.assign(session, bootstrap.session);
+  Object.assign(user, bootstrap.user);
+  user.transactions = bootstrap.transactions;
+  user.syncCursor = bootstrap.cursor;
+
+  reloadMonthlyChart(monthlyChart, bootstrap.monthly);
   reloadForms();
+  reloadTable(transactionsTable);
+  reloadCategoryChart(categoryChart);
+
+  // Only the most recent transactions came with the dashboard, the table and
+  // the category chart are rebuilt from all of them
+  if (bootstrap.truncated) {
+    user.transactions = (await loadAllTransactions()).transactions;
+    reloadTable(transactionsTable);
+    reloadCategoryChart(categoryChart);
+  }
 });
 
 window.addEventListener("beforeunload", () => {});
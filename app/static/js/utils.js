@@ -20,6 +20,37 @@ export async function deleteTransaction(id) {
   user.deletedTransactions.push(user.transactions.splice(deletedId, 1)[0]);
 }
 
+export async function syncTransactions() {
+  // Fetch only transactions changed since the last sync
+  const url = new URLSearchParams();
+  if (user.syncCursor) url.set("since", user.syncCursor);
+
+  const changes = await fetch("/api/transactions/changes?" + url.toString(), {
+    method: "GET",
+    headers: {
+      "X-CSRFToken": document.getElementsByName("csrf-token")[0].content,
+    },
+  }).then((response) => {
+    if (!response.ok) throw new Error(`HTTP error! Status: ${response.status}`);
+    return response.json();
+  });
+
+  if (changes.reset) {
+    user.transactions = changes.transactions;
+  } else {
+    const replacedIds = new Set(changes.deleted);
+    changes.transactions.forEach((transaction) =>
+      replacedIds.add(transaction.id)
+    );
+    user.transactions = changes.transactions.concat(
+      user.transactions.filter(
+        (transaction) => !replacedIds.has(transaction.id)
+      )
+    );
+  }
+  user.syncCursor = changes.cursor;
+}
+
 export async function addTransaction(transaction) {
   const newTransaction = await fetch("/api/transactions/add", {
     method: "POST",
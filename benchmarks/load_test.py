@@ -0,0 +1,394 @@
+"""Load test of the API, replaying front-end call sequences from a synthetic population
+
+Users with generated ledgers are seeded into the database configured by DATABASE_URL
+(which has to be migrated), the app is started under gunicorn, unless --url is given,
+and concurrent virtual users run weighted scenarios for a given duration. Throughput,
+latency percentiles and DB query counts (read from the Server-Timing header) are
+reported for each request of each scenario.
+
+Usage:
+    python -m benchmarks.load_test [--users N] [--transactions N] [--concurrency N]
+        [--duration SECONDS] [--workers N] [--url URL] [--skip-seed] [--json FILE]
+"""
+import argparse
+import json
+import os
+import random
+import re
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from http.cookiejar import CookieJar
+from pathlib import Path
+from typing import Any, Callable
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlencode
+from urllib.request import HTTPCookieProcessor, Request, build_opener
+
+from sqlalchemy import insert
+from werkzeug.security import generate_password_hash
+
+from app import create_app, db
+from app.dev.generators import revolut_statement
+from app.dev.seed import delete_users, ensure_reference_data
+from app.models import Bank, Category, Transaction, User
+
+USERNAME_PREFIX = "loadtest"
+PASSWORD = "loadtest"
+CATEGORIES = ["groceries", "restaurants", "rent", "salary", "travel", "transport"]
+
+
+def seed(users: int, transactions: int) -> None:
+    """Replace previously seeded users with new ones holding generated ledgers
+
+    Args:
+        users (int): number of users
+        transactions (int): number of transactions of each user
+    """
+    app = create_app()
+    with app.app_context():
+        # Only users named by the harness, i.e. the prefix followed by a number
+        delete_users(USERNAME_PREFIX)
+        # Uploaded statements are converted with rates of 2022
+        ensure_reference_data()
+        bank_ids = [bank.id for bank in Bank.query.all()]
+
+        # Hashing is slow on purpose, so all users share a single password hash
+        password_hash = generate_password_hash(PASSWORD)
+        user_ids = db.session.scalars(
+            insert(User)
+            .values(
+                [
+                    dict(
+                        username=f"{USERNAME_PREFIX}{i}",
+                        email=f"{USERNAME_PREFIX}{i}@example.com",
+                        password_hash=password_hash,
+                        main_currency="CZK",
+                    )
+                    for i in range(users)
+                ]
+            )
+            .returning(User.id)
+        ).all()
+
+        random.seed(users)
+        start = datetime.now() - timedelta(days=3 * 365)
+        for user_id in user_ids:
+            category_ids = db.session.scalars(
+                insert(Category)
+                .values([dict(name=name, user_id=user_id) for name in CATEGORIES])
+                .returning(Category.id)
+            ).all()
+            rows = []
+            for _ in range(transactions):
+                amount = round(random.lognormvariate(6, 1.2), 2)
+                amount = amount if random.random() < 0.1 else -amount
+                rows.append(
+                    dict(
+                        user_id=user_id,
+                        info=random.choice(["CARD_PAYMENT", "TRANSFER", "TOPUP"]),
+                        title=f"Merchant {random.randrange(200)}",
+                        base_amount=amount,
+                        base_currency="CZK",
+                        main_amount=amount,
+                        transaction_date=start
+                        + timedelta(seconds=random.randrange(3 * 365 * 24 * 3600)),
+                        bank_id=random.choice(bank_ids),
+                        category_id=random.choice([*category_ids, None]),
+                    )
+                )
+            if rows:
+                db.session.execute(insert(Transaction), rows)
+        db.session.commit()
+        print(f"Seeded {users} users with {transactions} transactions each")
+
+
+@dataclass
+class Sample:
+    latency: float
+    status: int
+    queries: int | None
+
+
+@dataclass
+class Results:
+    samples: dict[str, list[Sample]] = field(default_factory=lambda: defaultdict(list))
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def add(self, name: str, sample: Sample) -> None:
+        with self.lock:
+            self.samples[name].append(sample)
+
+    def summary(self, duration: float) -> dict[str, dict[str, Any]]:
+        summary = {}
+        for name, samples in sorted(self.samples.items()):
+            latencies = sorted(sample.latency * 1000 for sample in samples)
+            percentiles = (
+                statistics.quantiles(latencies, n=100, method="inclusive")
+                if len(latencies) > 1
+                else latencies * 99
+            )
+            queries = [
+                sample.queries for sample in samples if sample.queries is not None
+            ]
+            summary[name] = {
+                "requests": len(samples),
+                "errors": sum(sample.status >= 400 for sample in samples),
+                "throughput": round(len(samples) / duration, 2),
+                "p50_ms": round(percentiles[49], 1),
+                "p95_ms": round(percentiles[94], 1),
+                "p99_ms": round(percentiles[98], 1),
+                "queries": round(statistics.mean(queries), 1) if queries else None,
+            }
+        return summary
+
+
+class VirtualUser:
+    """Client with its own session, sending requests like the front-end does"""
+
+    def __init__(self, base_url: str, username: str, results: Results) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.username = username
+        self.results = results
+        self.opener = build_opener(HTTPCookieProcessor(CookieJar()))
+        self.csrf_token = ""
+        self.user_id: int | None = None
+        self.transaction_ids: list[int] = []
+        # Own generator, as statement generation reseeds the global one
+        self.random = random.Random()
+
+    def request(
+        self,
+        name: str,
+        method: str,
+        path: str,
+        data: bytes | None = None,
+        headers: dict[str, str] | None = None,
+    ) -> Any:
+        request = Request(
+            self.base_url + path,
+            data=data,
+            method=method,
+            headers={"X-CSRFToken": self.csrf_token, **(headers or {})},
+        )
+        start = time.perf_counter()
+        try:
+            with self.opener.open(request) as response:
+                status, body = response.status, response.read()
+                server_timing = response.headers.get("Server-Timing", "")
+        except HTTPError as error:
+            status, body = error.code, error.read()
+            server_timing = error.headers.get("Server-Timing", "")
+        latency = time.perf_counter() - start
+
+        match = re.search(r'db;desc="(\d+) queries"', server_timing)
+        self.results.add(
+            name, Sample(latency, status, int(match[1]) if match else None)
+        )
+        if body[:1] in (b"{", b"["):
+            return json.loads(body)
+        return body.decode()
+
+    def json(self, name: str, method: str, path: str, payload: Any) -> Any:
+        return self.request(
+            name,
+            method,
+            path,
+            json.dumps(payload).encode(),
+            {"Content-Type": "application/json"},
+        )
+
+    def login(self) -> None:
+        page = self.request("login GET /welcome", "GET", "/welcome")
+        self.csrf_token = re.search(
+            r'name="csrf_token" type="hidden" value="([^"]+)"', page
+        )[1]
+        form = urlencode(
+            dict(csrf_token=self.csrf_token, username=self.username, password=PASSWORD)
+        ).encode()
+        self.request("login POST /login", "POST", "/login", form)
+        page = self.request("login GET /", "GET", "/")
+        self.csrf_token = re.search(r'name="csrf-token" content="([^"]+)"', page)[1]
+
+    def dashboard(self) -> None:
+        # Same sequence as index.js, data is inlined into the page with
+        # BOOTSTRAP_INLINE, otherwise it is fetched right after the page loads
+        page = self.request("dashboard GET /", "GET", "/")
+        inlined = re.search(
+            r'<script id="bootstrap" type="application/json">(.*?)</script>',
+            page,
+            re.DOTALL,
+        )
+        if inlined:
+            bootstrap = json.loads(inlined[1])
+        else:
+            bootstrap = self.request(
+                "dashboard GET /api/bootstrap", "GET", "/api/bootstrap"
+            )
+        self.user_id = bootstrap["user"]["user_details"]["id"]
+        transactions = bootstrap["transactions"]
+        if bootstrap["truncated"]:
+            transactions = self.request(
+                "dashboard GET /api/transactions", "GET", "/api/transactions"
+            )["transactions"]
+        self.transaction_ids = [t["id"] for t in transactions]
+
+    def filter(self) -> None:
+        filters = dict(
+            date_min=(
+                datetime.now() - timedelta(days=self.random.randrange(30, 720))
+            ).strftime("%Y-%m-%d"),
+            base_currency="CZK,EUR",
+            amount_max=self.random.choice([-100, 0, 1000]),
+        )
+        self.request(
+            "filter GET /api/transactions",
+            "GET",
+            f"/api/transactions?{urlencode(filters)}",
+        )
+
+    def monthly(self) -> None:
+        self.request(
+            "monthly GET /api/users/<id>/monthly",
+            "GET",
+            f"/api/users/{self.user_id}/monthly",
+        )
+
+    def modify(self) -> None:
+        if not self.transaction_ids:
+            return
+        id = self.random.choice(self.transaction_ids)
+        self.json(
+            "modify PATCH /api/transactions/<id>/modify",
+            "PATCH",
+            f"/api/transactions/{id}/modify",
+            dict(title=f"Merchant {self.random.randrange(200)}"),
+        )
+
+    def upload(self) -> None:
+        boundary = uuid.uuid4().hex
+        body = (
+            f"--{boundary}\r\n"
+            'Content-Disposition: form-data; name="revolut"; filename="statement.csv"\r\n'
+            "Content-Type: text/csv\r\n\r\n"
+        ).encode()
+        body += (
+            revolut_statement(50, seed=self.random.randrange(1000), days=120)
+            + f"\r\n--{boundary}--\r\n".encode()
+        )
+        self.request(
+            "upload POST /api/transactions/upload",
+            "POST",
+            "/api/transactions/upload",
+            body,
+            {"Content-Type": f"multipart/form-data; boundary={boundary}"},
+        )
+
+
+SCENARIOS: dict[str, tuple[Callable[[VirtualUser], None], int]] = {
+    "dashboard": (VirtualUser.dashboard, 5),
+    "filter": (VirtualUser.filter, 3),
+    "monthly": (VirtualUser.monthly, 2),
+    "modify": (VirtualUser.modify, 2),
+    "upload": (VirtualUser.upload, 1),
+}
+
+
+def run_user(user: VirtualUser, deadline: float) -> None:
+    scenarios, weights = zip(*SCENARIOS.values())
+    try:
+        user.login()
+        user.dashboard()
+        while time.monotonic() < deadline:
+            user.random.choices(scenarios, weights)[0](user)
+    except (URLError, ConnectionError) as error:
+        print(f"{user.username}: {error}", file=sys.stderr)
+
+
+def start_server(port: int, workers: int) -> subprocess.Popen:
+    """Start the app under gunicorn and wait until it responds"""
+
+    server = subprocess.Popen(
+        ["gunicorn", "-w", str(workers), "-b", f"127.0.0.1:{port}", "wallit:app"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        env=os.environ,
+    )
+    for _ in range(60):
+        try:
+            build_opener().open(f"http://127.0.0.1:{port}/health")
+            return server
+        except (URLError, ConnectionError):
+            time.sleep(0.5)
+    server.terminate()
+    sys.exit("Server did not start")
+
+
+def print_summary(summary: dict[str, dict[str, Any]]) -> None:
+    columns = [
+        "requests",
+        "errors",
+        "throughput",
+        "p50_ms",
+        "p95_ms",
+        "p99_ms",
+        "queries",
+    ]
+    print(f"{'request':<48}" + "".join(f"{column:>12}" for column in columns))
+    for name, values in summary.items():
+        print(f"{name:<48}" + "".join(f"{str(values[c]):>12}" for c in columns))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--transactions", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--url", help="URL of a running app, not started if given")
+    parser.add_argument("--skip-seed", action="store_true")
+    parser.add_argument("--json", type=Path, help="file to write results into")
+    args = parser.parse_args()
+
+    if not args.skip_seed:
+        seed(args.users, args.transactions)
+    server = None if args.url else start_server(args.port, args.workers)
+    base_url = args.url or f"http://127.0.0.1:{args.port}"
+
+    results = Results()
+    start = time.monotonic()
+    deadline = start + args.duration
+    threads = [
+        threading.Thread(
+            target=run_user,
+            args=(
+                VirtualUser(base_url, f"{USERNAME_PREFIX}{i % args.users}", results),
+                deadline,
+            ),
+        )
+        for i in range(args.concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if server:
+        server.terminate()
+        server.wait()
+
+    summary = results.summary(time.monotonic() - start)
+    print_summary(summary)
+    if args.json:
+        args.json.write_text(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
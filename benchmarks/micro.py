@@ -0,0 +1,246 @@
+"""Micro-benchmarks of importers, currency conversion, serialization and rate loading
+
+Benchmarks run against the database configured by DATABASE_URL, which has to be
+migrated; banks and exchange rates of 2022 are created when missing. Results are
+written as JSON and can be compared with results of a previous run, in which case
+the exit status is 1 if any benchmark got slower by more than the threshold.
+
+Usage:
+    python -m benchmarks.micro [--output FILE] [--compare BASELINE] [--threshold 0.1]
+        [--sizes 1000,10000,100000] [--rounds 5] [--filter PATTERN]
+"""
+import argparse
+import io
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+from flask_login import login_user
+
+from app import create_app, db
+from app.api.imports import import_equabank_statement, import_revolut_statement
+from app.api.schemas import FiltersSchema, TransactionSchema
+from app.dev.generators import equabank_statement, revolut_statement
+from app.dev.seed import ensure_reference_data
+from app.external.exchange_rates import RatesManager
+from app.models import ExchangeRate, Transaction, User
+
+RATES_DIR = Path("deployment/exchange_rates_data")
+# Statement period avoiding days with missing exchange rates in deployment data
+STATEMENT_DAYS = 120
+# Minimal duration of a single round, short benchmarks are looped to reach it
+MIN_ROUND_TIME = 0.2
+
+Benchmark = tuple[str, Callable[[], Any]]
+
+
+def import_benchmarks(sizes: list[int], user: User) -> Iterator[Benchmark]:
+    importers = [
+        ("import_revolut_statement", import_revolut_statement, revolut_statement),
+        ("import_equabank_statement", import_equabank_statement, equabank_statement),
+    ]
+    for name, importer, generate in importers:
+        for size in sizes:
+            statement = generate(size, days=STATEMENT_DAYS)
+
+            def run(
+                importer: Callable = importer, statement: bytes = statement
+            ) -> None:
+                importer(io.BytesIO(statement), user)
+
+            yield f"{name}[{size}]", run
+
+
+def conversion_benchmarks(user: User) -> Iterator[Benchmark]:
+    dates = [datetime(2022, 1, 1) + timedelta(days=day) for day in range(365)]
+    ExchangeRate.preload_rates(dates, ["EUR", "USD", "CZK"])
+
+    def find_rates() -> None:
+        for date in dates:
+            ExchangeRate.find_exchange_rate(date, "EUR", "CZK")
+
+    transactions = [
+        Transaction(
+            base_amount=10.0, base_currency="CZK", transaction_date=date, user=user
+        )
+        for date in dates
+    ]
+    user.transactions.clear()
+    for transaction in transactions:
+        transaction.base_currency = "EUR"
+
+    def convert() -> None:
+        for transaction in transactions:
+            transaction.convert_to_main_amount(user.main_currency)
+
+    yield f"ExchangeRate.find_exchange_rate[{len(dates)}]", find_rates
+    yield f"Transaction.convert_to_main_amount[{len(dates)}]", convert
+
+
+def serialization_benchmarks(user: User) -> Iterator[Benchmark]:
+    schema = TransactionSchema(many=True)
+    items = [
+        dict(
+            info="CARD_PAYMENT",
+            title=f"Merchant {i}",
+            base_amount=-10.5,
+            base_currency="EUR",
+            date="2022-03-01T10:00:00",
+        )
+        for i in range(1000)
+    ]
+    loaded = schema.load(items)
+    transactions = [Transaction(user=user, **data) for data in loaded]
+    user.transactions.clear()
+
+    filters_schema = FiltersSchema()
+    filters = dict(
+        amount_min="-500",
+        amount_max="1000",
+        date_min="2022-01-01",
+        date_max="2022-12-31",
+        base_currency="CZK,EUR,USD",
+        bank="1,2",
+        category="1,2,3",
+    )
+
+    def load_filters() -> None:
+        for _ in range(1000):
+            filters_schema.load(filters)
+
+    yield "TransactionSchema.load[1000]", lambda: schema.load(items)
+    yield "TransactionSchema.dump[1000]", lambda: schema.dump(transactions)
+    yield "FiltersSchema.load[1000]", load_filters
+
+
+def rates_benchmarks() -> Iterator[Benchmark]:
+    for path in sorted(RATES_DIR.glob("*.csv")):
+        yield f"RatesManager.load_from_csv[{path.stem}]", (
+            lambda path=path: RatesManager().load_from_csv(path)
+        )
+
+
+def measure(function: Callable[[], Any], rounds: int) -> dict[str, Any]:
+    """Time a function, looping it so that each round takes at least MIN_ROUND_TIME
+
+    Returns:
+        dict[str, Any]: statistics of a single call, in seconds
+    """
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            function()
+        elapsed = time.perf_counter() - start
+        if elapsed >= MIN_ROUND_TIME:
+            break
+        loops *= 10 if elapsed < MIN_ROUND_TIME / 10 else 2
+
+    timings = [elapsed / loops]
+    for _ in range(rounds - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            function()
+        timings.append((time.perf_counter() - start) / loops)
+    return {
+        "median": statistics.median(timings),
+        "min": min(timings),
+        "stdev": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        "rounds": rounds,
+        "loops": loops,
+    }
+
+
+def environment() -> dict[str, str]:
+    commit = subprocess.run(
+        ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True
+    ).stdout.strip()
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "commit": commit,
+        "date": datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+def compare(
+    results: dict[str, dict], baseline: dict[str, dict], threshold: float
+) -> list[str]:
+    """Print relative changes of median times and return names of slowed down benchmarks"""
+
+    slower = []
+    print(f"\n{'benchmark':<58}{'baseline':>12}{'current':>12}{'change':>10}")
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        ratio = result["median"] / baseline[name]["median"]
+        flag = ""
+        if ratio > 1 + threshold:
+            slower.append(name)
+            flag = "  SLOWER"
+        print(
+            f"{name:<58}{baseline[name]['median'] * 1000:>10.2f}ms"
+            f"{result['median'] * 1000:>10.2f}ms{ratio - 1:>+10.1%}{flag}"
+        )
+    return slower
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", type=Path, default=Path("benchmark_results.json"))
+    parser.add_argument("--compare", type=Path, help="results of a previous run")
+    parser.add_argument("--threshold", type=float, default=0.1)
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--filter", default="", help="run benchmarks containing it")
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(",")]
+
+    app = create_app()
+    with app.app_context(), app.test_request_context():
+        ensure_reference_data()
+        user = User.query.filter_by(username="benchmark").first()
+        if user is None:
+            user = User("benchmark", "benchmark@example.com", "benchmark")
+            db.session.add(user)
+            db.session.commit()
+        login_user(user)
+        # Imported transactions are created for a user outside of the session,
+        # so that they are not flushed to the database
+        transient_user = User(
+            "benchmark", "benchmark@example.com", "benchmark", main_currency="CZK"
+        )
+
+        benchmarks = [
+            *import_benchmarks(sizes, transient_user),
+            *conversion_benchmarks(transient_user),
+            *serialization_benchmarks(transient_user),
+            *rates_benchmarks(),
+        ]
+        results = {}
+        for name, function in benchmarks:
+            if args.filter not in name:
+                continue
+            results[name] = measure(function, args.rounds)
+            print(f"{name:<58}{results[name]['median'] * 1000:>10.2f}ms")
+
+    args.output.write_text(
+        json.dumps({"environment": environment(), "results": results}, indent=2)
+    )
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())["results"]
+        if slower := compare(results, baseline, args.threshold):
+            print(
+                f"\n{len(slower)} benchmark(s) slower by more than {args.threshold:.0%}"
+            )
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
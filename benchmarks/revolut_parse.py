@@ -0,0 +1,61 @@
+"""Benchmark of Revolut statement parsing on a synthetic 100k-row file
+
+Usage:
+    python -m benchmarks.revolut_parse [ROWS]
+"""
+import csv
+import io
+import sys
+import time
+from datetime import datetime
+from typing import Callable
+
+from app.api.imports import parse_revolut_columns
+from app.dev.generators import revolut_statement
+
+
+def parse_row_by_row(file: io.BytesIO) -> list[dict]:
+    """Reference implementation of the former row-based parsing"""
+
+    parsed = []
+    with io.TextIOWrapper(file, encoding="utf-8") as csv_file:
+        for row in csv.DictReader(csv_file, delimiter=","):
+            if row["Type"] != "EXCHANGE":
+                parsed.append(
+                    {
+                        "info": row["Type"],
+                        "title": row["Description"],
+                        "base_amount": float(row["Amount"]),
+                        "base_currency": row["Currency"],
+                        "transaction_date": datetime.strptime(
+                            row["Completed Date"], "%Y-%m-%d %H:%M:%S"
+                        ),
+                    }
+                )
+    return parsed
+
+
+def measure(function: Callable, statement: bytes, repeat: int = 5) -> float:
+    """Return the best time of several runs, in seconds"""
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(io.BytesIO(statement))
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main(rows: int) -> None:
+    statement = revolut_statement(rows)
+    row_by_row = measure(parse_row_by_row, statement)
+    columnar = measure(parse_revolut_columns, statement)
+
+    print(f"Parsing synthetic Revolut statement with {rows} rows")
+    print(f"  row-by-row (DictReader + strptime): {row_by_row * 1000:8.1f} ms")
+    print(f"  columnar (parse_revolut_columns):   {columnar * 1000:8.1f} ms")
+    print(f"  speedup: {row_by_row / columnar:.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -3,10 +3,21 @@
 sleep 5
 flask db upgrade
 
-flask rates load ./deployment/exchange_rates_data/exchange_rates_2018-01-01_2018-12-31.csv
-flask rates load ./deployment/exchange_rates_data/exchange_rates_2019-01-01_2019-12-31.csv
-flask rates load ./deployment/exchange_rates_data/exchange_rates_2020-01-01_2020-12-31.csv
-flask rates load ./deployment/exchange_rates_data/exchange_rates_2021-01-01_2021-12-31.csv
-flask rates load ./deployment/exchange_rates_data/exchange_rates_2022-01-01_2022-12-31.csv
+# Single invocation, as each 'flask' call starts the whole app
+flask rates load \
+    ./deployment/exchange_rates_data/exchange_rates_2018-01-01_2018-12-31.csv \
+    ./deployment/exchange_rates_data/exchange_rates_2019-01-01_2019-12-31.csv \
+    ./deployment/exchange_rates_data/exchange_rates_2020-01-01_2020-12-31.csv \
+    ./deployment/exchange_rates_data/exchange_rates_2021-01-01_2021-12-31.csv \
+    ./deployment/exchange_rates_data/exchange_rates_2022-01-01_2022-12-31.csv
+
+# Partitions of transactions for the upcoming year are created on each deploy
+flask partitions ensure
+# Tombstones of deleted transactions are kept only as long as cursors of syncs
+flask tombstones purge
+
+# Metrics of all workers are collected in a shared directory, reset on each start
+export PROMETHEUS_MULTIPROC_DIR=/tmp/wallit_metrics
+rm -rf $PROMETHEUS_MULTIPROC_DIR && mkdir -p $PROMETHEUS_MULTIPROC_DIR
 
 exec gunicorn  -w 2 -b :8080 wallit:app
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from enum import Enum
 from pathlib import Path
 
@@ -13,15 +14,103 @@ class Config:
         "postgres://", "postgresql://"
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Optional read replica, which serves read-only API requests
+    DATABASE_REPLICA_URL = os.environ.get("DATABASE_REPLICA_URL", "").replace(
+        "postgres://", "postgresql://"
+    )
+    SQLALCHEMY_BINDS = {"replica": DATABASE_REPLICA_URL} if DATABASE_REPLICA_URL else {}
+    # Seconds reads of a user go to the primary after a write, to cover replication lag
+    REPLICA_STICKY_SECONDS = int(os.environ.get("REPLICA_STICKY_SECONDS") or "5")
+    # Seconds the replica is not used after it failed
+    REPLICA_RETRY_INTERVAL = 30
+    # Transactions are partitioned by year, partitions are created this many years
+    # ahead by `flask partitions ensure`
+    TRANSACTION_PARTITIONS_AHEAD = 1
+    # Dashboard data is inlined into the rendered page, instead of fetched after load
+    BOOTSTRAP_INLINE = os.environ.get("BOOTSTRAP_INLINE", "").lower() in ("1", "true")
+    # Most recent transactions loaded with the dashboard, if there are more of them,
+    # the dashboard fetches all transactions after its first paint
+    BOOTSTRAP_TRANSACTIONS_LIMIT = 1000
+    # Seconds changes are synced again before a client's cursor, to include changes
+    # committed by transactions which were still running at the time of the cursor
+    SYNC_CURSOR_OVERLAP = 60
+    # Days tombstones of deleted transactions are kept, clients with older cursors
+    # sync all transactions again
+    SYNC_TOMBSTONE_RETENTION = 30
+    # Rows fetched from the database and encoded at once by exports
+    EXPORT_BATCH_SIZE = 5000
+
+    # Connection pool of each worker process, engine options are built from these
+    DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE") or "5")
+    DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW") or "5")
+    DB_POOL_TIMEOUT = 10
+    # Discard connections closed while the database was suspended
+    DB_POOL_PRE_PING = True
+    DB_POOL_RECYCLE = 300
+    DB_CONNECT_TIMEOUT = 5
+    # Size of the cache of compiled SQL statements
+    DB_STATEMENT_CACHE_SIZE = 500
+    # Database is accessed through PgBouncer in transaction pooling mode
+    DB_PGBOUNCER = os.environ.get("DB_PGBOUNCER", "").lower() in ("1", "true")
+    # Delays between probes of an unavailable database grow exponentially up to
+    # the maximum, requests do not retry connections
+    DB_CONNECT_BACKOFF = 0.5
+    DB_CONNECT_BACKOFF_MAX = 8
+    # Seconds clients are asked to wait while the database is unavailable
+    DB_RETRY_AFTER = 10
+    # Statements taking longer (in seconds) are written to logs/slow_queries.log,
+    # a fraction of slow SELECTs is logged with its EXPLAIN ANALYZE plan
+    SLOW_QUERY_THRESHOLD = float(os.environ.get("SLOW_QUERY_THRESHOLD") or "0.2")
+    SLOW_QUERY_EXPLAIN_RATE = 0.1
+    # Networks allowed to read /metrics and /health/pool, incl. fly.io private network
+    METRICS_ALLOWED_NETWORKS = ["127.0.0.0/8", "::1/128", "fdaa::/16"]
+    # Per-request profiling, requested by the signed X-Wallit-Profile header
+    # or by the 'profile' query flag of listed users. Profiles go to logs/profiles
+    PROFILING_ENABLED = os.environ.get("PROFILING_ENABLED", "").lower() in ("1", "true")
+    PROFILER = "cprofile"  # "cprofile" or "sampling"
+    PROFILING_INTERVAL = 0.001
+    PROFILING_TOKEN_MAX_AGE = 3600
+    PROFILING_USER_IDS: set[int] = set()
+    # Import and initialization of the app, reported by 'flask startup report'
+    STARTUP_BUDGET = float(os.environ.get("STARTUP_BUDGET") or "1.5")
+    # Compiled templates are shared by workers and restarts, empty disables it
+    JINJA_BYTECODE_CACHE_DIR = os.environ.get(
+        "JINJA_BYTECODE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "wallit_jinja")
+    )
 
     # File upload configuration
     MAX_CONTENT_LENGTH = 1024 * 1024
+    # Decompression limits for uploaded .zip/.gz statement archives
+    ARCHIVE_MAX_MEMBERS = 100
+    ARCHIVE_MAX_MEMBER_SIZE = 20 * 1024 * 1024
+    ARCHIVE_MAX_TOTAL_SIZE = 100 * 1024 * 1024
+    ARCHIVE_MAX_COMPRESSION_RATIO = 100
     RESET_TOKEN_MINUTES = int(os.environ.get("RESET_TOKEN_MINUTES") or "15")
     LOG_TO_STDOUT = os.environ.get("LOG_TO_STDOUT") or False
+    # Logs are written by a background thread, in batches of up to LOG_BATCH_SIZE
+    # records; records are dropped when LOG_QUEUE_SIZE records are waiting
+    LOG_FORMAT = os.environ.get("LOG_FORMAT") or "text"  # "text" or "json"
+    LOG_MAX_BYTES = 10 * 1024 * 1024
+    LOG_BACKUP_COUNT = 10
+    LOG_QUEUE_SIZE = 10000
+    LOG_BATCH_SIZE = 500
+
+    # Maximum number of items in a single batch request
+    MAX_BATCH_SIZE = 1000
 
-    # Cache config
-    CACHE_TYPE = "SimpleCache"
+    # Cache shared by workers, in files of CACHE_DIR or in Redis at CACHE_REDIS_URL
+    CACHE_REDIS_URL = os.environ.get("CACHE_REDIS_URL")
+    CACHE_TYPE = "app.caching.RedisCache" if CACHE_REDIS_URL else "FileSystemCache"
+    CACHE_DIR = os.environ.get("CACHE_DIR") or os.path.join(
+        tempfile.gettempdir(), "wallit_cache"
+    )
+    CACHE_KEY_PREFIX = "wallit:"
     CACHE_DEFAULT_TIMEOUT = 3600
+    CACHE_THRESHOLD = 50000
+    # Maximum number of immutable values kept in memory of each worker, per namespace
+    LOCAL_CACHE_THRESHOLD = 50000
+    # Lifetime of cached snapshots of authenticated users
+    USER_CACHE_TIMEOUT = 300
 
     # Currency conversion API
     SUPPORTED_CURRENCIES = {
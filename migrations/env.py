@@ -20,6 +20,8 @@ logger = logging.getLogger("alembic.env")
 # from myapp import mymodel
 # target_metadata = mymodel.Base.metadata
 from app import metadata
+from app.models import SEARCH_TRIGRAM_INDEX
+from app.partitioning import DEFAULT_PARTITION, PARTITION_NAME
 
 target_metadata = metadata
 config.set_main_option(
@@ -73,6 +75,17 @@ def run_migrations_online():
                 directives[:] = []
                 logger.info("No changes in schema detected.")
 
+    # partitions of partitioned tables are managed by the app, not by migrations,
+    # the optional trigram index is not declared in models
+    def include_object(object, name, type_, reflected, compare_to):
+        if type_ == "table" and reflected and compare_to is None:
+            return PARTITION_NAME.match(name) is None and name != DEFAULT_PARTITION
+        if type_ == "index" and reflected and compare_to is None:
+            if name == SEARCH_TRIGRAM_INDEX:
+                return False
+            return include_object(object.table, object.table.name, "table", True, None)
+        return True
+
     connectable = current_app.extensions["migrate"].db.get_engine()
 
     with connectable.connect() as connection:
@@ -80,6 +93,7 @@ def run_migrations_online():
             connection=connection,
             target_metadata=target_metadata,
             process_revision_directives=process_revision_directives,
+            include_object=include_object,
             **current_app.extensions["migrate"].configure_args
         )
 
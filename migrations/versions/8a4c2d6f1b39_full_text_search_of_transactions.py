@@ -0,0 +1,57 @@
+"""full-text search of transactions
+
+Revision ID: 8a4c2d6f1b39
+Revises: c3e81f5a9b27
+Create Date: 2026-10-19 18:21:47.119064
+
+"""
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "8a4c2d6f1b39"
+down_revision = "c3e81f5a9b27"
+branch_labels = None
+depends_on = None
+
+SEARCH_DOCUMENT = (
+    "coalesce(info, '') || ' ' || coalesce(title, '') || ' ' || coalesce(place, '')"
+)
+
+
+def upgrade():
+    op.add_column(
+        "transactions",
+        sa.Column(
+            "search_vector",
+            postgresql.TSVECTOR(),
+            sa.Computed(f"to_tsvector('simple', {SEARCH_DOCUMENT})"),
+            nullable=True,
+        ),
+    )
+    op.create_index(
+        "ix_transactions_search_vector",
+        "transactions",
+        ["search_vector"],
+        unique=False,
+        postgresql_using="gin",
+    )
+    # Typo tolerant search is only available with the pg_trgm extension
+    connection = op.get_bind()
+    if connection.execute(
+        sa.text(
+            "SELECT EXISTS (SELECT FROM pg_available_extensions WHERE name = 'pg_trgm')"
+        )
+    ).scalar():
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.execute(
+            "CREATE INDEX ix_transactions_search_trigram ON transactions "
+            f"USING gin (({SEARCH_DOCUMENT}) gin_trgm_ops)"
+        )
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS ix_transactions_search_trigram")
+    op.drop_index("ix_transactions_search_vector", table_name="transactions")
+    op.drop_column("transactions", "search_vector")
@@ -0,0 +1,157 @@
+"""partitioned transactions table
+
+Revision ID: c3e81f5a9b27
+Revises: 5b2e9c7d4a13
+Create Date: 2026-10-19 16:05:12.503127
+
+"""
+from datetime import date
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "c3e81f5a9b27"
+down_revision = "5b2e9c7d4a13"
+branch_labels = None
+depends_on = None
+
+COLUMNS = (
+    "id, info, title, main_amount, base_amount, base_currency, transaction_date, "
+    "creation_date, place, category_id, user_id, bank_id"
+)
+INDEXED_COLUMNS = (
+    "info",
+    "main_amount",
+    "base_amount",
+    "base_currency",
+    "transaction_date",
+    "creation_date",
+    "category_id",
+)
+
+
+def create_transactions_table(partitioned: bool) -> None:
+    # Sequence of ids is taken over from the previous table
+    op.create_table(
+        "transactions",
+        sa.Column(
+            "id",
+            sa.Integer(),
+            server_default=sa.text("nextval('transactions_id_seq'::regclass)"),
+            nullable=False,
+        ),
+        sa.Column("info", sa.Text(), nullable=True),
+        sa.Column("title", sa.Text(), nullable=True),
+        sa.Column("main_amount", sa.Float(), nullable=False),
+        sa.Column("base_amount", sa.Float(), nullable=False),
+        sa.Column("base_currency", sa.String(length=3), nullable=False),
+        sa.Column("transaction_date", sa.DateTime(), nullable=False),
+        sa.Column("creation_date", sa.DateTime(), nullable=False),
+        sa.Column("place", sa.Text(), nullable=True),
+        sa.Column("category_id", sa.Integer(), nullable=True),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("bank_id", sa.Integer(), nullable=True),
+        sa.PrimaryKeyConstraint(
+            *(("id", "transaction_date") if partitioned else ("id",)),
+            name=op.f("pk_transactions"),
+        ),
+        postgresql_partition_by="RANGE (transaction_date)" if partitioned else None,
+    )
+    op.execute("ALTER SEQUENCE transactions_id_seq OWNED BY transactions.id")
+
+
+def create_constraints(partitioned: bool) -> None:
+    # Created after rows are copied, which is faster than maintaining them row by row
+    for column in INDEXED_COLUMNS:
+        op.create_index(
+            op.f(f"ix_transactions_{column}"), "transactions", [column], unique=False
+        )
+    if partitioned:
+        op.create_index(
+            op.f("ix_transactions_user_id_transaction_date"),
+            "transactions",
+            ["user_id", "transaction_date"],
+            unique=False,
+        )
+    op.create_foreign_key(
+        op.f("fk_transactions_bank_id_banks"),
+        "transactions",
+        "banks",
+        ["bank_id"],
+        ["id"],
+    )
+    op.create_foreign_key(
+        op.f("fk_transactions_category_id_categories"),
+        "transactions",
+        "categories",
+        ["category_id"],
+        ["id"],
+    )
+    op.create_foreign_key(
+        op.f("fk_transactions_user_id_users"),
+        "transactions",
+        "users",
+        ["user_id"],
+        ["id"],
+        ondelete="CASCADE",
+    )
+
+
+def create_partitions(years: set[int]) -> None:
+    # DDL is inlined, so that the migration does not change together with the app
+    op.execute("CREATE TABLE transactions_default PARTITION OF transactions DEFAULT")
+    for year in sorted(years):
+        op.execute(
+            f"CREATE TABLE transactions_y{year} PARTITION OF transactions "
+            f"FOR VALUES FROM ('{year}-01-01') TO ('{year + 1}-01-01')"
+        )
+
+
+def rename_previous_table() -> None:
+    # Index names are unique within the schema, so indexes of the previous table
+    # are dropped, they are not needed for copying of rows
+    op.rename_table("transactions", "transactions_previous")
+    for column in INDEXED_COLUMNS:
+        op.execute(f"DROP INDEX IF EXISTS ix_transactions_{column}")
+    op.execute("DROP INDEX IF EXISTS ix_transactions_user_id_transaction_date")
+    op.execute(
+        "ALTER TABLE transactions_previous "
+        "RENAME CONSTRAINT pk_transactions TO pk_transactions_previous"
+    )
+
+
+def copy_previous_rows() -> None:
+    op.execute(
+        f"INSERT INTO transactions ({COLUMNS}) "
+        f"SELECT {COLUMNS} FROM transactions_previous"
+    )
+    op.drop_table("transactions_previous")
+
+
+def upgrade():
+    rename_previous_table()
+    create_transactions_table(partitioned=True)
+    # Partitions of years with rows, of the current and of the next year are created
+    # before rows are copied, so that rows do not go to the default partition
+    years = set(
+        op.get_bind()
+        .execute(
+            sa.text(
+                "SELECT DISTINCT CAST(EXTRACT(YEAR FROM transaction_date) AS INTEGER) "
+                "FROM transactions_previous"
+            )
+        )
+        .scalars()
+    )
+    current = date.today().year
+    create_partitions(years | {current, current + 1})
+    copy_previous_rows()
+    create_constraints(partitioned=True)
+
+
+def downgrade():
+    rename_previous_table()
+    create_transactions_table(partitioned=False)
+    copy_previous_rows()
+    create_constraints(partitioned=False)
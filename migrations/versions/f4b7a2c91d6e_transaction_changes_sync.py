@@ -0,0 +1,71 @@
+"""transaction changes sync
+
+Revision ID: f4b7a2c91d6e
+Revises: 8a4c2d6f1b39
+Create Date: 2026-10-19 21:14:08.305217
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "f4b7a2c91d6e"
+down_revision = "8a4c2d6f1b39"
+branch_labels = None
+depends_on = None
+
+UTC_NOW = "timezone('utc', now())"
+
+
+def upgrade():
+    # Existing rows get the time of the migration, without rewriting the table
+    op.add_column(
+        "transactions",
+        sa.Column(
+            "updated_at",
+            sa.DateTime(),
+            server_default=sa.text(UTC_NOW),
+            nullable=False,
+        ),
+    )
+    op.create_index(
+        "ix_transactions_user_id_updated_at",
+        "transactions",
+        ["user_id", "updated_at"],
+        unique=False,
+    )
+    op.create_table(
+        "transaction_tombstones",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("transaction_id", sa.Integer(), nullable=True),
+        sa.Column(
+            "deleted_at",
+            sa.DateTime(),
+            server_default=sa.text(UTC_NOW),
+            nullable=False,
+        ),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["users.id"],
+            name=op.f("fk_transaction_tombstones_user_id_users"),
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_transaction_tombstones")),
+    )
+    op.create_index(
+        "ix_transaction_tombstones_user_id_deleted_at",
+        "transaction_tombstones",
+        ["user_id", "deleted_at"],
+        unique=False,
+    )
+
+
+def downgrade():
+    op.drop_index(
+        "ix_transaction_tombstones_user_id_deleted_at",
+        table_name="transaction_tombstones",
+    )
+    op.drop_table("transaction_tombstones")
+    op.drop_index("ix_transactions_user_id_updated_at", table_name="transactions")
+    op.drop_column("transactions", "updated_at")
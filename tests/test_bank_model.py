@@ -0,0 +1,46 @@
+from unittest.mock import patch
+
+from flask import Flask
+
+from app import db
+from app.caching import get_version
+from app.models import Bank, MyBanks, bank_registry
+
+
+def test_bank_registry_lookups(bank_1: Bank, bank_2: Bank) -> None:
+    assert [bank.id for bank in bank_registry.all()] == [bank_1.id, bank_2.id]
+    assert bank_registry.get(bank_1.id).name == bank_1.name
+    assert bank_registry.from_name("Equabank").id == bank_2.id
+    assert bank_registry.from_enum(MyBanks.REVOLUT).statement_type == "csv"
+    assert bank_registry.get(99999) is None
+
+
+def test_bank_registry_caching(bank_1: Bank) -> None:
+    bank_registry.all()
+    with patch.object(db.session, "query") as query_mock:
+        bank_registry.get(bank_1.id)
+        bank_registry.from_enum(MyBanks.REVOLUT)
+        assert query_mock.call_count == 0
+
+
+def test_bank_registry_version_per_request(app: Flask, bank_1: Bank) -> None:
+    with app.test_request_context(), patch(
+        "app.models.get_version", wraps=get_version
+    ) as version_mock:
+        for _ in range(100):
+            bank_registry.get(bank_1.id)
+        bank_registry.from_enum(MyBanks.REVOLUT)
+        assert version_mock.call_count == 1
+
+
+def test_bank_registry_invalidation(bank_1: Bank) -> None:
+    assert bank_registry.from_enum(MyBanks.EQUABANK) is None
+
+    bank_2 = Bank(name="Equabank", statement_type="xml", name_enum="equabank")
+    db.session.add(bank_2)
+    db.session.commit()
+    assert bank_registry.from_enum(MyBanks.EQUABANK).id == bank_2.id
+
+    bank_1.name = "Revolut2"
+    db.session.commit()
+    assert bank_registry.get(bank_1.id).name == "Revolut2"
@@ -0,0 +1,119 @@
+from typing import Any, Callable
+
+from flask import Flask
+from prometheus_client import REGISTRY
+
+from app import create_app, db
+from app.caching import CacheNamespace, bump_version, user_scope
+from app.models import CachedUser, User
+from tests.conftest import TestConfig
+
+
+class LocalRedis:
+    """In-memory stand-in of the redis-py client, with commands used by RedisCache.
+    Expiration of keys is ignored."""
+
+    def __init__(self) -> None:
+        self.data: dict[str, bytes] = {}
+
+    def get(self, name: str) -> bytes | None:
+        return self.data.get(name)
+
+    def mget(self, names: list[str]) -> list[bytes | None]:
+        return [self.data.get(name) for name in names]
+
+    def set(self, name: str, value: bytes) -> bool:
+        self.data[name] = value
+        return True
+
+    def setex(self, name: str, time: int, value: bytes) -> bool:
+        return self.set(name, value)
+
+    def setnx(self, name: str, value: bytes) -> bool:
+        return self.data.setdefault(name, value) is value
+
+    def expire(self, name: str, time: int) -> bool:
+        return name in self.data
+
+    def delete(self, *names: str) -> int:
+        return sum(self.data.pop(name, None) is not None for name in names)
+
+    def exists(self, name: str) -> int:
+        return int(name in self.data)
+
+    def pipeline(self, transaction: bool = True) -> "LocalPipeline":
+        return LocalPipeline(self)
+
+
+class LocalPipeline:
+    def __init__(self, client: LocalRedis) -> None:
+        self.client = client
+        self.commands: list[Callable[[], Any]] = []
+
+    def __getattr__(self, name: str) -> Callable[..., None]:
+        command = getattr(self.client, name)
+        return lambda **kwargs: self.commands.append(lambda: command(**kwargs))
+
+    def execute(self) -> list[Any]:
+        return [command() for command in self.commands]
+
+
+def create_worker(client: LocalRedis) -> Flask:
+    """Create an app standing for a worker, which shares the Redis stand-in"""
+
+    class WorkerConfig(TestConfig):
+        CACHE_TYPE = "app.caching.RedisCache"
+        CACHE_REDIS_CLIENT = client
+
+    return create_app(WorkerConfig)
+
+
+def requests(namespace: str, result: str) -> float:
+    labels = {"namespace": namespace, "result": result}
+    return REGISTRY.get_sample_value("wallit_cache_requests_total", labels) or 0
+
+
+def test_namespaces(app: Flask) -> None:
+    client = LocalRedis()
+    values = CacheNamespace("values")
+    user_values = CacheNamespace("user_values", per_user=True)
+    hits, misses = requests("values", "hit"), requests("values", "miss")
+
+    with create_worker(client).app_context():
+        values.set_many({"a": 1, "b": 2})
+        user_values.set("a", 3, user_id=1)
+        assert values.get_many(["a", "b", "c"]) == [1, 2, None]
+        assert user_values.get("a", user_id=1) == 3
+        assert user_values.get("a", user_id=2) is None
+
+    assert requests("values", "hit") == hits + 2
+    assert requests("values", "miss") == misses + 1
+    assert all(key.startswith("wallit:") for key in client.data)
+    assert "wallit:values:a" in client.data
+
+    # Values of a user are invalidated in all workers by bumping the version
+    with create_worker(client).app_context():
+        bump_version(user_scope(1))
+        assert user_values.get("a", user_id=1) is None
+        assert values.get("a") == 1
+
+
+def test_user_invalidated_across_workers(app: Flask, user_1: User) -> None:
+    client = LocalRedis()
+    first_worker, second_worker = create_worker(client), create_worker(client)
+
+    with first_worker.app_context():
+        snapshot = CachedUser.load(user_1.id)
+        assert snapshot and snapshot.username == "username1"
+
+    with second_worker.app_context():
+        cached = CachedUser.load(user_1.id)
+        assert cached and cached.version == snapshot.version
+        user = db.session.get(User, user_1.id)
+        user.username = "renamed"
+        db.session.commit()
+
+    with first_worker.app_context():
+        reloaded = CachedUser.load(user_1.id)
+        assert reloaded and reloaded.username == "renamed"
+        assert reloaded.version != snapshot.version
@@ -0,0 +1,72 @@
+import csv
+import gzip
+import io
+import json
+
+import pytest
+from flask import Flask, url_for
+from flask.testing import FlaskClient
+
+from app.models import Transaction, User
+from tests.conftest import login
+
+
+def test_export_transactions(
+    app: Flask,
+    client: FlaskClient,
+    user_1: User,
+    transaction_1: Transaction,
+    transaction_2: Transaction,
+) -> None:
+    with client:
+        login(user_1, client)
+        response = client.get(url_for("api.export_transactions", fields="id,date"))
+        assert response.status_code == 200
+        assert response.is_streamed
+        assert response.mimetype == "application/gzip"
+        assert "transactions.csv.gz" in response.headers["Content-Disposition"]
+        rows = list(csv.reader(io.StringIO(gzip.decompress(response.data).decode())))
+        assert rows == [
+            ["id", "date"],
+            [str(transaction_1.id), "2001-01-01T01:01:01.000001"],
+        ]
+
+        response = client.get(
+            url_for(
+                "api.export_transactions",
+                format="ndjson",
+                compression="none",
+                fields="id,title",
+            )
+        )
+        assert response.mimetype == "application/x-ndjson"
+        lines = response.data.decode().splitlines()
+        assert [json.loads(line) for line in lines] == [
+            {"id": transaction_1.id, "title": "title1"}
+        ]
+
+        # Filters of /api/transactions are applied
+        response = client.get(
+            url_for(
+                "api.export_transactions",
+                format="ndjson",
+                compression="none",
+                date_min="2002-01-01",
+            )
+        )
+        assert response.data == b""
+        response = client.get(url_for("api.export_transactions", format="xlsx"))
+        assert response.status_code == 400
+
+
+def test_export_parquet(
+    client: FlaskClient, user_1: User, transaction_1: Transaction
+) -> None:
+    pyarrow_parquet = pytest.importorskip("pyarrow.parquet")
+    with client:
+        login(user_1, client)
+        response = client.get(
+            url_for("api.export_transactions", format="parquet", fields="id,amount")
+        )
+        table = pyarrow_parquet.read_table(io.BytesIO(response.data))
+        assert table.to_pylist() == [{"id": transaction_1.id, "amount": 1.0}]
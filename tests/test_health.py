@@ -0,0 +1,115 @@
+from unittest.mock import patch
+
+import pytest
+from flask import Flask, g, url_for
+from flask.testing import FlaskClient
+
+from app import db
+from app.models import User
+from app.monitoring.health import db_monitor
+from app.monitoring.pool import engine_options
+from tests.conftest import login
+
+
+def test_unavailable_database(client: FlaskClient, user_1: User) -> None:
+    with client:
+        login(user_1, client)
+        with patch.object(db_monitor, "_ensure_thread"):
+            db_monitor.mark_unavailable()
+
+        response = client.get(url_for("api.fetch_rules"))
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "10"
+
+        response = client.get(url_for("monitoring.health"))
+        assert response.status_code == 503
+        assert response.json == {"database": "unavailable"}
+
+        # Database is reported available by the monitor after a successful probe
+        assert db_monitor.probe()
+        db_monitor.available = True
+        assert client.get(url_for("api.fetch_rules")).status_code == 200
+
+
+def test_connection_errors(app: Flask) -> None:
+    app.config.update(DB_CONNECT_BACKOFF=0)
+    engine = db.engine
+    connect = engine.dialect.connect
+    attempts = []
+
+    def failing_connect(*args: object, **kwargs: object) -> object:
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise engine.dialect.dbapi.OperationalError("Database is starting up")
+        return connect(*args, **kwargs)
+
+    # Database is marked unavailable on the first failed connection, without retries
+    engine.dispose()
+    with patch.object(db_monitor, "_ensure_thread"), patch.object(
+        engine.dialect, "connect", failing_connect
+    ):
+        assert not db_monitor.probe()
+        assert len(attempts) == 1
+        assert not db_monitor.available
+
+        # Background probing retries until the database responds
+        db_monitor.wait_until_available()
+    assert len(attempts) == 3
+    assert db_monitor.available
+
+
+def test_pool_statistics(client: FlaskClient, user_1: User) -> None:
+    response = client.get(url_for("monitoring.pool_health"))
+    assert response.status_code == 200
+    assert response.json["checkouts"] >= 1
+    assert response.json["size"] == 5
+    assert response.json["checked_out"] >= 0
+
+    response = client.get(
+        url_for("monitoring.pool_health"), environ_base={"REMOTE_ADDR": "203.0.113.1"}
+    )
+    assert response.status_code == 404
+
+
+def test_pgbouncer_options(app: Flask) -> None:
+    config = dict(app.config, DB_PGBOUNCER=True)
+    config["SQLALCHEMY_DATABASE_URI"] = "postgresql+psycopg://localhost/wallit"
+
+    options = engine_options(config)
+    assert not options["pool_pre_ping"]
+    assert options["connect_args"]["prepare_threshold"] is None
+
+
+def test_sql_profiler(
+    app: Flask, client: FlaskClient, user_1: User, caplog: pytest.LogCaptureFixture
+) -> None:
+    app.config.update(SLOW_QUERY_THRESHOLD=0, SLOW_QUERY_EXPLAIN_RATE=1)
+    with client:
+        login(user_1, client)
+        response = client.get(url_for("api.fetch_rules"))
+        assert response.status_code == 200
+        assert 'db;desc="' in response.headers["Server-Timing"]
+        assert g.sql_queries >= 1
+
+    slow_queries = [r.message for r in caplog.records if r.name == "wallit.sql.slow"]
+    assert any("category_rules" in message for message in slow_queries)
+    assert any("plan:" in message for message in slow_queries)
+
+
+def test_metrics(client: FlaskClient, user_1: User) -> None:
+    with client:
+        login(user_1, client)
+        client.get(url_for("api.fetch_rules"))
+
+    response = client.get(url_for("monitoring.metrics"))
+    assert response.status_code == 200
+    assert (
+        'wallit_requests_total{endpoint="/api/rules",method="GET",status="200"}'
+        in response.text
+    )
+    assert "wallit_request_db_seconds_bucket" in response.text
+
+    response = client.get(
+        url_for("monitoring.metrics"), environ_base={"REMOTE_ADDR": "203.0.113.1"}
+    )
+    assert response.status_code == 404
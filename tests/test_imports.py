@@ -0,0 +1,121 @@
+import gzip
+import io
+import zipfile
+from datetime import datetime
+
+import pytest
+from flask import Flask, url_for
+from flask.testing import FlaskClient
+
+from app import db
+from app.api.imports import import_revolut_statement, parse_revolut_columns
+from app.api.utils import iter_archive_members
+from app.exceptions import FileError
+from app.models import Bank, ExchangeRate, User
+from tests.conftest import login
+
+REVOLUT_STATEMENT = (
+    "Type,Product,Started Date,Completed Date,Description,Amount,Fee,Currency,State,Balance\n"
+    "CARD_PAYMENT,Current,2022-01-01 10:00:00,2022-01-02 10:00:00,Shop,-10.5,0,USD,COMPLETED,100\n"
+    "EXCHANGE,Current,2022-01-03 10:00:00,2022-01-03 10:00:00,Exchange,-5,0,USD,COMPLETED,95\n"
+    "TOPUP,Current,2022-01-04 10:00:00,2022-01-04 10:00:00,Salary,200,0,USD,COMPLETED,295\n"
+)
+
+
+def create_zip(members: dict[str, bytes]) -> io.BytesIO:
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w", compression=zipfile.ZIP_DEFLATED) as zip_file:
+        for name, content in members.items():
+            zip_file.writestr(name, content)
+    archive.seek(0)
+    return archive
+
+
+def test_iter_zip_members(app: Flask) -> None:
+    archive = create_zip({"january.csv": b"first", "nested/../february.csv": b"second"})
+
+    members = [
+        (name, stream.read()) for name, stream in iter_archive_members("a.zip", archive)
+    ]
+    assert members == [("january.csv", b"first"), ("february.csv", b"second")]
+
+
+def test_iter_gzip_member(app: Flask) -> None:
+    archive = io.BytesIO(gzip.compress(b"content"))
+
+    members = [
+        (name, stream.read())
+        for name, stream in iter_archive_members("a.csv.gz", archive)
+    ]
+    assert members == [("a.csv", b"content")]
+
+
+def test_decompression_limits(app: Flask) -> None:
+    # Highly compressible member exceeding allowed compression ratio
+    archive = create_zip({"bomb.csv": b"0" * 1024 * 1024})
+    with pytest.raises(FileError):
+        for _, stream in iter_archive_members("a.zip", archive):
+            stream.read()
+
+    # Forged gzip bomb is detected while streaming
+    app.config["ARCHIVE_MAX_MEMBER_SIZE"] = 1024
+    archive = io.BytesIO(gzip.compress(b"0" * 2048))
+    with pytest.raises(FileError):
+        for _, stream in iter_archive_members("a.csv.gz", archive):
+            stream.read()
+
+    app.config["ARCHIVE_MAX_MEMBERS"] = 1
+    archive = create_zip({"first.csv": b"1", "second.csv": b"2"})
+    with pytest.raises(FileError):
+        list(iter_archive_members("a.zip", archive))
+
+
+def test_parse_revolut_columns(app: Flask) -> None:
+    columns = parse_revolut_columns(io.BytesIO(REVOLUT_STATEMENT.encode()))
+
+    assert columns == {
+        "info": ["CARD_PAYMENT", "TOPUP"],
+        "title": ["Shop", "Salary"],
+        "base_amount": [-10.5, 200.0],
+        "base_currency": ["USD", "USD"],
+        "transaction_date": [datetime(2022, 1, 2, 10), datetime(2022, 1, 4, 10)],
+    }
+
+
+def test_import_revolut_statement(user_2: User, bank_1: Bank) -> None:
+    for day in (2, 4):
+        db.session.add(ExchangeRate(date=datetime(2022, 1, day), source="EUR", rate=1))
+        db.session.add(
+            ExchangeRate(date=datetime(2022, 1, day), source="USD", rate=1.25)
+        )
+    db.session.commit()
+
+    rows = import_revolut_statement(io.BytesIO(REVOLUT_STATEMENT.encode()), user_2)
+    assert [row["main_amount"] for row in rows] == [-8.4, 160]
+    assert all(row["bank_id"] == bank_1.id for row in rows)
+    assert all(row["user_id"] == user_2.id for row in rows)
+
+
+def test_upload_archive(client: FlaskClient, user_1: User, bank_1: Bank) -> None:
+    archive = create_zip(
+        {
+            "january.csv": REVOLUT_STATEMENT.encode(),
+            "february.csv": REVOLUT_STATEMENT.encode(),
+            "notes.txt": b"not a statement",
+        }
+    )
+
+    with client:
+        login(user_1, client)
+        response = client.post(
+            url_for("api.upload_statements"),
+            data={"revolut": (archive, "statements.zip")},
+        )
+        assert response.status_code == 206
+        assert response.json["amount"] == 4
+        assert response.json["success"] == {
+            "statements.zip/january.csv": "revolut",
+            "statements.zip/february.csv": "revolut",
+        }
+        assert "statements.zip/notes.txt" in response.json["failed"]
+        assert len(user_1.select_transactions()) == 4
@@ -0,0 +1,43 @@
+import json
+import logging
+from pathlib import Path
+
+from flask import Flask
+
+from app.monitoring.logs import (
+    BatchedRotatingFileHandler,
+    configure_logging,
+    stop_logging,
+)
+
+
+def test_json_logs(app: Flask) -> None:
+    app.config["LOG_FORMAT"] = "json"
+    configure_logging(app)
+    try:
+        raise ValueError("broken")
+    except ValueError:
+        app.logger.exception("Request %s failed", 1)
+    stop_logging()
+
+    entry = json.loads(Path("logs/errors.log").read_text().splitlines()[-1])
+    assert entry["message"] == "Request 1 failed"
+    assert entry["level"] == "ERROR"
+    assert "ValueError: broken" in entry["exception"]
+
+
+def test_batched_rotation(tmp_path: Path) -> None:
+    handler = BatchedRotatingFileHandler(
+        tmp_path / "test.log", maxBytes=100, backupCount=1
+    )
+    records = [
+        logging.makeLogRecord({"msg": f"message {i:02}", "levelno": logging.INFO})
+        for i in range(20)
+    ]
+
+    handler.handle_batch(records[:10])
+    handler.handle_batch(records[10:])
+    handler.close()
+    # Each batch is written as a whole, rotation happens between batches
+    assert (tmp_path / "test.log.1").read_text().count("\n") == 10
+    assert (tmp_path / "test.log").read_text().splitlines()[-1] == "message 19"
@@ -0,0 +1,42 @@
+from datetime import date, datetime
+
+from flask import Flask
+from sqlalchemy import text
+
+from app import db
+from app.models import Transaction, User
+from app.partitioning import ensure_partitions, partition_name
+
+
+def partition_of(transaction: Transaction) -> str:
+    return db.session.execute(
+        text("SELECT tableoid::regclass::text FROM transactions WHERE id = :id"),
+        {"id": transaction.id},
+    ).scalar_one()
+
+
+def test_partitions(
+    app: Flask, user_1: User, transaction_1: Transaction, transaction_2: Transaction
+) -> None:
+    # Transactions of years without a partition are kept in the default partition
+    assert partition_of(transaction_1) == "transactions_default"
+
+    created = ensure_partitions(db.session.connection(), years_ahead=1)
+    db.session.commit()
+    current = date.today().year
+    assert set(created) == {
+        partition_name(year) for year in (2001, 2002, current, current + 1)
+    }
+    assert ensure_partitions(db.session.connection(), years_ahead=1) == []
+    assert partition_of(transaction_1) == "transactions_y2001"
+    assert db.session.get(Transaction, transaction_1.id) is transaction_1
+
+    # Changed date moves the transaction to the partition of its year
+    transaction_1.transaction_date = datetime(2002, 6, 1)
+    db.session.commit()
+    assert partition_of(transaction_1) == "transactions_y2002"
+
+    # Transactions are still deleted together with their user
+    db.session.delete(user_1)
+    db.session.commit()
+    assert db.session.execute(text("SELECT count(*) FROM transactions")).scalar() == 1
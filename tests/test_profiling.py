@@ -0,0 +1,38 @@
+from pathlib import Path
+
+import pytest
+from flask import Flask, url_for
+from flask.testing import FlaskClient
+
+from app.models import User
+from app.monitoring.profiling import PROFILE_HEADER, init_profiling, profile_token
+from tests.conftest import login
+
+
+@pytest.mark.parametrize(
+    "profiler, suffix", [("cprofile", "prof"), ("sampling", "folded")]
+)
+def test_profiled_request(
+    app: Flask, client: FlaskClient, user_1: User, profiler: str, suffix: str
+) -> None:
+    app.config.update(PROFILING_ENABLED=True, PROFILER=profiler)
+    init_profiling(app)
+
+    with client:
+        login(user_1, client)
+        response = client.get(url_for("api.fetch_rules"))
+        assert PROFILE_HEADER not in response.headers
+
+        response = client.get(
+            url_for("api.fetch_rules"),
+            headers={PROFILE_HEADER: profile_token(user_1.id)},
+        )
+        profile = Path("logs/profiles", response.headers[PROFILE_HEADER])
+        assert profile.suffix == f".{suffix}"
+        assert profile.exists()
+
+        # Token of another user does not enable profiling
+        response = client.get(
+            url_for("api.fetch_rules"), headers={PROFILE_HEADER: profile_token(2)}
+        )
+        assert PROFILE_HEADER not in response.headers
@@ -0,0 +1,146 @@
+from unittest.mock import patch
+
+from flask import url_for
+from flask.testing import FlaskClient
+
+from app import db
+from app.api.categorization import AhoCorasick, RuleMatcher, matchers
+from app.models import Category, CategoryRule, Transaction, User
+from tests.conftest import login
+
+
+def test_aho_corasick() -> None:
+    automaton = AhoCorasick([("he", 1), ("she", 2), ("hers", 3), ("xyz", 4)])
+    assert automaton.search("ushers") == {1, 2, 3}
+    assert automaton.search("nothing") == set()
+
+
+def test_rule_matcher() -> None:
+    rules = [
+        CategoryRule(id=1, priority=1, category_id=1, pattern="shop", is_regex=False),
+        CategoryRule(
+            id=2,
+            priority=0,
+            category_id=2,
+            pattern=r"^card\s",
+            is_regex=True,
+            amount_max=0,
+        ),
+        CategoryRule(id=3, priority=5, category_id=3, amount_min=100),
+        CategoryRule(id=4, priority=0, category_id=4, pattern="salary", bank_id=2),
+    ]
+    matcher = RuleMatcher(rules)
+
+    # Rules are evaluated by priority, regardless of their kind
+    assert matcher.match("CARD PAYMENT\nSHOP", -5, None) == 2
+    assert matcher.match("CARD PAYMENT\nSHOP", 5, None) == 1
+    assert matcher.match("TRANSFER", 200, None) == 3
+    assert matcher.match("TRANSFER", 2, None) is None
+    assert matcher.match("SALARY", 50, 2) == 4
+    assert matcher.match("SALARY", 50, 1) is None
+
+
+def test_rule_matcher_overlapping_regexes() -> None:
+    rules = [
+        CategoryRule(
+            id=1, priority=0, category_id=1, pattern="card", is_regex=True, amount_max=0
+        ),
+        CategoryRule(
+            id=2, priority=1, category_id=2, pattern="card", is_regex=True, amount_min=0
+        ),
+        # Stored rules which cannot be compiled are skipped
+        CategoryRule(id=3, priority=2, category_id=3, pattern="(card", is_regex=True),
+        # Regex matching at the same position as an earlier one
+        CategoryRule(
+            id=5, priority=2, category_id=5, pattern=r"card\s+pay", is_regex=True
+        ),
+        # Backreference cannot be joined with other regexes
+        CategoryRule(id=6, priority=2, category_id=6, pattern=r"(o)\1", is_regex=True),
+    ]
+    matcher = RuleMatcher(rules)
+    assert matcher.match("card payment", -5, None) == 1
+    assert matcher.match("card payment", 5, None) == 2
+    assert matcher._find_candidates("card payment") == {0, 1, 3}
+    assert matcher.match("food", 5, None) == 6
+
+    # Regexes valid only on their own are matched without the joined filter
+    rules.append(
+        CategoryRule(id=4, priority=3, category_id=4, pattern="(?i)shop", is_regex=True)
+    )
+    matcher = RuleMatcher(rules)
+    assert matcher.match("card payment", 5, None) == 2
+    assert matcher.match("shop", 5, None) == 4
+
+
+def test_matcher_cache(user_1: User, category_1: Category) -> None:
+    rule = CategoryRule(user=user_1, category=category_1, pattern="lidl")
+    db.session.add(rule)
+    db.session.commit()
+    assert matchers.get(user_1).match("LIDL", 5, None) == category_1.id
+
+    # Warm cache neither queries nor compiles rules
+    with patch.object(CategoryRule, "query") as query_mock, patch(
+        "app.api.categorization.RuleMatcher"
+    ) as matcher_mock:
+        matchers.get(user_1)
+        assert query_mock.filter_by.call_count == 0
+        assert matcher_mock.call_count == 0
+
+    rule.pattern = "tesco"
+    db.session.commit()
+    assert matchers.get(user_1).match("LIDL", 5, None) is None
+    assert matchers.get(user_1).match("TESCO", 5, None) == category_1.id
+
+    db.session.delete(category_1)
+    db.session.commit()
+    assert matchers.get(user_1).match("TESCO", 5, None) is None
+
+
+def test_add_rule(client: FlaskClient, user_1: User, category_1: Category) -> None:
+    with client:
+        login(user_1, client)
+        response = client.post(
+            url_for("api.add_rule"),
+            json=dict(pattern="lidl", category=category_1.id),
+        )
+        assert response.status_code == 201
+        assert response.json["category"] == category_1.id
+
+        # Invalid regular expression
+        response = client.post(
+            url_for("api.add_rule"),
+            json=dict(pattern="(lidl", is_regex=True, category=category_1.id),
+        )
+        assert response.status_code == 400
+
+        # Global flags cannot be embedded into the alternation of all regexes
+        response = client.post(
+            url_for("api.add_rule"),
+            json=dict(pattern="(?i)lidl", is_regex=True, category=category_1.id),
+        )
+        assert response.status_code == 400
+
+        # Rule without any condition
+        response = client.post(
+            url_for("api.add_rule"), json=dict(category=category_1.id)
+        )
+        assert response.status_code == 400
+
+
+def test_apply_rules(
+    client: FlaskClient,
+    user_1: User,
+    category_1: Category,
+    transaction_1: Transaction,
+) -> None:
+    transaction_1.category = None
+    db.session.add(CategoryRule(pattern="INFO1", category=category_1, user=user_1))
+    db.session.commit()
+
+    with client:
+        login(user_1, client)
+        response = client.post(url_for("api.apply_user_rules"), json={})
+        assert response.status_code == 200
+        assert response.json["number_of_categorized"] == 1
+        db.session.refresh(transaction_1)
+        assert transaction_1.category_id == category_1.id
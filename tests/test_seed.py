@@ -0,0 +1,89 @@
+import csv
+import io
+from datetime import date
+from pathlib import Path
+
+import pytest
+from flask import Flask
+
+from app import db
+from app.api.imports import BANK_IMPORT_MAP
+from app.dev.seed import RATES_FILE, delete_users, seed_ledgers
+from app.models import MyBanks, Transaction, User
+
+
+def test_seeded_statements_match_transactions(app: Flask, tmp_path: Path) -> None:
+    # Rates of the first quarter of 2022 for currencies used by generated ledgers
+    rates_file = tmp_path / "rates.csv"
+    with open(RATES_FILE, newline="") as source, open(rates_file, "w") as target:
+        columns = ["date", "CZK", "EUR", "USD", "PLN", "GBP"]
+        writer = csv.DictWriter(target, columns, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(
+            row
+            for row in csv.DictReader(source)
+            if "2022-01" <= row["date"] < "2022-04"
+        )
+
+    seeded = list(
+        seed_ledgers(
+            2,
+            150,
+            date(2022, 3, 1),
+            3,
+            statements=tmp_path / "statements",
+            rates_file=rates_file,
+        )
+    )
+    assert seeded == [("seed0", 150), ("seed1", 150)]
+    statements = (tmp_path / "statements").glob("*/*")
+    assert {statement.suffix for statement in statements} == {".csv", ".xml"}
+
+    columns = (
+        "info",
+        "title",
+        "place",
+        "base_amount",
+        "base_currency",
+        "main_amount",
+        "transaction_date",
+        "bank_id",
+    )
+
+    for username, _ in seeded:
+        user = User.query.filter_by(username=username).one()
+        # Imported rows are only compared, not stored
+        imported = []
+        for statement in (tmp_path / "statements" / username).iterdir():
+            bank = MyBanks(statement.name.split("_")[0])
+            imported += [
+                tuple(row.get(column) for column in columns)
+                for row in BANK_IMPORT_MAP[bank](
+                    io.BytesIO(statement.read_bytes()), user
+                )
+            ]
+
+        stored = Transaction.query.filter_by(user_id=user.id).all()
+        assert sorted(imported, key=repr) == sorted(
+            (tuple(getattr(row, column) for column in columns) for row in stored),
+            key=repr,
+        )
+        assert any(transaction.category_id for transaction in stored)
+
+
+def test_delete_seeded_users(app: Flask) -> None:
+    for username in ("seed0", "seed12", "seedling", "seed_1", "seed1x", "other2"):
+        db.session.add(User(username, f"{username}@wallit.test", "password"))
+    db.session.commit()
+
+    # Underscore is not a wildcard
+    assert delete_users("se_d") == 0
+    assert delete_users("seed") == 2
+    assert {user.username for user in User.query} == {
+        "seedling",
+        "seed_1",
+        "seed1x",
+        "other2",
+    }
+    with pytest.raises(ValueError):
+        delete_users("")
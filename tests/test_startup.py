@@ -0,0 +1,30 @@
+from flask import Flask
+
+from app.monitoring.startup import parse_import_times
+
+IMPORT_TIME_OUTPUT = """\
+import time: self [us] | cumulative | imported package
+import time:       300 |        300 |     sqlalchemy.engine
+import time:       200 |        500 |   sqlalchemy
+import time:      1000 |       1000 |     app.api.schemas
+import time:       500 |       1500 |   app.api
+import time:       100 |       1600 | app
+"""
+
+
+def test_parse_import_times() -> None:
+    assert parse_import_times(IMPORT_TIME_OUTPUT) == {
+        "sqlalchemy": 0.0005,
+        "app.api": 0.0015,
+        "app": 0.0001,
+    }
+
+
+def test_startup_phases(app: Flask) -> None:
+    assert list(app.extensions["startup"]) == [
+        "config",
+        "extensions",
+        "blueprints",
+        "monitoring",
+    ]
+    assert app.jinja_env.bytecode_cache is not None
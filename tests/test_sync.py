@@ -0,0 +1,85 @@
+from datetime import datetime
+
+from flask import Flask, url_for
+from flask.testing import FlaskClient
+
+from app import db
+from app.models import Transaction, TransactionTombstone, User
+from tests.conftest import login
+
+
+def add_transaction(user: User, amount: float) -> Transaction:
+    transaction = Transaction(
+        base_amount=amount,
+        base_currency=user.main_currency,
+        transaction_date=datetime(2001, 2, 1),
+        user=user,
+    )
+    db.session.add(transaction)
+    db.session.commit()
+    return transaction
+
+
+def test_transaction_changes(
+    app: Flask,
+    client: FlaskClient,
+    user_1: User,
+    transaction_1: Transaction,
+    transaction_2: Transaction,
+) -> None:
+    app.config["SYNC_CURSOR_OVERLAP"] = 0
+    kept = add_transaction(user_1, 10)
+    deleted = add_transaction(user_1, 20)
+
+    with client:
+        login(user_1, client)
+        # Without a cursor all transactions of the user are synced
+        response = client.get(url_for("api.fetch_transaction_changes", fields="id"))
+        assert response.status_code == 200
+        assert response.json["reset"] is True
+        assert {row["id"] for row in response.json["transactions"]} == {
+            transaction_1.id,
+            kept.id,
+            deleted.id,
+        }
+        cursor = response.json["cursor"]
+        # Requests share the session of the test, its transaction ends like the one
+        # of a request, as the cursor is the start of the transaction
+        db.session.commit()
+
+        client.patch(
+            url_for("api.modify_transaction", id=transaction_1.id),
+            json={"title": "modified"},
+        )
+        client.delete(url_for("api.delete_transaction", id=deleted.id))
+        added = add_transaction(user_1, 30)
+
+        response = client.get(
+            url_for(
+                "api.fetch_transaction_changes",
+                since=cursor,
+                fields="id,title",
+                format="columns",
+            )
+        )
+        assert response.json["reset"] is False
+        assert sorted(response.json["transactions"]["rows"]) == sorted(
+            [[transaction_1.id, "modified"], [added.id, None]]
+        )
+        assert response.json["deleted"] == [deleted.id]
+        cursor = response.json["cursor"]
+        db.session.commit()
+
+        response = client.get(url_for("api.fetch_transaction_changes", since=cursor))
+        assert response.json["transactions"] == []
+        assert response.json["deleted"] == []
+
+        # Deletion of all transactions resets clients
+        client.delete(url_for("api.delete_all_transactions", id=user_1.id))
+        response = client.get(url_for("api.fetch_transaction_changes", since=cursor))
+        assert response.json["reset"] is True
+        assert response.json["transactions"] == []
+        assert TransactionTombstone.query.filter_by(user_id=user_1.id).count() == 1
+
+        response = client.get(url_for("api.fetch_transaction_changes", since="x"))
+        assert response.status_code == 400
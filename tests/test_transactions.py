@@ -0,0 +1,230 @@
+from datetime import datetime
+from typing import Generator
+from unittest.mock import patch
+
+import pytest
+from flask import Flask, url_for
+from flask.testing import FlaskClient
+from sqlalchemy import event, text
+
+from app import db
+from app.api.schemas import TransactionSchema
+from app.api.search import trigram_available
+from app.models import Bank, Category, Transaction, User
+from tests.conftest import login
+
+
+def test_batch_transactions(
+    client: FlaskClient,
+    user_1: User,
+    bank_1: Bank,
+    category_1: Category,
+    transaction_1: Transaction,
+    transaction_2: Transaction,
+) -> None:
+    with client:
+        login(user_1, client)
+        response = client.post(
+            url_for("api.batch_transactions"),
+            json=dict(
+                add=[
+                    dict(base_amount=10, base_currency="USD", date="2022-01-01T10:00"),
+                    dict(base_amount=10, base_currency="XXX", date="2022-01-01T10:00"),
+                ],
+                modify=[
+                    dict(id=transaction_1.id, title="title2"),
+                    dict(id=transaction_2.id, title="title3"),
+                ],
+                delete=[transaction_2.id],
+            ),
+        )
+        assert response.status_code == 206
+        assert response.json["add"][0]["status"] == 201
+        assert response.json["add"][0]["transaction"]["amount"] == 10
+        assert response.json["add"][1]["status"] == 400
+        # Transactions of other users can be neither modified nor deleted
+        assert [result["status"] for result in response.json["modify"]] == [200, 404]
+        assert response.json["delete"] == [
+            dict(id=transaction_2.id, status=404, errors="Transaction not found")
+        ]
+
+        db.session.refresh(transaction_1)
+        assert transaction_1.title == "title2"
+        assert len(user_1.select_transactions()) == 2
+
+
+def test_modify_filtered_transactions(
+    client: FlaskClient,
+    user_1: User,
+    category_1: Category,
+    transaction_1: Transaction,
+    transaction_2: Transaction,
+) -> None:
+    with client:
+        login(user_1, client)
+        response = client.patch(
+            url_for("api.modify_filtered_transactions"),
+            json=dict(filters=dict(base_currency=["CZK"]), patch=dict(category=None)),
+        )
+        assert response.status_code == 200
+        assert response.json["number_of_modified"] == 1
+
+        db.session.refresh(transaction_1)
+        db.session.refresh(transaction_2)
+        assert transaction_1.category is None
+        assert transaction_2.category is not None
+
+
+def test_foreign_categories_rejected(
+    client: FlaskClient,
+    user_1: User,
+    category_1: Category,
+    category_2: Category,
+    transaction_1: Transaction,
+) -> None:
+    with client:
+        login(user_1, client)
+        response = client.post(
+            url_for("api.batch_transactions"),
+            json=dict(
+                add=[
+                    dict(
+                        base_amount=10,
+                        base_currency="USD",
+                        date="2022-01-01T10:00",
+                        category=category,
+                    )
+                    for category in (category_1.id, category_2.id)
+                ],
+                modify=[dict(id=transaction_1.id, category=category_2.id)],
+            ),
+        )
+        assert [result["status"] for result in response.json["add"]] == [201, 400]
+        assert response.json["modify"][0]["status"] == 400
+
+        db.session.refresh(transaction_1)
+        assert transaction_1.category == category_1
+
+
+def test_search_transactions(
+    client: FlaskClient,
+    user_1: User,
+    transaction_1: Transaction,
+    transaction_2: Transaction,
+) -> None:
+    for title, place in (("Coffee", "Coffee Corner"), ("Coffee beans", None)):
+        db.session.add(
+            Transaction(
+                base_amount=5,
+                base_currency=user_1.main_currency,
+                transaction_date=datetime(2022, 1, 1),
+                title=title,
+                place=place,
+                user=user_1,
+            )
+        )
+    db.session.commit()
+
+    with client:
+        login(user_1, client)
+        # Searched words match prefixes of words, transactions of other users excluded
+        response = client.get(url_for("api.fetch_transactions", q="plac"))
+        assert [item["id"] for item in response.json["transactions"]] == [
+            transaction_1.id
+        ]
+        # More occurrences of searched words rank higher
+        response = client.get(url_for("api.fetch_transactions", q="coffee"))
+        assert [item["place"] for item in response.json["transactions"]] == [
+            "Coffee Corner",
+            None,
+        ]
+        response = client.get(url_for("api.fetch_transactions", q="coffee corn"))
+        assert len(response.json["transactions"]) == 1
+
+        response = client.get(url_for("api.fetch_transactions", q="?!"))
+        assert response.status_code == 400
+
+
+# Stand-ins of pg_trgm functions, only a common prefix of words makes them similar
+TRIGRAM_STUBS = (
+    "CREATE FUNCTION word_similarity(text, text) RETURNS real LANGUAGE sql AS "
+    "$$ SELECT CASE WHEN strpos(' ' || lower($2), ' ' || left(lower($1), 3)) > 0 "
+    "THEN 1 ELSE 0 END::real $$",
+    "CREATE FUNCTION word_similarity_match(text, text) RETURNS boolean "
+    "LANGUAGE sql AS $$ SELECT word_similarity($2, $1) > 0.5 $$",
+    "CREATE OPERATOR %> (LEFTARG = text, RIGHTARG = text, "
+    "FUNCTION = word_similarity_match)",
+)
+
+
+@pytest.fixture()
+def trigram(app: Flask) -> Generator[None, None, None]:
+    """Enable typo tolerant search, with stand-ins where pg_trgm is not installed"""
+    if trigram_available():
+        yield
+        return
+
+    for statement in TRIGRAM_STUBS:
+        db.session.execute(text(statement))
+    db.session.commit()
+    with patch("app.api.search.trigram_available", return_value=True):
+        yield
+    db.session.rollback()
+    db.session.execute(text("DROP OPERATOR %> (text, text)"))
+    db.session.execute(text("DROP FUNCTION word_similarity_match(text, text)"))
+    db.session.execute(text("DROP FUNCTION word_similarity(text, text)"))
+    db.session.commit()
+
+
+def test_typo_tolerant_search(
+    client: FlaskClient, user_1: User, transaction_1: Transaction, trigram: None
+) -> None:
+    for title in ("Coffee", "Tea"):
+        db.session.add(
+            Transaction(
+                base_amount=5,
+                base_currency=user_1.main_currency,
+                transaction_date=datetime(2022, 1, 1),
+                title=title,
+                user=user_1,
+            )
+        )
+    db.session.commit()
+
+    with client:
+        login(user_1, client)
+        # Similar words match besides prefixes, and are ranked by similarity
+        response = client.get(url_for("api.fetch_transactions", q="cofee"))
+        assert response.status_code == 200
+        assert [item["title"] for item in response.json["transactions"]] == ["Coffee"]
+
+
+def test_transaction_projection(
+    client: FlaskClient, user_1: User, transaction_1: Transaction
+) -> None:
+    with client:
+        login(user_1, client)
+        response = client.get(url_for("api.fetch_transactions"))
+        assert response.json == TransactionSchema(many=True).dump([transaction_1])
+
+        statements = []
+
+        def listener(connection, cursor, statement, *args) -> None:
+            statements.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", listener)
+        response = client.get(
+            url_for("api.fetch_transactions", fields="date,id,date", format="columns")
+        )
+        event.remove(db.engine, "before_cursor_execute", listener)
+        assert response.json == {
+            "transactions": {
+                "columns": ["date", "id"],
+                "rows": [["2001-01-01T01:01:01.000001", transaction_1.id]],
+            }
+        }
+        # Only columns of requested fields are selected
+        assert "main_amount" not in statements[-1]
+
+        response = client.get(url_for("api.fetch_transactions", fields="password"))
+        assert response.status_code == 400
@@ -5,7 +5,8 @@ from unittest.mock import patch
 
 import pytest
 
-from app.models import Bank, Category, Transaction, User
+from app import db
+from app.models import Bank, CachedUser, Category, Transaction, User
 
 
 def test_password_hashing(user_1: User) -> None:
@@ -113,3 +114,22 @@ def test_user_selects(user_1: User) -> None:
         transaction_2,
         transaction_3,
     ]
+
+
+def test_cached_user(user_1: User) -> None:
+    cached_user = CachedUser.load(user_1.id)
+    assert cached_user == user_1
+    assert cached_user.main_currency == user_1.main_currency
+    # Attributes missing in the snapshot are served by the full model
+    assert cached_user.email == user_1.email
+    assert CachedUser.load(user_1.id).version == cached_user.version
+
+    user_1.main_currency = "EUR"
+    db.session.commit()
+    reloaded_user = CachedUser.load(user_1.id)
+    assert reloaded_user.main_currency == "EUR"
+    assert reloaded_user.version != cached_user.version
+
+    db.session.delete(user_1)
+    db.session.commit()
+    assert CachedUser.load(cached_user.id) is None
@@ -1,6 +1,9 @@
-from flask import url_for
+from datetime import datetime
+
+from flask import Flask, url_for
 from flask.testing import FlaskClient
 
+from app import db
 from app.models import Bank, Category, Transaction, User
 from tests.conftest import login
 
@@ -95,3 +98,80 @@ def test_fetch_user_entities(
             "id": category_1.id,
             "name": category_1.name,
         }
+
+
+def test_monthly_statements(client: FlaskClient, user_1: User, user_2: User) -> None:
+    for amount, date in (
+        (10, datetime(2001, 1, 31, 23, 59)),
+        (-4, datetime(2001, 2, 2)),
+        (20, datetime(2001, 2, 2)),
+        (-5, datetime(2001, 3, 15)),
+        (30, datetime(2001, 5, 2)),
+    ):
+        db.session.add(
+            Transaction(
+                main_amount=amount,
+                base_amount=amount,
+                base_currency=user_1.main_currency,
+                transaction_date=date,
+                creation_date=date,
+                user=user_1,
+            )
+        )
+    db.session.commit()
+
+    with client:
+        login(user_1, client)
+        response = client.get(url_for("api.monthly_statements", id=user_1.id))
+        assert response.status_code == 200
+        # Months without incoming transactions are left out
+        assert response.json == [
+            {"month": "2001-01", "incoming": 10, "outgoing": 0, "balance": 10},
+            {"month": "2001-02", "incoming": 20, "outgoing": -4, "balance": 16},
+            {"month": "2001-05", "incoming": 30, "outgoing": 0, "balance": 30},
+        ]
+
+        response = client.get(url_for("api.monthly_statements", id=user_2.id))
+        assert response.status_code == 404
+
+
+def test_fetch_bootstrap(
+    app: Flask,
+    client: FlaskClient,
+    user_1: User,
+    bank_1: Bank,
+    category_1: Category,
+    transaction_1: Transaction,
+    transaction_2: Transaction,
+) -> None:
+    with client:
+        login(user_1, client)
+        response = client.get(url_for("api.fetch_bootstrap"))
+        assert response.status_code == 200
+        bootstrap = response.json
+        assert bootstrap.pop("cursor")
+        assert bootstrap == {
+            "session": client.get(url_for("api.fetch_session_entities")).json,
+            "user": client.get(url_for("api.fetch_user_entities")).json,
+            "transactions": client.get(url_for("api.fetch_transactions")).json[
+                "transactions"
+            ],
+            "truncated": False,
+            "monthly": client.get(url_for("api.monthly_statements", id=user_1.id)).json,
+        }
+
+        response = client.get(url_for("api.fetch_bootstrap", fields="id"))
+        assert response.json["transactions"] == [{"id": transaction_1.id}]
+
+        # Transactions over the limit are fetched by the dashboard separately
+        app.config["BOOTSTRAP_TRANSACTIONS_LIMIT"] = 0
+        response = client.get(url_for("api.fetch_bootstrap", format="columns"))
+        assert response.json["transactions"]["rows"] == []
+        assert response.json["truncated"]
+
+        # Dashboard data is inlined into the rendered page only if enabled
+        html = client.get(url_for("main.index")).get_data(as_text=True)
+        assert 'id="bootstrap"' not in html
+        app.config["BOOTSTRAP_INLINE"] = True
+        html = client.get(url_for("main.index")).get_data(as_text=True)
+        assert '<script id="bootstrap" type="application/json">' in html